@@ -1,3 +1,14 @@
 from enstop.plsa import PLSA
-from enstop.enstop_ import EnsembleTopics
-from enstop.utils import log_lift, mean_log_lift, coherence, mean_coherence
+from enstop.enstop_ import EnsembleTopics, ensemble_memory_plan
+from enstop.topic_store import TopicStore
+from enstop.utils import (
+    log_lift,
+    mean_log_lift,
+    coherence,
+    mean_coherence,
+    topic_scores,
+    TopicScorer,
+)
+from enstop.sketch import WordDocumentSketch
+from enstop.co_occurrence import CoOccurrenceIndex
+from enstop.profiling import FitProfiler
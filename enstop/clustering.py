@@ -0,0 +1,456 @@
+import numpy as np
+import numba
+
+
+@numba.njit(parallel=True, nogil=True)
+def core_distances(distance_matrix, min_samples):
+    """Compute the HDBSCAN core distance of each point: the distance from the point
+    to its ``min_samples``-th nearest neighbour (counting the point itself as its
+    zeroth neighbour). Each row is handled with a partial selection rather than a
+    full sort, and only one row is copied per thread at a time.
+
+    Parameters
+    ----------
+    distance_matrix: array of shape (n, n)
+        The distances between points. Row ``i`` holds the distances from point
+        ``i``; the matrix need not be symmetric.
+
+    min_samples: int
+        The neighbour count defining the core distance.
+
+    Returns
+    -------
+    core_distances: array of shape (n,)
+        The core distance of each point.
+    """
+    n = distance_matrix.shape[0]
+    result = np.empty(n, dtype=np.float64)
+    for i in numba.prange(n):
+        result[i] = np.partition(distance_matrix[i].copy(), min_samples)[min_samples]
+    return result
+
+
+@numba.njit(parallel=True, nogil=True)
+def weighted_core_distances(distance_matrix, weights, min_samples):
+    """Compute the HDBSCAN core distance of each of a set of weighted points, where
+    a point of weight ``w`` stands for ``w`` coincident points: the distance from
+    the point to the nearest point at which the total weight of the point and its
+    neighbours so far exceeds ``min_samples``.
+
+    Parameters
+    ----------
+    distance_matrix: array of shape (n, n)
+        The distances between points.
+
+    weights: array of shape (n,)
+        The weight of each point.
+
+    min_samples: int
+        The neighbour count defining the core distance.
+
+    Returns
+    -------
+    core_distances: array of shape (n,)
+        The core distance of each point.
+    """
+    n = distance_matrix.shape[0]
+    result = np.empty(n, dtype=np.float64)
+    for i in numba.prange(n):
+        order = np.argsort(distance_matrix[i])
+        total_weight = weights[i]
+        result[i] = 0.0
+        for j in order:
+            if total_weight > min_samples:
+                break
+            if j == i:
+                continue
+            total_weight += weights[j]
+            result[i] = distance_matrix[i, j]
+    return result
+
+
+@numba.njit(nogil=True)
+def leader_assignments(leader_distances, batch_distances, threshold):
+    """Assign each of a batch of points to the nearest of a set of leaders, or make
+    it a new leader if no leader is within ``threshold``. Points are processed in
+    order, and points that become leaders are candidates for later points of the
+    batch.
+
+    Parameters
+    ----------
+    leader_distances: array of shape (n_batch, n_leaders)
+        The distances from the points of the batch to the existing leaders.
+
+    batch_distances: array of shape (n_batch, n_batch)
+        The distances between the points of the batch.
+
+    threshold: float
+        The largest distance at which a point may join a leader.
+
+    Returns
+    -------
+    assignments: array of shape (n_batch,)
+        The leader of each point. Existing leaders are numbered from ``0`` and new
+        leaders from ``n_leaders`` upwards, in the order they were created.
+
+    new_leaders: array of shape (n_new_leaders,)
+        The indices within the batch of the points that became leaders.
+    """
+    n_batch, n_leaders = leader_distances.shape
+    assignments = np.empty(n_batch, dtype=np.intp)
+    new_leaders = np.empty(n_batch, dtype=np.intp)
+    n_new_leaders = 0
+    for i in range(n_batch):
+        best_leader = -1
+        best_distance = threshold
+        for j in range(n_leaders):
+            if leader_distances[i, j] <= best_distance:
+                best_distance = leader_distances[i, j]
+                best_leader = j
+        for j in range(n_new_leaders):
+            if batch_distances[i, new_leaders[j]] <= best_distance:
+                best_distance = batch_distances[i, new_leaders[j]]
+                best_leader = n_leaders + j
+        if best_leader < 0:
+            best_leader = n_leaders + n_new_leaders
+            new_leaders[n_new_leaders] = i
+            n_new_leaders += 1
+        assignments[i] = best_leader
+    return assignments, new_leaders[:n_new_leaders]
+
+
+@numba.njit(nogil=True)
+def mutual_reachability_mst(distance_matrix, core_distances):
+    """Build a minimum spanning tree of the mutual reachability graph with Prim's
+    algorithm. The mutual reachability distance between points ``i`` and ``j`` is
+    the largest of ``d(i, j)``, ``d(j, i)`` and the core distances of ``i`` and
+    ``j``; it is computed as it is needed, so no matrix beyond the input distance
+    matrix is ever held in memory.
+
+    Parameters
+    ----------
+    distance_matrix: array of shape (n, n)
+        The distances between points; the matrix need not be symmetric.
+
+    core_distances: array of shape (n,)
+        The core distance of each point.
+
+    Returns
+    -------
+    mst: array of shape (n - 1, 3)
+        The edges of the spanning tree as rows of (point, point, distance) in the
+        order they were added to the tree.
+    """
+    n = distance_matrix.shape[0]
+    result = np.empty((n - 1, 3), dtype=np.float64)
+    in_tree = np.zeros(n, dtype=np.bool_)
+    nearest_distance = np.full(n, np.inf)
+    nearest_source = np.zeros(n, dtype=np.intp)
+
+    current = 0
+    for edge in range(n - 1):
+        in_tree[current] = True
+        best_point = -1
+        best_distance = np.inf
+        for j in range(n):
+            if in_tree[j]:
+                continue
+            distance = max(
+                distance_matrix[current, j],
+                distance_matrix[j, current],
+                core_distances[current],
+                core_distances[j],
+            )
+            if distance < nearest_distance[j]:
+                nearest_distance[j] = distance
+                nearest_source[j] = current
+            if nearest_distance[j] < best_distance or best_point < 0:
+                best_distance = nearest_distance[j]
+                best_point = j
+
+        result[edge, 0] = nearest_source[best_point]
+        result[edge, 1] = best_point
+        result[edge, 2] = best_distance
+        current = best_point
+
+    return result
+
+
+@numba.njit(nogil=True)
+def _find_root(parent, node):
+    root = node
+    while parent[root] != root:
+        root = parent[root]
+    while parent[node] != root:
+        next_node = parent[node]
+        parent[node] = root
+        node = next_node
+    return root
+
+
+@numba.njit(nogil=True)
+def _label_mst(sorted_mst, point_sizes):
+    n_points = sorted_mst.shape[0] + 1
+    result = np.empty((n_points - 1, 4), dtype=np.float64)
+    parent = np.arange(2 * n_points - 1)
+    size = np.empty(2 * n_points - 1, dtype=np.intp)
+    size[:n_points] = point_sizes
+
+    for i in range(n_points - 1):
+        a = _find_root(parent, np.intp(sorted_mst[i, 0]))
+        b = _find_root(parent, np.intp(sorted_mst[i, 1]))
+        new_node = n_points + i
+        result[i, 0] = a
+        result[i, 1] = b
+        result[i, 2] = sorted_mst[i, 2]
+        result[i, 3] = size[a] + size[b]
+        parent[a] = new_node
+        parent[b] = new_node
+        size[new_node] = size[a] + size[b]
+
+    return result
+
+
+def single_linkage_tree(mst, point_sizes=None):
+    """Convert a minimum spanning tree into a single linkage tree.
+
+    Parameters
+    ----------
+    mst: array of shape (n - 1, 3)
+        The edges of the spanning tree as rows of (point, point, distance).
+
+    point_sizes: array of shape (n,) or None (optional, default=None)
+        The number of points each point of the tree stands for. If None each
+        point counts once.
+
+    Returns
+    -------
+    single_linkage_tree: array of shape (n - 1, 4)
+        The merges in the tree, in the scipy linkage format: rows of (node, node,
+        distance, size) where the node formed by row ``i`` is ``n + i``.
+    """
+    if point_sizes is None:
+        point_sizes = np.ones(mst.shape[0] + 1, dtype=np.intp)
+    order = np.argsort(mst[:, 2], kind="mergesort")
+    return _label_mst(mst[order], np.asarray(point_sizes, dtype=np.intp))
+
+
+@numba.njit(nogil=True)
+def condense_tree(single_linkage_tree, min_cluster_size, point_sizes):
+    """Condense a single linkage tree into the HDBSCAN cluster hierarchy: walking
+    down from the root, a split only creates new clusters if both sides have at
+    least ``min_cluster_size`` points, otherwise the smaller side's points fall out
+    of the cluster at that distance.
+
+    Parameters
+    ----------
+    single_linkage_tree: array of shape (n - 1, 4)
+        The single linkage tree, as returned by ``single_linkage_tree``.
+
+    min_cluster_size: int
+        The smallest number of points a cluster may have.
+
+    point_sizes: array of shape (n,)
+        The number of points each point of the tree stands for. A point standing
+        for at least ``min_cluster_size`` points can form a cluster on its own.
+
+    Returns
+    -------
+    parent, child, lambda_val, child_size: arrays of shape (n_rows,)
+        The rows of the condensed tree. Points are numbered ``0`` to ``n - 1`` and
+        clusters from ``n`` (the root) upwards; ``lambda_val`` is the inverse of the
+        distance at which the child left the parent.
+    """
+    n_points = single_linkage_tree.shape[0] + 1
+    root = 2 * (n_points - 1)
+
+    node_order = np.empty(root + 1, dtype=np.intp)
+    node_order[0] = root
+    head = 0
+    tail = 1
+    while head < tail:
+        node = node_order[head]
+        head += 1
+        if node >= n_points:
+            node_order[tail] = np.intp(single_linkage_tree[node - n_points, 0])
+            node_order[tail + 1] = np.intp(single_linkage_tree[node - n_points, 1])
+            tail += 2
+
+    parent = np.empty(3 * n_points, dtype=np.intp)
+    child = np.empty(3 * n_points, dtype=np.intp)
+    lambda_val = np.empty(3 * n_points, dtype=np.float64)
+    child_size = np.empty(3 * n_points, dtype=np.intp)
+    n_rows = 0
+
+    relabel = np.empty(root + 1, dtype=np.intp)
+    relabel[root] = n_points
+    next_label = n_points + 1
+    ignore = np.zeros(root + 1, dtype=np.bool_)
+    stack = np.empty(root + 1, dtype=np.intp)
+
+    for node in node_order:
+        if ignore[node] or node < n_points:
+            continue
+
+        merge = single_linkage_tree[node - n_points]
+        sides = (np.intp(merge[0]), np.intp(merge[1]))
+        if merge[2] > 0.0:
+            lambda_value = 1.0 / merge[2]
+        else:
+            lambda_value = np.inf
+
+        counts = np.empty(2, dtype=np.intp)
+        for s in range(2):
+            if sides[s] >= n_points:
+                counts[s] = np.intp(single_linkage_tree[sides[s] - n_points, 3])
+            else:
+                counts[s] = point_sizes[sides[s]]
+
+        if counts[0] >= min_cluster_size and counts[1] >= min_cluster_size:
+            for s in range(2):
+                relabel[sides[s]] = next_label
+                next_label += 1
+                parent[n_rows] = relabel[node]
+                child[n_rows] = relabel[sides[s]]
+                lambda_val[n_rows] = lambda_value
+                child_size[n_rows] = counts[s]
+                n_rows += 1
+                if sides[s] < n_points:
+                    # A point heavy enough to be a cluster never leaves it
+                    parent[n_rows] = relabel[sides[s]]
+                    child[n_rows] = sides[s]
+                    lambda_val[n_rows] = np.inf
+                    child_size[n_rows] = counts[s]
+                    n_rows += 1
+        else:
+            for s in range(2):
+                if counts[s] >= min_cluster_size:
+                    relabel[sides[s]] = relabel[node]
+                    if sides[s] < n_points:
+                        # The cluster has shrunk to a single heavy point
+                        parent[n_rows] = relabel[node]
+                        child[n_rows] = sides[s]
+                        lambda_val[n_rows] = lambda_value
+                        child_size[n_rows] = counts[s]
+                        n_rows += 1
+                    continue
+                # Every point below this side falls out of the cluster here
+                stack[0] = sides[s]
+                stack_size = 1
+                while stack_size > 0:
+                    stack_size -= 1
+                    sub_node = stack[stack_size]
+                    ignore[sub_node] = True
+                    if sub_node < n_points:
+                        parent[n_rows] = relabel[node]
+                        child[n_rows] = sub_node
+                        lambda_val[n_rows] = lambda_value
+                        child_size[n_rows] = point_sizes[sub_node]
+                        n_rows += 1
+                    else:
+                        merge_row = sub_node - n_points
+                        stack[stack_size] = np.intp(single_linkage_tree[merge_row, 0])
+                        stack[stack_size + 1] = np.intp(
+                            single_linkage_tree[merge_row, 1]
+                        )
+                        stack_size += 2
+
+    return parent[:n_rows], child[:n_rows], lambda_val[:n_rows], child_size[:n_rows]
+
+
+def leaf_clusters(single_linkage_tree, min_cluster_size, point_sizes=None):
+    """Extract flat clusters from a single linkage tree the way HDBSCAN does with
+    ``cluster_selection_method="leaf"``: the clusters are the leaves of the
+    condensed tree, and a point's membership strength is the fraction of its
+    cluster's lifetime for which the point stayed in it.
+
+    Parameters
+    ----------
+    single_linkage_tree: array of shape (n - 1, 4)
+        The single linkage tree, as returned by ``single_linkage_tree``.
+
+    min_cluster_size: int
+        The smallest number of points a cluster may have.
+
+    point_sizes: array of shape (n,) or None (optional, default=None)
+        The number of points each point of the tree stands for, as passed to
+        ``single_linkage_tree``. If None each point counts once.
+
+    Returns
+    -------
+    labels, probabilities: arrays of shape (n,)
+        The cluster label of each point (-1 for noise) and the strength with which
+        each point belongs to its cluster (0 for noise).
+    """
+    n_points = single_linkage_tree.shape[0] + 1
+    if point_sizes is None:
+        point_sizes = np.ones(n_points, dtype=np.intp)
+    parent, child, lambda_val, child_size = condense_tree(
+        single_linkage_tree, min_cluster_size, np.asarray(point_sizes, dtype=np.intp)
+    )
+
+    is_cluster_row = child >= n_points
+    has_child_clusters = np.zeros(parent.max() + 1, dtype=bool)
+    has_child_clusters[parent[is_cluster_row]] = True
+    leaves = np.sort(child[is_cluster_row][~has_child_clusters[child[is_cluster_row]]])
+
+    cluster_label = np.full(parent.max() + 1, -1, dtype=np.intp)
+    cluster_label[leaves] = np.arange(leaves.shape[0])
+
+    # The largest lambda value in each cluster, at which it disappears entirely
+    deaths = np.zeros(parent.max() + 1)
+    np.maximum.at(deaths, parent, lambda_val)
+
+    labels = np.full(n_points, -1, dtype=np.intp)
+    probabilities = np.zeros(n_points)
+    is_point_row = child < n_points
+    points = child[is_point_row]
+    point_parents = parent[is_point_row]
+    point_lambdas = lambda_val[is_point_row]
+    labels[points] = cluster_label[point_parents]
+
+    in_cluster = labels[points] >= 0
+    points = points[in_cluster]
+    max_lambdas = deaths[point_parents[in_cluster]]
+    point_lambdas = point_lambdas[in_cluster]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        strengths = np.minimum(point_lambdas, max_lambdas) / max_lambdas
+    strengths[(max_lambdas == 0.0) | ~np.isfinite(point_lambdas)] = 1.0
+    probabilities[points] = strengths
+
+    return labels, probabilities
+
+
+def mutual_reachability_single_linkage_tree(
+    distance_matrix, min_samples, point_sizes=None
+):
+    """Build the HDBSCAN single linkage tree for a precomputed (and possibly
+    asymmetric) distance matrix, using only the memory of the matrix itself.
+
+    Parameters
+    ----------
+    distance_matrix: array of shape (n, n)
+        The distances between points.
+
+    min_samples: int
+        The min_samples parameter of HDBSCAN.
+
+    point_sizes: array of shape (n,) or None (optional, default=None)
+        The number of coincident points each point stands for, counted both in
+        the core distances and in the sizes of the tree's clusters. If None each
+        point counts once.
+
+    Returns
+    -------
+    single_linkage_tree: array of shape (n - 1, 4)
+        The single linkage tree of the mutual reachability graph.
+    """
+    if point_sizes is None:
+        min_samples = max(min(distance_matrix.shape[0] - 1, min_samples), 1)
+        core = core_distances(distance_matrix, min_samples)
+    else:
+        core = weighted_core_distances(
+            distance_matrix, np.asarray(point_sizes, dtype=np.float64), min_samples
+        )
+    mst = mutual_reachability_mst(distance_matrix, core)
+    return single_linkage_tree(mst, point_sizes)
@@ -0,0 +1,336 @@
+import os
+import numpy as np
+import numba
+from scipy.sparse import csc_matrix
+from sklearn.utils import check_random_state
+
+from enstop.sketch import WordDocumentSketch, _estimate_intersection, _EMPTY
+
+
+@numba.njit(parallel=True, nogil=True)
+def _indexed_co_occurrences(
+    top_words, words, positions, pair_counts, sketches, n_docs_per_word
+):
+    """Look up the number of documents each pair of each topic's top words occur
+    in together in the pair counts when both words are indexed, and estimate it
+    from the words' sketches otherwise."""
+    n_topics, n = top_words.shape
+    result = np.zeros((n_topics, n, n), dtype=np.float64)
+    for z in numba.prange(n_topics):
+        for i in range(n - 1):
+            w = words[top_words[z, i]]
+            for j in range(i + 1, n):
+                v = words[top_words[z, j]]
+                if positions[w] >= 0 and positions[v] >= 0:
+                    result[z, i, j] = pair_counts[positions[w], positions[v]]
+                else:
+                    result[z, i, j] = _estimate_intersection(
+                        sketches[w],
+                        sketches[v],
+                        n_docs_per_word[w],
+                        n_docs_per_word[v],
+                    )
+    return result
+
+
+class CoOccurrenceIndex(object):
+    """An on-disk, append-only index of the document statistics topic scores are
+    computed from, for a corpus that grows over time. New batches of documents are
+    added with ``add_batch``, which only processes the new documents; the index
+    keeps exact per-word document and occurrence counts, exact pairwise document
+    co-occurrence counts for the frequent (indexed) words, and a
+    ``WordDocumentSketch`` of every word from which the co-occurrences of other
+    pairs are estimated (exactly, for words rare enough to fit in their sketch).
+
+    An index can be passed in place of the corpus to ``TopicScorer``,
+    ``coherence``, ``log_lift`` and the other scoring functions.
+
+    The pair counts and sketches are kept in ``.npy`` files that are memory
+    mapped and updated in place, so adding a batch only reads and writes the
+    entries the batch changes. The new values of those entries are first written
+    to a journal, which is replayed when the index is next opened if a crash
+    interrupts the update, so an index is always either as it was before a batch
+    or has the whole batch added.
+
+    Parameters
+    ----------
+    path: string
+        The directory to keep the index in. It is created if it does not exist.
+
+    indexed_words: array of int or None (optional, default=None)
+        The words to keep exact pairwise co-occurrence counts for. If None the
+        ``n_indexed_words`` words occurring in the most documents of the first
+        batch are used. Only used when the index is created.
+
+    n_indexed_words: int (optional, default=2048)
+        The number of words to index if ``indexed_words`` is None. The pair counts
+        take ``8 * n_indexed_words ** 2`` bytes.
+
+    sketch_size: int (optional, default=512)
+        The sketch size of the ``WordDocumentSketch`` of the corpus. Only used when
+        the index is created.
+
+    random_state: int, RandomState instance or None (optional, default=None)
+        The random state used to choose the sketch's hash function. Only used when
+        the index is created.
+
+    Attributes
+    ----------
+    batches: list of strings
+        The ids of the batches added to the index, in the order they were added.
+
+    indexed_words: array of int
+        The words with exact pairwise co-occurrence counts.
+
+    pair_counts: array of shape (n_indexed_words, n_indexed_words)
+        The number of documents each pair of indexed words occur in together.
+
+    sketch: WordDocumentSketch
+        The sketch of the corpus, which also holds the per-word document and
+        occurrence counts.
+    """
+
+    def __init__(
+        self,
+        path,
+        indexed_words=None,
+        n_indexed_words=2048,
+        sketch_size=512,
+        random_state=None,
+    ):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._n_indexed_words = n_indexed_words
+        self._sketch_size = sketch_size
+        self._random_state = random_state
+
+        self.batches = []
+        self.indexed_words = indexed_words
+        self.pair_counts = None
+        self.sketch = None
+        if os.path.exists(os.path.join(path, "index.npz")):
+            self._open()
+            journal_path = os.path.join(path, "journal.npz")
+            if os.path.exists(journal_path):
+                with np.load(journal_path) as journal:
+                    self._apply(journal)
+
+    @property
+    def n_docs(self):
+        """The number of documents in the index."""
+        return 0 if self.sketch is None else self.sketch.n_docs
+
+    @property
+    def n_docs_per_word(self):
+        """The number of documents each word occurs in."""
+        return self.sketch.n_docs_per_word
+
+    @property
+    def word_totals(self):
+        """The total count of each word over the documents."""
+        return self.sketch.word_totals
+
+    def __contains__(self, batch_id):
+        return str(batch_id) in self.batches
+
+    def __len__(self):
+        return len(self.batches)
+
+    def add_batch(self, batch_id, data):
+        """Add a batch of new documents to the index.
+
+        Parameters
+        ----------
+        batch_id: string
+            A unique id for the batch, used to guard against adding the same
+            documents twice.
+
+        data: array or sparse matrix of shape (n_batch_docs, n_words)
+            The word counts of the new documents.
+
+        Returns
+        -------
+        self
+        """
+        batch_id = str(batch_id)
+        if batch_id in self.batches:
+            raise ValueError(
+                "Batch {} has already been added to the index at {}".format(
+                    batch_id, self.path
+                )
+            )
+
+        if self.sketch is not None and data.shape[1] != self.sketch.n_words:
+            raise ValueError(
+                "Data has {} words but the index at {} has {}".format(
+                    data.shape[1], self.path, self.sketch.n_words
+                )
+            )
+
+        word_docs = csc_matrix(data, copy=True)
+        word_docs.data = (word_docs.data > 0).astype(np.int32)
+        word_docs.eliminate_zeros()
+
+        if self.sketch is None:
+            self._create(word_docs)
+
+        indexed_docs = word_docs[:, self.indexed_words]
+        pair_counts = (indexed_docs.T @ indexed_docs).tocoo()
+        words, sketches, n_docs_per_word, word_totals = self.sketch._updated_rows(data)
+
+        # Journal the new values of everything the batch changes before changing
+        # any of it, so an interrupted update can be finished when reopened
+        self._write_atomic(
+            "journal.npz",
+            lambda f: np.savez(
+                f,
+                batch_id=np.array(batch_id),
+                n_docs=np.int64(self.sketch.n_docs + data.shape[0]),
+                rows=pair_counts.row,
+                cols=pair_counts.col,
+                pair_counts=self.pair_counts[pair_counts.row, pair_counts.col]
+                + pair_counts.data,
+                words=words,
+                sketches=sketches,
+                n_docs_per_word=n_docs_per_word,
+                word_totals=word_totals,
+            ),
+        )
+        with np.load(os.path.join(self.path, "journal.npz")) as journal:
+            self._apply(journal)
+        return self
+
+    def _create(self, word_docs):
+        """Create the index's files for a vocabulary of ``word_docs.shape[1]``
+        words, choosing the indexed words from the first batch if need be."""
+        n_words = word_docs.shape[1]
+        if self.indexed_words is None:
+            n_docs_per_word = np.diff(word_docs.indptr)
+            self.indexed_words = np.sort(
+                np.argsort(n_docs_per_word, kind="mergesort")[::-1][
+                    : self._n_indexed_words
+                ]
+            )
+        self.indexed_words = np.asarray(self.indexed_words, dtype=np.int64)
+        n_indexed = self.indexed_words.shape[0]
+        random_state = check_random_state(self._random_state)
+        seed = np.uint64(random_state.randint(np.iinfo(np.int64).max))
+
+        for filename, shape, dtype, fill in (
+            ("pair_counts.npy", (n_indexed, n_indexed), np.int64, 0),
+            ("sketches.npy", (n_words, self._sketch_size), np.uint64, _EMPTY),
+            ("n_docs_per_word.npy", (n_words,), np.int64, 0),
+            ("word_totals.npy", (n_words,), np.float64, 0),
+        ):
+            array = np.lib.format.open_memmap(
+                os.path.join(self.path, filename), mode="w+", dtype=dtype, shape=shape
+            )
+            array[:] = fill
+            array.flush()
+            del array
+
+        # The index only exists once its metadata does
+        self._write_metadata(seed, 0)
+        self._open()
+
+    def _open(self):
+        """Read the index's metadata and memory map its arrays."""
+        with np.load(os.path.join(self.path, "index.npz")) as saved:
+            self.batches = [str(batch) for batch in saved["batches"]]
+            self.indexed_words = saved["indexed_words"]
+            seed = np.uint64(saved["seed"])
+            n_docs = int(saved["n_docs"])
+
+        def open_array(filename):
+            return np.load(os.path.join(self.path, filename), mmap_mode="r+")
+
+        self.pair_counts = open_array("pair_counts.npy")
+        self.sketch = WordDocumentSketch.__new__(WordDocumentSketch)
+        self.sketch.seed = seed
+        self.sketch.sketches = open_array("sketches.npy")
+        self.sketch.n_docs = n_docs
+        self.sketch.n_docs_per_word = open_array("n_docs_per_word.npy")
+        self.sketch.word_totals = open_array("word_totals.npy")
+
+    def _apply(self, journal):
+        """Write a batch's journalled values into the index and record the batch.
+        Applying the same journal twice has the same effect as applying it once."""
+        batch_id = str(journal["batch_id"])
+        if batch_id not in self.batches:
+            self.pair_counts[journal["rows"], journal["cols"]] = journal["pair_counts"]
+            words = journal["words"]
+            self.sketch.sketches[words] = journal["sketches"]
+            self.sketch.n_docs_per_word[words] = journal["n_docs_per_word"]
+            self.sketch.word_totals[words] = journal["word_totals"]
+            for array in (
+                self.pair_counts,
+                self.sketch.sketches,
+                self.sketch.n_docs_per_word,
+                self.sketch.word_totals,
+            ):
+                array.flush()
+
+            self.batches.append(batch_id)
+            self.sketch.n_docs = int(journal["n_docs"])
+            self._write_metadata(self.sketch.seed, self.sketch.n_docs)
+        os.remove(os.path.join(self.path, "journal.npz"))
+
+    def _write_metadata(self, seed, n_docs):
+        self._write_atomic(
+            "index.npz",
+            lambda f: np.savez(
+                f,
+                batches=np.array(self.batches),
+                indexed_words=self.indexed_words,
+                seed=seed,
+                n_docs=np.int64(n_docs),
+            ),
+        )
+
+    def _write_atomic(self, filename, write):
+        final_path = os.path.join(self.path, filename)
+        temp_path = final_path + ".tmp-{}".format(os.getpid())
+        with open(temp_path, "wb") as temp_file:
+            write(temp_file)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, final_path)
+
+    def co_occurrence_counts(self, top_words):
+        """Count the number of documents each pair of each topic's top words occur
+        in together, exactly for indexed words and estimated from the sketch
+        otherwise.
+
+        Parameters
+        ----------
+        top_words: array of shape (n_topics, n)
+            The top words of each topic.
+
+        Returns
+        -------
+        table_top_words: array of shape (n_topics, n)
+            The top words of each topic as indices into the union of top words.
+
+        co_occurrences: array of shape (n_topics, n, n)
+            The number of documents the ``i``th and ``j``th top words of each topic
+            occur in together, for ``i < j``.
+
+        n_docs_per_word: array of shape (n_union_words,)
+            The number of documents each of the union of top words occurs in.
+        """
+        if self.sketch is None:
+            raise ValueError("The index at {} is empty".format(self.path))
+
+        positions = np.full(self.sketch.n_words, -1, dtype=np.int64)
+        positions[self.indexed_words] = np.arange(self.indexed_words.shape[0])
+        words, table_top_words = np.unique(top_words, return_inverse=True)
+        table_top_words = table_top_words.reshape(top_words.shape)
+        co_occurrences = _indexed_co_occurrences(
+            table_top_words,
+            words,
+            positions,
+            self.pair_counts,
+            self.sketch.sketches,
+            self.sketch.n_docs_per_word,
+        )
+        return table_top_words, co_occurrences, self.sketch.n_docs_per_word[words]
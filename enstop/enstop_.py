@@ -1,10 +1,17 @@
 import numpy as np
 import numba
+import time
+import queue
+import threading
 from warnings import warn
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.utils import check_array, check_random_state
-from sklearn.decomposition import NMF, non_negative_factorization
-from scipy.sparse import issparse, csr_matrix, coo_matrix
+from sklearn.decomposition import NMF, PCA, non_negative_factorization
+from sklearn.random_projection import SparseRandomProjection
+from sklearn.preprocessing import normalize as normalize_rows
+from scipy.sparse import issparse, csr_matrix, coo_matrix, vstack
+from scipy.optimize import linear_sum_assignment
+from scipy.linalg.blas import ssyrk
 import dask
 
 try:
@@ -14,14 +21,16 @@ try:
 except ImportError:
     warn("Joblib could not be loaded; joblib parallelism will not be available")
     _HAVE_JOBLIB = False
-from hdbscan._hdbscan_linkage import mst_linkage_core, label
-from hdbscan.hdbscan_ import _tree_to_labels
+
+try:
+    from dask import distributed
+
+    _HAVE_DISTRIBUTED = True
+except ImportError:
+    _HAVE_DISTRIBUTED = False
 import hdbscan
 import umap
 
-# TODO: Once umap 0.4 is released enable this...
-# from umap.distances import hellinger
-
 
 @numba.njit()
 def hellinger(x, y):
@@ -42,8 +51,24 @@ def hellinger(x, y):
         return np.sqrt(1 - result / np.sqrt(l1_norm_x * l1_norm_y))
 
 
-from enstop.utils import normalize, coherence, mean_coherence, log_lift, mean_log_lift
-from enstop.plsa import plsa_fit, plsa_refit
+from enstop.utils import normalize, TopicScorer
+from enstop.serialization import save_model, load_model
+from enstop.plsa import (
+    plsa_prepare,
+    plsa_fit_prepared,
+    plsa_fit_batch,
+    plsa_refit,
+    plsa_shared_init,
+    plsa_member_init,
+    _deadline,
+)
+from enstop.topic_store import TopicStore
+from enstop.profiling import FitProfiler, phase, _NULL_PHASE
+from enstop.clustering import (
+    leaf_clusters,
+    leader_assignments,
+    mutual_reachability_single_linkage_tree,
+)
 
 
 def plsa_topics(X, k, **kwargs):
@@ -68,30 +93,142 @@ def plsa_topics(X, k, **kwargs):
             * ``tolerance``
             * ``e_step_threshold``
             * ``random_state``
+        and ``shared_init``, the factors of the whole corpus from
+        ``plsa_shared_init`` to derive the initialization from (see
+        ``plsa_member_init``) in place of ``init``, ``deadline``, the wall
+        clock time at which to stop EM, and ``return_max_time_reached``, whether
+        to also return whether EM was stopped at the deadline.
 
     Returns
     -------
     topics: array of shape (k, n_words)
         The topics generated from the bootstrap sample.
+
+    max_time_reached: bool
+        Only returned if ``return_max_time_reached`` is True. Whether EM was
+        stopped at the deadline.
+    """
+    return _plsa_member_topics(_plsa_member_inputs(X, k, **kwargs), k, **kwargs)
+
+
+def _plsa_member_inputs(X, k, **kwargs):
+    """The first stage of ``plsa_topics``: draw the bootstrap sample and prepare
+    the inputs of the EM optimization. This holds the GIL."""
+    rng = check_random_state(kwargs.get("random_state", None))
+    with phase("bootstrap"):
+        if kwargs.get("bootstrap", True):
+            bootstrap_sample_indices = rng.randint(0, X.shape[0], size=X.shape[0])
+            # Weight documents by their multiplicity in the bootstrap sample rather
+            # than materializing a resampled copy of the corpus
+            sample_weight = np.bincount(
+                bootstrap_sample_indices, minlength=X.shape[0]
+            )
+        else:
+            sample_weight = None
+    with phase("init"):
+        if kwargs.get("shared_init", None) is not None:
+            init = plsa_member_init(X, kwargs["shared_init"], sample_weight, rng=rng)
+        else:
+            init = kwargs.get("init", "random")
+        return plsa_prepare(
+            X,
+            k,
+            init=init,
+            random_state=kwargs.get("random_state", None),
+            sample_weight=sample_weight,
+        )
+
+
+def _plsa_member_topics(prepared, k, **kwargs):
+    """The second stage of ``plsa_topics``: the EM optimization, which runs
+    without the GIL."""
+    with phase("em"):
+        doc_topic, topic_vocab, max_time_reached = plsa_fit_prepared(
+            prepared,
+            n_iter=kwargs.get("n_iter", 100),
+            n_iter_per_test=kwargs.get("n_iter_per_test", 10),
+            tolerance=kwargs.get("tolerance", 0.001),
+            e_step_thresh=kwargs.get("e_step_thresh", 1e-16),
+            deadline=kwargs.get("deadline", np.inf),
+            return_max_time_reached=True,
+        )
+    if kwargs.get("return_max_time_reached", False):
+        return topic_vocab, max_time_reached
+    return topic_vocab
+
+
+def plsa_batch_topics(X, k, random_states, **kwargs):
+    """Perform a boostrap sample from a corpus of documents for each of a list of
+    random states and fit all the samples with pLSA in a single batched EM
+    optimization. This produces the same topics as calling ``plsa_topics`` once per
+    random state, but makes only one pass over the data per EM iteration for the
+    whole batch.
+
+    Parameters
+    ----------
+    X: sparse matrix of shape (n_docs, n_words)
+        The bag of words representation of the corpus of documents.
+
+    k: int
+        The number of topics to generate per sample.
+
+    random_states: list
+        The random state (int, RandomState instance or None) to use for each
+        sample; the number of samples is the length of this list.
+
+    kwargs:
+        Further keyword arguments that can be passed on th the ``plsa_fit_batch``
+        function. Possibilities include:
+            * ``init``
+            * ``n_iter``
+            * ``n_iter_per_test``
+            * ``tolerance``
+            * ``e_step_threshold``
+        and ``deadline`` and ``return_max_time_reached``, as for
+        ``plsa_topics``.
+
+    Returns
+    -------
+    topics: array of shape (len(random_states) * k, n_words)
+        The topics generated from the bootstrap samples.
+
+    max_time_reached: bool
+        Only returned if ``return_max_time_reached`` is True. Whether EM was
+        stopped at the deadline.
     """
-    A = X.tocsr()
+    n_models = len(random_states)
     if kwargs.get("bootstrap", True):
-        rng = check_random_state(kwargs.get("random_state", None))
-        bootstrap_sample_indices = rng.randint(0, A.shape[0], size=A.shape[0])
-        B = A[bootstrap_sample_indices]
+        sample_weights = np.empty((n_models, X.shape[0]), dtype=np.float32)
+        for i, seed in enumerate(random_states):
+            rng = check_random_state(seed)
+            bootstrap_sample_indices = rng.randint(0, X.shape[0], size=X.shape[0])
+            sample_weights[i] = np.bincount(
+                bootstrap_sample_indices, minlength=X.shape[0]
+            )
     else:
-        B = A
-    doc_topic, topic_vocab = plsa_fit(
-        B,
+        sample_weights = None
+    if kwargs.get("deadline", np.inf) < np.inf:
+        max_time = kwargs["deadline"] - time.time()
+    else:
+        max_time = None
+    doc_topic, topic_vocab, max_time_reached = plsa_fit_batch(
+        X,
         k,
+        n_models,
         init=kwargs.get("init", "random"),
         n_iter=kwargs.get("n_iter", 100),
         n_iter_per_test=kwargs.get("n_iter_per_test", 10),
         tolerance=kwargs.get("tolerance", 0.001),
         e_step_thresh=kwargs.get("e_step_thresh", 1e-16),
-        random_state=kwargs.get("random_state", None),
+        random_state=list(random_states),
+        sample_weights=sample_weights,
+        max_time=max_time,
+        return_max_time_reached=True,
     )
-    return topic_vocab
+    topics = topic_vocab.reshape(n_models * k, X.shape[1])
+    if kwargs.get("return_max_time_reached", False):
+        return topics, max_time_reached
+    return topics
 
 
 def nmf_topics(X, k, **kwargs):
@@ -114,40 +251,684 @@ def nmf_topics(X, k, **kwargs):
             * ``beta_loss``
             * ``alpha``
             * ``solver``
+        and ``return_max_time_reached``, as for ``plsa_topics``; NMF can't be
+        stopped at a deadline, so the flag is always False.
 
     Returns
     -------
     topics: array of shape (k, n_words)
         The topics generated from the bootstrap sample.
+
+    max_time_reached: bool
+        Only returned if ``return_max_time_reached`` is True. Always False.
     """
-    A = X.tocsr()
-    if kwargs.get("bootstrap", True):
-        rng = check_random_state(kwargs.get("random_state", None))
-        bootstrap_sample_indices = rng.randint(0, A.shape[0], size=A.shape[0])
-        B = A[bootstrap_sample_indices]
-    else:
-        B = A
-    nmf = NMF(
-        n_components=k,
-        init=kwargs.get("init", "nndsvd"),
-        beta_loss=kwargs.get("beta_loss", 1),
-        alpha=kwargs.get("alpha", 0.0),
-        solver=kwargs.get("solver", "mu"),
-        random_state=kwargs.get("random_state", None),
-    ).fit(B)
+    return _nmf_member_topics(_nmf_member_inputs(X, k, **kwargs), k, **kwargs)
+
+
+def _nmf_member_inputs(X, k, **kwargs):
+    """The first stage of ``nmf_topics``: draw the bootstrap sample."""
+    with phase("bootstrap"):
+        A = X.tocsr()
+        if kwargs.get("bootstrap", True):
+            rng = check_random_state(kwargs.get("random_state", None))
+            bootstrap_sample_indices = rng.randint(0, A.shape[0], size=A.shape[0])
+            return A[bootstrap_sample_indices]
+        return A
+
+
+def _nmf_member_topics(B, k, **kwargs):
+    """The second stage of ``nmf_topics``: fit NMF to the bootstrap sample."""
+    with phase("nmf"):
+        nmf = NMF(
+            n_components=k,
+            init=kwargs.get("init", "nndsvd"),
+            beta_loss=kwargs.get("beta_loss", 1),
+            alpha=kwargs.get("alpha", 0.0),
+            solver=kwargs.get("solver", "mu"),
+            random_state=kwargs.get("random_state", None),
+        ).fit(B)
     topics = nmf.components_.copy()
     normalize(topics, axis=1)
+    if kwargs.get("return_max_time_reached", False):
+        return topics, False
+    return topics
+
+
+# The amount of work (non-zeros times topics) per EM sweep that a numba thread
+# needs before splitting a single ensemble member over more threads pays off.
+_MIN_WORK_PER_THREAD = 2 ** 21
+
+
+def truncate_topics(topics, topic_mass):
+    """Truncate each topic to its most probable words, keeping the fewest words that
+    together cover ``topic_mass`` of the topic's probability, and renormalize. Most
+    of the mass of a topic is usually in a small part of the vocabulary, so the
+    truncated topics are far smaller when stored sparse.
+
+    Parameters
+    ----------
+    topics: array of shape (n_topics, n_words)
+        The topics to truncate.
+
+    topic_mass: float
+        The fraction of each topic's probability mass to keep, in (0, 1].
+
+    Returns
+    -------
+    truncated_topics: sparse matrix of shape (n_topics, n_words)
+        The truncated topics, as a float32 CSR matrix.
+    """
+    if not 0.0 < topic_mass <= 1.0:
+        raise ValueError("topic_mass must be in the interval (0, 1]")
+
+    indptr = np.zeros(topics.shape[0] + 1, dtype=np.int64)
+    row_indices = []
+    row_data = []
+    for i in range(topics.shape[0]):
+        order = np.argsort(-topics[i], kind="mergesort")
+        cumulative_mass = np.cumsum(topics[i, order], dtype=np.float64)
+        total_mass = cumulative_mass[-1]
+        n_keep = np.searchsorted(cumulative_mass, topic_mass * total_mass) + 1
+        n_keep = min(n_keep, np.count_nonzero(topics[i]))
+        indices = np.sort(order[:n_keep])
+        data = topics[i, indices].astype(np.float32)
+        if n_keep > 0:
+            data /= data.sum()
+        row_indices.append(indices)
+        row_data.append(data)
+        indptr[i + 1] = indptr[i] + n_keep
+
+    return csr_matrix(
+        (np.concatenate(row_data), np.concatenate(row_indices), indptr),
+        shape=topics.shape,
+    )
+
+
+def _stack_topics(topics):
+    """Stack blocks of topics, sparse if any of the blocks are."""
+    if any(issparse(block) for block in topics):
+        return vstack(topics, format="csr")
+    return np.vstack(topics)
+
+
+def ensemble_thread_layout(
+    nnz, k, n_runs, n_jobs=None, n_threads=None, parallelism="dask"
+):
+    """Decide how to split a budget of threads between ensemble members that run
+    concurrently and the numba threads used by the parallel kernels inside each
+    member. Running ``n_jobs`` members that each use every available numba thread
+    oversubscribes the machine badly, so the budget is divided between the two
+    levels instead.
+
+    If ``n_jobs`` is None the split is chosen automatically from the size of the
+    corpus: small corpora do not have enough work per EM sweep to keep many threads
+    busy, so many members run concurrently on a single thread each, while large
+    corpora run fewer members concurrently with more threads each.
+
+    Parameters
+    ----------
+    nnz: int
+        The number of non-zero entries in the corpus.
+
+    k: int
+        The number of topics per ensemble member.
+
+    n_runs: int
+        The number of ensemble members.
+
+    n_jobs: int or None (optional, default=None)
+        The number of members to run concurrently. If None this is chosen
+        automatically.
+
+    n_threads: int or None (optional, default=None)
+        The total thread budget. If None use all the threads numba is configured
+        with.
+
+    parallelism: string (optional, default="dask")
+        The parallelism model that will be used. The "none" and "batch" models run
+        a single job, which is given the whole budget. For "distributed" the
+        threads are instead divided up on each worker.
+
+    Returns
+    -------
+    layout: dict
+        A dictionary with keys ``"n_threads"`` (the total budget),
+        ``"n_concurrent"`` (the number of members run at once) and
+        ``"n_threads_per_member"`` (the numba threads used by each member).
+    """
+    max_threads = numba.config.NUMBA_NUM_THREADS
+    if n_threads is None:
+        n_threads = max_threads
+    n_threads = max(1, min(n_threads, max_threads))
+
+    if parallelism in ("none", "batch"):
+        n_concurrent = 1
+    elif n_jobs is None:
+        useful_threads_per_member = max(
+            1, min(n_threads, (nnz * k) // _MIN_WORK_PER_THREAD)
+        )
+        n_concurrent = max(1, min(n_runs, n_threads // useful_threads_per_member))
+    else:
+        n_concurrent = max(1, min(n_runs, n_jobs))
+
+    return {
+        "n_threads": n_threads,
+        "n_concurrent": n_concurrent,
+        "n_threads_per_member": max(1, n_threads // n_concurrent),
+    }
+
+
+def _plsa_member_memory(n_docs, n_words, nnz, k, init, shared_init):
+    """The estimated peak memory, in bytes, of fitting one pLSA member, and of one
+    prepared member waiting to be fit."""
+    factors = (n_docs + n_words) * k
+    prepared = 4 * n_docs + 4 * factors
+    # Bootstrap indices and counts (int64), and float64 factors before conversion
+    preparing = prepared + 16 * n_docs + 8 * factors
+    if init in ("nndsvd", "nmf") and not shared_init:
+        # The SVD (or NMF) of the member's sample, and its working arrays
+        preparing += 16 * factors + 12 * nnz
+    # The P(z|w,d) buffer of the E-step, one value per non-zero and topic
+    fitting = prepared + 4 * nnz * k
+    return max(preparing, fitting), prepared
+
+
+def _nmf_member_memory(n_docs, n_words, nnz, k):
+    """The estimated peak memory, in bytes, of fitting one NMF member, and of one
+    prepared (bootstrap sampled) member waiting to be fit."""
+    prepared = 8 * nnz + 4 * n_docs
+    # sklearn works on a float64 copy of the sample, and the multiplicative
+    # updates keep the model's values at the non-zeros and the update terms
+    fitting = prepared + 12 * nnz + 16 * nnz + 24 * (n_docs + n_words) * k
+    return fitting, prepared
+
+
+def _batch_memory(n_docs, n_words, k, batch_size):
+    """The estimated peak memory, in bytes, of fitting ``batch_size`` pLSA members
+    together with the batched kernels, which need no P(z|w,d) buffer."""
+    factors = (n_docs + n_words) * k
+    # Sample weights, current and next P(z|d) and P(w|z), and the transposed
+    # result, plus the float64 initialization of one member at a time
+    return batch_size * (8 * n_docs + 8 * factors + 4 * n_words * k) + 8 * factors
+
+
+def ensemble_memory_plan(
+    n_docs,
+    n_words,
+    nnz,
+    k,
+    n_runs,
+    model="plsa",
+    n_jobs=None,
+    n_threads=None,
+    parallelism="dask",
+    init="random",
+    share_init=True,
+    topic_combination="hellinger_umap",
+    memory_limit=None,
+):
+    """Estimate the peak memory of fitting an ensemble of topic models before
+    running it, and if a ``memory_limit`` is given, choose settings that stay
+    under it. The estimate covers the working copy of the corpus, the members
+    fit concurrently (dominated, for pLSA, by the ``nnz * k`` buffer of
+    P(z|w,d) each member's E-step needs), the ensemble's topics, and combining
+    them into stable topics and fitting the document vectors.
+
+    If fitting the ensemble is estimated to exceed ``memory_limit``, fewer
+    members are run concurrently. If even a single member is too large the pLSA
+    members are fit with "batch" parallelism instead, whose kernels need no
+    P(z|w,d) buffer, in chunks of as many members as fit under the limit. If no
+    plan fits, or combining the topics alone exceeds the limit, a warning is
+    given and the plan using the least memory is returned.
+
+    The estimates are approximate (they don't cover the memory of the
+    interpreter and libraries, or of the caller's copy of the corpus), so leave
+    some headroom in ``memory_limit``.
+
+    Parameters
+    ----------
+    n_docs: int
+        The number of documents in the corpus.
+
+    n_words: int
+        The size of the vocabulary.
+
+    nnz: int
+        The number of non-zero entries in the corpus.
+
+    k: int
+        The number of topics per ensemble member.
+
+    n_runs: int
+        The number of ensemble members.
+
+    model: string (optional, default="plsa")
+        The topic model of the members, either "plsa" or "nmf".
+
+    n_jobs: int or None (optional, default=None)
+        The number of members to run concurrently; see
+        ``ensemble_thread_layout``.
+
+    n_threads: int or None (optional, default=None)
+        The total thread budget; see ``ensemble_thread_layout``.
+
+    parallelism: string (optional, default="dask")
+        The parallelism model that will be used. For "distributed" the estimate
+        of a single member (the memory each concurrent task on a worker needs)
+        is given, and the plan is never changed.
+
+    init: string or tuple (optional, default="random")
+        The initialization of pLSA members.
+
+    share_init: bool (optional, default=True)
+        Whether pLSA members share the SVD or NMF of the "nndsvd" and "nmf"
+        initializations; see ``ensemble_of_topics``.
+
+    topic_combination: string or None (optional, default="hellinger_umap")
+        The method of combining the ensemble topics into stable topics. If None
+        only the memory of fitting the ensemble is estimated.
+
+    memory_limit: int or None (optional, default=None)
+        The number of bytes of memory the fit should stay under. If None the
+        plan is estimated but not changed.
+
+    Returns
+    -------
+    plan: dict
+        The thread layout (as returned by ``ensemble_thread_layout``) and
+        ``"parallelism"`` to use, along with ``"batch_size"``, the number of
+        members fit together by "batch" parallelism, and the estimated
+        ``"member_bytes"`` (of each member or batch), ``"fit_bytes"`` (of
+        fitting the ensemble), ``"combine_bytes"`` (of combining the topics and
+        fitting the document vectors) and ``"peak_bytes"`` (the larger of the
+        two). ``"within_limit"`` is whether the peak is under ``memory_limit``.
+    """
+    n_topics = n_runs * k
+    shared_init = (
+        share_init
+        and model == "plsa"
+        and isinstance(init, str)
+        and init in ("nndsvd", "nmf")
+    )
+
+    # The float32 COO copy of the corpus the members are fit to
+    corpus_bytes = 12 * nnz
+    # The ensemble's topics, as a dense float32 array
+    topics_bytes = 4 * n_topics * n_words
+    if topic_combination is None:
+        combine_bytes = 0
+    else:
+        if topic_combination in ("hellinger", "kl_divergence"):
+            combination_bytes = 8 * n_topics ** 2 + 4 * n_topics * n_words
+        else:
+            combination_bytes = 4 * n_topics * n_words
+        # The refit of the document vectors needs a P(z|w,d) buffer of its own
+        refit_bytes = 4 * nnz * k + 8 * n_docs * k
+        combine_bytes = (
+            corpus_bytes + topics_bytes + max(combination_bytes, refit_bytes)
+        )
+
+    def evaluate(parallelism, n_concurrent, batch_size):
+        if parallelism == "batch":
+            member_bytes = _batch_memory(n_docs, n_words, k, batch_size)
+            members_bytes = member_bytes
+        else:
+            if model == "plsa":
+                member_bytes, prepared_bytes = _plsa_member_memory(
+                    n_docs, n_words, nnz, k, init, shared_init
+                )
+            else:
+                member_bytes, prepared_bytes = _nmf_member_memory(
+                    n_docs, n_words, nnz, k
+                )
+            members_bytes = n_concurrent * member_bytes
+            if parallelism == "pipeline":
+                # Prepared members waiting in the queue, and one being prepared
+                members_bytes += (n_concurrent + 1) * prepared_bytes
+        fit_bytes = corpus_bytes + topics_bytes + members_bytes
+        if shared_init and parallelism != "batch":
+            fit_bytes += 8 * (n_docs + n_words) * k
+        return member_bytes, fit_bytes
+
+    layout = ensemble_thread_layout(nnz, k, n_runs, n_jobs, n_threads, parallelism)
+    candidates = [(parallelism, layout["n_concurrent"], n_runs)]
+    if memory_limit is not None and parallelism != "distributed":
+        if parallelism != "batch":
+            candidates.extend(
+                (parallelism, n_concurrent, n_runs)
+                for n_concurrent in range(layout["n_concurrent"] - 1, 0, -1)
+            )
+        if model == "plsa":
+            candidates.extend(
+                ("batch", 1, batch_size)
+                for batch_size in range(
+                    n_runs if parallelism != "batch" else n_runs - 1, 0, -1
+                )
+            )
+
+    smallest = None
+    for candidate in candidates:
+        member_bytes, fit_bytes = evaluate(*candidate)
+        if smallest is None or fit_bytes < smallest[1]:
+            smallest = (candidate, fit_bytes)
+        # Combining the topics follows the fit, so it must fit under the limit too
+        if memory_limit is None or max(fit_bytes, combine_bytes) <= memory_limit:
+            chosen = candidate
+            break
+    else:
+        chosen = smallest[0]
+
+    parallelism, n_concurrent, batch_size = chosen
+    member_bytes, fit_bytes = evaluate(*chosen)
+    peak_bytes = max(fit_bytes, combine_bytes)
+    if memory_limit is not None and peak_bytes > memory_limit:
+        warn(
+            "The estimated peak memory of the ensemble ({} bytes) exceeds the "
+            "memory_limit of {} bytes even with the plan using the least "
+            "memory".format(peak_bytes, memory_limit)
+        )
+    return {
+        "n_threads": layout["n_threads"],
+        "n_concurrent": n_concurrent,
+        "n_threads_per_member": max(1, layout["n_threads"] // n_concurrent),
+        "parallelism": parallelism,
+        "batch_size": max(1, batch_size),
+        "member_bytes": member_bytes,
+        "fit_bytes": fit_bytes,
+        "combine_bytes": combine_bytes,
+        "peak_bytes": peak_bytes,
+        "within_limit": memory_limit is None or peak_bytes <= memory_limit,
+    }
+
+
+def _run_with_num_threads(n_threads, create_topics, *args, **kwargs):
+    """Run ``create_topics`` with numba parallel kernels limited to ``n_threads``
+    threads. The setting is local to the calling thread, and is restored
+    afterwards."""
+    previous_n_threads = numba.get_num_threads()
+    numba.set_num_threads(n_threads)
+    try:
+        return create_topics(*args, **kwargs)
+    finally:
+        numba.set_num_threads(previous_n_threads)
+
+
+def _distributed_member(create_topics, X, k, random_state, kwargs):
+    """Fit a single ensemble member on a dask.distributed worker, dividing the
+    worker's numba threads between the tasks the worker runs concurrently. Members
+    that start after the ensemble's deadline are skipped, and return None."""
+    if time.time() >= kwargs.get("deadline", np.inf):
+        return None
+    worker_threads = distributed.get_worker().nthreads
+    n_threads = max(1, numba.config.NUMBA_NUM_THREADS // worker_threads)
+    return _run_with_num_threads(
+        n_threads, create_topics, X, k, random_state=random_state, **kwargs
+    )
+
+
+def distributed_ensemble_of_topics(
+    create_topics, X, k, random_states, client=None, retries=3, callback=None, **kwargs
+):
+    """Run ensemble members on a dask.distributed cluster. The corpus (and any
+    ``shared_init`` factors in ``kwargs``) is scattered to the workers once and
+    shared by all the members, and only the resulting topic matrices are gathered
+    back. Members that fail are retried automatically.
+
+    Parameters
+    ----------
+    create_topics: function
+        The function to generate topics for a member, such as ``plsa_topics``.
+
+    X: sparse matrix of shape (n_docs, n_words)
+        The bag-of-words matrix for the corpus to train on
+
+    k: int
+        The number of topics to generate per member.
+
+    random_states: list
+        The random state to use for each member.
+
+    client: dask.distributed.Client or None (optional, default=None)
+        The client to submit work through. If None the current default client is
+        used, so any cluster (including a ``LocalCluster``) that has a client
+        connected to it will do.
+
+    retries: int (optional, default=3)
+        The number of times a failed member is retried before giving up.
+
+    callback: function or None (optional, default=None)
+        If given, ``callback(i, topics)`` is called on the client with the index
+        (into ``random_states``) and topics of each member as soon as it completes,
+        and its return value is kept in place of the member's topics.
+
+    kwargs:
+        Extra keyword based arguments to pass on to ``create_topics``.
+
+    Returns
+    -------
+    topics: list of arrays of shape (k, n_words)
+        The topics generated by each member (or the values returned by
+        ``callback`` for them).
+    """
+    if not _HAVE_DISTRIBUTED:
+        raise ValueError("dask.distributed could not be imported and is unavailable")
+
+    if client is None:
+        try:
+            client = distributed.default_client()
+        except ValueError:
+            raise ValueError(
+                "Distributed parallelism requires a dask.distributed Client; "
+                "create one connected to your cluster before fitting"
+            )
+
+    [X_future] = client.scatter([X], broadcast=True)
+    scattered = [X_future]
+    if kwargs.get("shared_init", None) is not None:
+        # Send the shared factors once, as for X, rather than with every member
+        [shared_init_future] = client.scatter([kwargs["shared_init"]], broadcast=True)
+        kwargs = dict(kwargs, shared_init=shared_init_future)
+        scattered.append(shared_init_future)
+    futures = [
+        client.submit(
+            _distributed_member,
+            create_topics,
+            X_future,
+            k,
+            seed,
+            kwargs,
+            pure=False,
+            retries=retries,
+        )
+        for seed in random_states
+    ]
+    topics = [None] * len(futures)
+    future_index = {future.key: i for i, future in enumerate(futures)}
+    try:
+        for future, member_topics in distributed.as_completed(
+            futures, with_results=True
+        ):
+            i = future_index[future.key]
+            if callback is not None:
+                member_topics = callback(i, member_topics)
+            topics[i] = member_topics
+    finally:
+        client.cancel(futures + scattered)
+
+    return topics
+
+
+def pipelined_ensemble_of_topics(
+    prepare_member,
+    fit_member,
+    X,
+    k,
+    random_states,
+    n_jobs=1,
+    n_threads_per_member=1,
+    queue_depth=None,
+    callback=None,
+    **kwargs
+):
+    """Run ensemble members as a producer/consumer pipeline. Preparing a member
+    (drawing its bootstrap sample, converting the data, and initializing the
+    model) holds the GIL, while fitting it runs in numba kernels that release it,
+    so a single preparer thread prepares the members ahead of time while ``n_jobs``
+    worker threads fit them. This keeps the worker threads busy across the whole
+    ensemble rather than each stalling on its own preparation. At most
+    ``queue_depth`` prepared members wait to be fit at a time, which bounds the
+    memory used.
+
+    Parameters
+    ----------
+    prepare_member: function
+        The first stage of a member, such as ``_plsa_member_inputs``; called as
+        ``prepare_member(X, k, random_state=seed, **kwargs)``.
+
+    fit_member: function
+        The second stage of a member, such as ``_plsa_member_topics``; called as
+        ``fit_member(prepared, k, random_state=seed, **kwargs)``.
+
+    X: sparse matrix of shape (n_docs, n_words)
+        The bag-of-words matrix for the corpus to train on
+
+    k: int
+        The number of topics to generate per member.
+
+    random_states: list
+        The random state to use for each member.
+
+    n_jobs: int (optional, default=1)
+        The number of worker threads fitting members concurrently.
+
+    n_threads_per_member: int (optional, default=1)
+        The number of numba threads each worker uses.
+
+    queue_depth: int or None (optional, default=None)
+        The largest number of prepared members waiting to be fit. If None this is
+        ``n_jobs``.
+
+    callback: function or None (optional, default=None)
+        If given, ``callback(i, topics)`` is called by the worker thread with the
+        index (into ``random_states``) and topics of each member as soon as it
+        completes, and its return value is kept in place of the member's topics.
+
+    kwargs:
+        Extra keyword based arguments to pass on to both stages. If they include
+        a ``deadline`` (a wall clock time, as given by ``time.time``), members
+        are neither prepared nor fit once it has passed.
+
+    Returns
+    -------
+    topics: list of arrays of shape (k, n_words)
+        The topics generated by each member (or the values returned by
+        ``callback`` for them), or None for members skipped at the deadline.
+    """
+    if queue_depth is None:
+        queue_depth = n_jobs
+    deadline = kwargs.get("deadline", np.inf)
+    prepared_members = queue.Queue(maxsize=max(1, queue_depth))
+    failed = threading.Event()
+    errors = []
+    topics = [None] * len(random_states)
+
+    def prepare():
+        try:
+            for i, seed in enumerate(random_states):
+                if failed.is_set() or time.time() >= deadline:
+                    break
+                with phase("prepare", member=i):
+                    prepared = prepare_member(X, k, random_state=seed, **kwargs)
+                prepared_members.put((i, prepared))
+        except BaseException as error:
+            errors.append(error)
+            failed.set()
+        finally:
+            for _ in range(n_jobs):
+                prepared_members.put(None)
+
+    def fit():
+        # After a failure keep taking members off the queue, without fitting
+        # them, so the preparer is never left blocked on a full queue
+        for i, prepared in iter(prepared_members.get, None):
+            if failed.is_set() or time.time() >= deadline:
+                continue
+            try:
+                with phase("fit", member=i):
+                    member_topics = _run_with_num_threads(
+                        n_threads_per_member,
+                        fit_member,
+                        prepared,
+                        k,
+                        random_state=random_states[i],
+                        **kwargs
+                    )
+                if callback is not None:
+                    member_topics = callback(i, member_topics)
+                topics[i] = member_topics
+            except BaseException as error:
+                errors.append(error)
+                failed.set()
+
+    threads = [threading.Thread(target=prepare)] + [
+        threading.Thread(target=fit) for _ in range(n_jobs)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+
     return topics
 
 
+def _uses_shared_init(model, parallelism, share_init, kwargs):
+    """Whether ensemble members should derive their initialization from factors
+    of the whole corpus shared between them, that haven't yet been computed."""
+    return (
+        share_init
+        and model == "plsa"
+        and parallelism != "batch"
+        and kwargs.get("shared_init", None) is None
+        and isinstance(kwargs.get("init", "random"), str)
+        and kwargs.get("init", "random") in ("nndsvd", "nmf")
+    )
+
+
 def ensemble_of_topics(
-    X, k, model="plsa", n_jobs=4, n_runs=16, parallelism="dask", **kwargs
+    X,
+    k,
+    model="plsa",
+    n_jobs=None,
+    n_runs=16,
+    parallelism="dask",
+    n_threads=None,
+    topic_store=None,
+    run_offset=0,
+    topic_mass=None,
+    share_init=True,
+    max_time=None,
+    memory_limit=None,
+    memory_plan=None,
+    return_info=False,
+    **kwargs
 ):
     """Generate a large number of topic vectors by running an ensemble of
     bootstrap samples of a given corpus. Exploit the embarrassingly parallel nature of the problem
     using wither joblib or dask. Support for both pLSA and NMF approaches to topic generation are
     available. The sklearn implementation of NMF is used for NMF modeling.
 
+    Each run is given its own random seed, drawn from ``random_state`` if one is
+    passed in the keyword arguments, so that runs differ from one another while the
+    ensemble as a whole remains reproducible.
+
+    If a ``topic_store`` is given the topics of each run are saved to it as soon as
+    the run completes, and runs already present in the store are not rerun. This
+    allows an interrupted ensemble to be resumed, and an ensemble to be extended
+    with further runs (via ``run_offset``).
+
     Parameters
     ----------
     X: sparse matrix of shape (n_docs, n_words)
@@ -159,55 +940,263 @@ def ensemble_of_topics(
     model: string (optional, default="plsa")
         The topic modeling method to use (either "plsa" or "nmf")
 
-    n_jobs: int (optional, default=4)
-        The number of jobs to run in parallel.
+    n_jobs: int or None (optional, default=None)
+        The number of jobs to run in parallel. If None this is chosen automatically
+        from the size of the corpus; see ``ensemble_thread_layout``.
 
     n_runs: int (optional, default=16)
         The number of bootstrapped sampled runs to use for topic generation.
 
     parallelism: string (optional, default="dask")
-        The parallelism model to use. Should be one of "dask" or "joblib".
+        The parallelism model to use. Should be one of "dask", "joblib", "batch",
+        "distributed", "pipeline" or "none". The "batch" option (pLSA only) fits all
+        runs together in a single batched EM optimization that reads the corpus once
+        per iteration for the whole ensemble, parallelised over runs with numba
+        threads; ``n_jobs`` is ignored in that case. The "distributed" option
+        executes the runs on the dask.distributed cluster of the current default
+        client; see ``distributed_ensemble_of_topics``. The "pipeline" option
+        prepares runs in a separate thread while ``n_jobs`` others fit them; see
+        ``pipelined_ensemble_of_topics``.
+
+    n_threads: int or None (optional, default=None)
+        The total number of threads to use, split between concurrent jobs and the
+        numba threads within each job. If None use all the threads numba is
+        configured with.
+
+    topic_store: TopicStore, string or None (optional, default=None)
+        A store (or the path of one) to save the topics of each run to, and to
+        resume from. Runs already in the store are loaded rather than refit.
+
+    run_offset: int (optional, default=0)
+        The index of the first run to generate; the runs generated are those with
+        indices ``run_offset`` to ``run_offset + n_runs - 1``. Seeds are drawn as
+        if all the runs from index zero were being generated, so extending an
+        ensemble this way with an integer ``random_state`` is reproducible.
+
+    topic_mass: float or None (optional, default=None)
+        If set, each run's topics are truncated to the words covering this
+        fraction of their probability mass (see ``truncate_topics``) as soon as the
+        run completes, and the topics are returned as a sparse CSR matrix.
+        Otherwise they are returned as a dense float32 array.
+
+    share_init: bool (optional, default=True)
+        For pLSA with the "nndsvd" or "nmf" initializations, whether to compute the
+        SVD or NMF once for the whole corpus and derive each run's initialization
+        from it (see ``plsa_shared_init`` and ``plsa_member_init``), rather than
+        computing it afresh for every bootstrap sample. Not used for "batch"
+        parallelism.
+
+    max_time: float or None (optional, default=None)
+        A budget, in seconds of wall clock time, for generating the ensemble. When
+        it runs out the EM of runs in progress stops after the iteration in
+        progress (NMF runs, which can't be interrupted, finish), runs that have
+        not started are skipped, and only the topics of the runs that were fit
+        are returned. Skipped runs are not saved to the ``topic_store``, so they
+        can be fit later by resuming the ensemble.
+
+    memory_limit: int or None (optional, default=None)
+        The number of bytes of memory to stay under. If the estimated peak
+        memory of the ensemble exceeds it fewer runs are fit concurrently, or
+        pLSA runs are fit in batches with "batch" parallelism, which needs less
+        memory; see ``ensemble_memory_plan``. Not used if ``memory_plan`` is given.
+
+    memory_plan: dict or None (optional, default=None)
+        The plan, as returned by ``ensemble_memory_plan``, to fit the runs with,
+        for a caller that has planned the memory of more than the runs (such as
+        combining their topics afterwards). Its parallelism and thread layout
+        replace ``parallelism``, ``n_jobs`` and ``n_threads``. If None a plan is
+        made for the runs to fit and ``memory_limit``.
+
+    return_info: bool (optional, default=False)
+        Whether to also return a dict describing the runs that were fit.
 
     kwargs:
         Extra keyword based arguments to pass on to the pLSA or NMF models.
 
     Returns
     -------
-    topics: array of shape (n_runs * k, n_words)
-        The full set of all topics generated by all the topic modeling runs.
-
+    topics: array or sparse matrix of shape (n_runs * k, n_words)
+        The full set of all topics generated by all the topic modeling runs (in
+        order of run, and fewer than ``n_runs * k`` if runs were skipped when
+        ``max_time`` ran out).
+
+    info: dict
+        Only returned if ``return_info`` is True. ``"runs"`` holds the indices of
+        the runs whose topics were returned, in order, ``"skipped"`` those of the
+        runs skipped when ``max_time`` ran out, and ``"max_time_reached"`` is
+        whether any run was skipped or had its EM stopped by ``max_time``.
     """
 
     if model == "plsa":
         create_topics = plsa_topics
+        member_stages = (_plsa_member_inputs, _plsa_member_topics)
     elif model == "nmf":
         create_topics = nmf_topics
+        member_stages = (_nmf_member_inputs, _nmf_member_topics)
     else:
         raise ValueError('Model must be one of "plsa" or "nmf"')
 
-    if parallelism == "dask":
-        dask_topics = dask.delayed(create_topics)
-        staged_topics = [dask_topics(X, k, **kwargs) for i in range(n_runs)]
-        topics = dask.compute(*staged_topics, scheduler="threads", num_workers=n_jobs)
+    deadline = _deadline(max_time)
+    if deadline < np.inf:
+        kwargs["deadline"] = deadline
+    kwargs["return_max_time_reached"] = True
+
+    rng = check_random_state(kwargs.pop("random_state", None))
+    seeds = rng.randint(np.iinfo(np.int32).max, size=run_offset + n_runs)
+    run_indices = list(range(run_offset, run_offset + n_runs))
+
+    if topic_store is not None:
+        if not isinstance(topic_store, TopicStore):
+            topic_store = TopicStore(topic_store)
+        topic_store.check_compatible(X, k, model, topic_mass)
+        pending = [i for i in run_indices if i not in topic_store]
+    else:
+        pending = run_indices
+
+    # Each run's topics go straight into their place in the result as the run
+    # completes, rather than being collected and stacked at the end.
+    if topic_mass is None:
+        topics = np.empty((n_runs * k, X.shape[1]), dtype=np.float32)
+    else:
+        sparse_topics = [None] * n_runs
+    completed = np.zeros(n_runs, dtype=np.bool_)
+    stopped = np.zeros(n_runs, dtype=np.bool_)
+
+    def store_member(i, member_topics):
+        if topic_mass is None:
+            topics[(i - run_offset) * k : (i - run_offset + 1) * k] = member_topics
+        else:
+            sparse_topics[i - run_offset] = member_topics
+        completed[i - run_offset] = True
+
+    def save_member(i, result):
+        # Runs skipped because the time budget ran out have no topics
+        if result is None:
+            return
+        member_topics, stopped[i - run_offset] = result
+        if topic_mass is not None:
+            member_topics = truncate_topics(member_topics, topic_mass)
+        if topic_store is not None:
+            topic_store.save_member(i, seeds[i], member_topics)
+        store_member(i, member_topics)
+
+    def fit_member(i):
+        if time.time() >= deadline:
+            return
+        with phase("member", member=i):
+            result = _run_with_num_threads(
+                n_member_threads, create_topics, X, k, random_state=seeds[i], **kwargs
+            )
+        return save_member(i, result)
+
+    if memory_plan is None:
+        memory_plan = ensemble_memory_plan(
+            X.shape[0],
+            X.shape[1],
+            X.nnz,
+            k,
+            len(pending),
+            model,
+            n_jobs,
+            n_threads,
+            parallelism,
+            init=kwargs.get("init", "random"),
+            share_init=share_init,
+            topic_combination=None,
+            memory_limit=memory_limit,
+        )
+    parallelism = memory_plan["parallelism"]
+    n_jobs = memory_plan["n_concurrent"]
+    n_member_threads = memory_plan["n_threads_per_member"]
+
+    if _uses_shared_init(model, parallelism, share_init, kwargs) and len(pending) > 0:
+        with phase("shared_init"):
+            kwargs["shared_init"] = plsa_shared_init(X, k, kwargs["init"])
+
+    if len(pending) == 0:
+        pass
+    elif parallelism == "dask":
+        staged_topics = [dask.delayed(fit_member)(i) for i in pending]
+        dask.compute(*staged_topics, scheduler="threads", num_workers=n_jobs)
     elif parallelism == "joblib" and _HAVE_JOBLIB:
-        joblib_topics = joblib.delayed(create_topics)
-        topics = joblib.Parallel(n_jobs=n_jobs, prefer="threads")(
-            joblib_topics(X, k, **kwargs) for i in range(n_runs)
+        joblib.Parallel(n_jobs=n_jobs, prefer="threads")(
+            joblib.delayed(fit_member)(i) for i in pending
         )
     elif parallelism == "joblib" and not _HAVE_JOBLIB:
         raise ValueError("Joblib was not correctly imported and is unavailable")
+    elif parallelism == "batch":
+        if model != "plsa":
+            raise ValueError('Batch parallelism is only available for model="plsa"')
+        batch_size = memory_plan["batch_size"]
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start : start + batch_size]
+            if time.time() >= deadline:
+                break
+            with phase("batch"):
+                batch_topics, max_time_reached = _run_with_num_threads(
+                    n_member_threads, plsa_batch_topics, X, k, seeds[batch], **kwargs
+                )
+            for j, i in enumerate(batch):
+                save_member(i, (batch_topics[j * k : (j + 1) * k], max_time_reached))
+    elif parallelism == "distributed":
+        distributed_ensemble_of_topics(
+            create_topics,
+            X,
+            k,
+            seeds[pending],
+            callback=lambda j, result: save_member(pending[j], result),
+            **kwargs
+        )
+    elif parallelism == "pipeline":
+        pipelined_ensemble_of_topics(
+            *member_stages,
+            X,
+            k,
+            seeds[pending],
+            n_jobs=n_jobs,
+            n_threads_per_member=n_member_threads,
+            callback=lambda j, result: save_member(pending[j], result),
+            **kwargs
+        )
     elif parallelism == "none":
-        topics = []
-        for i in range(n_runs):
-            topics.append(create_topics(X, k, **kwargs))
+        for i in pending:
+            fit_member(i)
     else:
         raise ValueError(
             "Unrecognized parallelism {}; should be one of {}".format(
-                parallelism, ("dask", "joblib")
+                parallelism,
+                ("dask", "joblib", "batch", "distributed", "pipeline", "none"),
             )
         )
 
-    return np.vstack(topics)
+    if topic_store is not None:
+        for i in run_indices:
+            if i not in pending:
+                store_member(i, topic_store.load_member(i)[1])
+
+    if n_runs > 0 and not np.any(completed):
+        raise ValueError("The time budget ran out before any run was fit")
+
+    if topic_mass is None:
+        if not np.all(completed):
+            topics = topics[np.repeat(completed, k)]
+    else:
+        topics = vstack(
+            [run_topics for run_topics in sparse_topics if run_topics is not None],
+            format="csr",
+        )
+
+    if return_info:
+        skipped = run_offset + np.flatnonzero(~completed)
+        return (
+            topics,
+            {
+                "runs": run_offset + np.flatnonzero(completed),
+                "skipped": skipped,
+                "max_time_reached": bool(skipped.shape[0] > 0 or np.any(stopped)),
+            },
+        )
+    return topics
 
 
 @numba.njit(fastmath=True, nogil=True)
@@ -220,176 +1209,1172 @@ def kl_divergence(a, b):
     return result
 
 
-@numba.njit(fastmath=True, parallel=True)
-def all_pairs_kl_divergence(distributions):
-    """Compute all pairwise KL-divergences between a set of multinomial distributions."""
-    n = distributions.shape[0]
-    result = np.zeros((n, n))
-    for i in range(n):
-        for j in range(n):
-            result[i, j] = kl_divergence(distributions[i], distributions[j])
-    return result
+# The number of float32 elements in each block of (square rooted or log
+# transformed) topics materialised by the distance engine.
+_DISTANCE_BLOCK_ELEMENTS = 2 ** 24
+
+
+def _vocabulary_block_size(n_rows, block_size=None):
+    if block_size is None:
+        block_size = max(1024, _DISTANCE_BLOCK_ELEMENTS // max(n_rows, 1))
+    return block_size
+
+
+def _hellinger_from_inner_products(inner_products, l1_norms_a, l1_norms_b):
+    """Convert inner products of square rooted distributions into Hellinger
+    distances, following the conventions of ``hellinger`` for empty rows."""
+    scale = np.sqrt(np.outer(l1_norms_a, l1_norms_b))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = 1.0 - inner_products / scale
+    np.maximum(result, 0.0, out=result)
+    np.sqrt(result, out=result)
+
+    empty_a = l1_norms_a == 0
+    empty_b = l1_norms_b == 0
+    result[empty_a, :] = 1.0
+    result[:, empty_b] = 1.0
+    result[np.ix_(empty_a, empty_b)] = 0.0
+    return result
+
+
+def all_pairs_kl_divergence(distributions, block_size=None):
+    """Compute all pairwise KL-divergences between a set of multinomial distributions.
+
+    See ``pairwise_kl_divergence``.
+    """
+    result = pairwise_kl_divergence(distributions, distributions, block_size)
+    np.fill_diagonal(result, 0.0)
+    return result
+
+
+def all_pairs_hellinger_distance(distributions, block_size=None):
+    """Compute all pairwise Hellinger distances between a set of multinomial distributions.
+
+    The Hellinger distance only depends on the inner products of the square roots
+    of the distributions, so these are accumulated, in float32, over blocks of
+    ``block_size`` words with a BLAS symmetric rank-k update, which computes a
+    single triangle of the (symmetric) result. Sparse distributions are handled
+    with a sparse matrix product instead.
+    """
+    if issparse(distributions):
+        return _sparse_all_pairs_hellinger_distance(distributions)
+
+    n = distributions.shape[0]
+    block_size = _vocabulary_block_size(n, block_size)
+    inner_products = np.zeros((n, n), dtype=np.float32, order="F")
+    for start in range(0, distributions.shape[1], block_size):
+        block = np.sqrt(distributions[:, start : start + block_size], dtype=np.float32)
+        # block.T is Fortran ordered, so this computes block @ block.T in place
+        inner_products = ssyrk(
+            1.0, block.T, beta=1.0, c=inner_products, trans=1, overwrite_c=1
+        )
+    inner_products = np.triu(inner_products) + np.triu(inner_products, 1).T
+
+    l1_norms = distributions.sum(axis=1, dtype=np.float64)
+    result = _hellinger_from_inner_products(inner_products, l1_norms, l1_norms)
+    np.fill_diagonal(result, 0.0)
+    return result
+
+
+def pairwise_kl_divergence(a, b, block_size=None):
+    """Compute the KL-divergences from each distribution in ``a`` to each
+    distribution in ``b``.
+
+    Over the words where both distributions are non-zero the divergence is the sum
+    of a*log(a) less the sum of a*log(b), so the divergences are two matrix
+    products, computed in float32 over blocks of ``block_size`` words and
+    accumulated in float64. If the distributions are sparse the products are
+    sparse matrix products. The difference of the two sums cancels for (nearly)
+    identical distributions, so the divergences are clipped at zero to keep
+    rounding from making them negative.
+    """
+    if issparse(a) or issparse(b):
+        return _sparse_pairwise_kl_divergence(a, b)
+
+    block_size = _vocabulary_block_size(max(a.shape[0], b.shape[0]), block_size)
+    result = np.zeros((a.shape[0], b.shape[0]), dtype=np.float64)
+    for start in range(0, a.shape[1], block_size):
+        a_block = np.asarray(a[:, start : start + block_size], dtype=np.float32)
+        b_block = np.asarray(b[:, start : start + block_size], dtype=np.float32)
+
+        a_log_a = np.zeros_like(a_block)
+        np.log2(a_block, out=a_log_a, where=a_block > 0)
+        a_log_a *= a_block
+        b_support = b_block > 0
+        if b_support.all():
+            result += a_log_a.sum(axis=1)[:, None]
+        else:
+            result += a_log_a @ b_support.astype(np.float32).T
+
+        log_b = np.zeros_like(b_block)
+        np.log2(b_block, out=log_b, where=b_support)
+        result -= a_block @ log_b.T
+
+    np.maximum(result, 0.0, out=result)
+    return result
+
+
+def pairwise_hellinger_distance(a, b, block_size=None):
+    """Compute the Hellinger distances between each distribution in ``a`` and each
+    distribution in ``b``, as a matrix product of the square rooted distributions
+    accumulated in float32 over blocks of ``block_size`` words (or a sparse matrix
+    product, if the distributions are sparse).
+    """
+    if issparse(a) or issparse(b):
+        return _sparse_pairwise_hellinger_distance(a, b)
+
+    block_size = _vocabulary_block_size(max(a.shape[0], b.shape[0]), block_size)
+    inner_products = np.zeros((a.shape[0], b.shape[0]), dtype=np.float32)
+    for start in range(0, a.shape[1], block_size):
+        sqrt_a = np.sqrt(a[:, start : start + block_size], dtype=np.float32)
+        sqrt_b = np.sqrt(b[:, start : start + block_size], dtype=np.float32)
+        inner_products += sqrt_a @ sqrt_b.T
+
+    return _hellinger_from_inner_products(
+        inner_products,
+        a.sum(axis=1, dtype=np.float64),
+        b.sum(axis=1, dtype=np.float64),
+    )
+
+
+def _sparse_sqrt(distributions):
+    result = csr_matrix(distributions, dtype=np.float32, copy=True)
+    np.sqrt(result.data, out=result.data)
+    return result
+
+
+def _sparse_l1_norms(distributions):
+    return np.asarray(distributions.sum(axis=1), dtype=np.float64).ravel()
+
+
+def _sparse_all_pairs_hellinger_distance(distributions):
+    sqrt_distributions = _sparse_sqrt(distributions)
+    inner_products = (sqrt_distributions @ sqrt_distributions.T).toarray()
+    l1_norms = _sparse_l1_norms(distributions)
+    result = _hellinger_from_inner_products(inner_products, l1_norms, l1_norms)
+    np.fill_diagonal(result, 0.0)
+    return result
+
+
+def _sparse_pairwise_hellinger_distance(a, b):
+    inner_products = (_sparse_sqrt(a) @ _sparse_sqrt(b).T).toarray()
+    return _hellinger_from_inner_products(
+        inner_products, _sparse_l1_norms(a), _sparse_l1_norms(b)
+    )
+
+
+def _sparse_pairwise_kl_divergence(a, b):
+    a = csr_matrix(a, dtype=np.float32)
+    a.eliminate_zeros()
+    b = csr_matrix(b, dtype=np.float32)
+    b.eliminate_zeros()
+
+    a_log_a = a.copy()
+    a_log_a.data *= np.log2(a.data)
+    b_support = b.copy()
+    b_support.data[:] = 1.0
+    log_b = b.copy()
+    log_b.data = np.log2(b.data)
+
+    result = (a_log_a @ b_support.T).toarray().astype(np.float64)
+    result -= (a @ log_b.T).toarray()
+    np.maximum(result, 0.0, out=result)
+    return result
+
+
+def _cached_all_pairs(cache, key, all_topics, all_pairs, pairwise, symmetric):
+    """All pairs distances between ``all_topics``, kept in ``cache`` under ``key``.
+    If the cache holds the distances for a prefix of ``all_topics`` (as it does
+    after new ensemble members are appended) only the rows and columns for the
+    new topics are computed."""
+    n_topics = all_topics.shape[0]
+    previous = None if cache is None else cache.get(key)
+    if previous is not None and previous.shape[0] == n_topics:
+        return previous
+
+    with phase(key):
+        if previous is None or previous.shape[0] > n_topics:
+            result = all_pairs(all_topics)
+        else:
+            n_previous = previous.shape[0]
+            result = np.empty((n_topics, n_topics), dtype=previous.dtype)
+            result[:n_previous, :n_previous] = previous
+            result[n_previous:] = pairwise(all_topics[n_previous:], all_topics)
+            if symmetric:
+                result[:n_previous, n_previous:] = result[n_previous:, :n_previous].T
+            else:
+                result[:n_previous, n_previous:] = pairwise(
+                    all_topics[:n_previous], all_topics[n_previous:]
+                )
+            np.fill_diagonal(result, 0.0)
+
+    if cache is not None:
+        cache[key] = result
+    return result
+
+
+def cluster_centroids(all_topics, labels, weights=None):
+    """Combine each cluster of topics into a single topic: the square of the
+    (optionally weighted) mean of the square roots of the topics in the cluster,
+    renormalized to a distribution. All clusters are averaged at once, as the
+    product of a sparse cluster indicator matrix with the square rooted topics,
+    so each topic is square rooted once and visited once.
+
+    Parameters
+    ----------
+    all_topics: array or sparse matrix of shape (N, n_words)
+        The clustered topics.
+
+    labels: array of shape (N,)
+        The cluster label of each topic, with -1 for topics in no cluster.
+
+    weights: array of shape (N,) or None (optional, default=None)
+        The weight of each topic in the mean of its cluster (such as its
+        membership strength). If None all topics are weighted equally.
+
+    Returns
+    -------
+    centroids: array of shape (labels.max() + 1, n_words)
+        The combined topic for each cluster.
+    """
+    with phase("centroids"):
+        n_clusters = labels.max() + 1
+        clustered = np.flatnonzero(labels >= 0)
+        if weights is None:
+            weights = np.ones(clustered.shape[0], dtype=np.float32)
+        else:
+            weights = np.asarray(weights, dtype=np.float32)[clustered]
+        cluster_weights = np.bincount(
+            labels[clustered], weights=weights, minlength=n_clusters
+        )
+        indicator = csr_matrix(
+            (
+                weights / cluster_weights[labels[clustered]],
+                (labels[clustered], np.arange(clustered.shape[0])),
+            ),
+            shape=(n_clusters, clustered.shape[0]),
+            dtype=np.float32,
+        )
+
+        if issparse(all_topics):
+            sqrt_topics = _sparse_sqrt(all_topics[clustered])
+            result = (indicator @ sqrt_topics).toarray()
+        else:
+            result = np.empty((n_clusters, all_topics.shape[1]), dtype=np.float32)
+            block_size = _vocabulary_block_size(clustered.shape[0])
+            for start in range(0, all_topics.shape[1], block_size):
+                block = slice(start, start + block_size)
+                result[:, block] = indicator @ np.sqrt(
+                    all_topics[clustered, block].astype(np.float32)
+                )
+
+    result **= 2
+    result /= result.sum(axis=1, keepdims=True)
+    return result
+
+
+def _cached(cache, key, compute):
+    """Look up ``key`` in ``cache``, computing and storing it if absent. The
+    computation is profiled as a phase named for the first element of ``key``."""
+    if cache is not None and key in cache:
+        return cache[key]
+    with phase(key[0]):
+        result = compute()
+    if cache is not None:
+        cache[key] = result
+    return result
+
+
+def _hdbscan_single_linkage_tree(data, min_samples, **hdbscan_kwargs):
+    """The single linkage tree (over mutual reachability distance) that HDBSCAN
+    builds for ``data``. The tree depends on ``min_samples`` but not on
+    ``min_cluster_size``, so clusters for any ``min_cluster_size`` can be extracted
+    from it with ``leaf_clusters``."""
+    clusterer = hdbscan.HDBSCAN(min_samples=min_samples, **hdbscan_kwargs).fit(data)
+    return clusterer.single_linkage_tree_.to_numpy()
+
+
+def _sqrt_topics(all_topics):
+    """The square roots of the L1 normalized topics, as float32; Euclidean distance
+    between these is sqrt(2) times the Hellinger distance between the topics."""
+    result = normalize_rows(all_topics, norm="l1").astype(np.float32)
+    if issparse(result):
+        result.data = np.sqrt(result.data)
+    else:
+        result = np.sqrt(result)
+    return result
+
+
+def generate_combined_topics_kl(
+    all_topics, min_samples=5, min_cluster_size=5, cache=None, return_labels=False
+):
+    """Given a large list of topics select out a small list of stable topics
+    by clustering the topics with HDBSCAN using KL-divergence as a distance
+    measure between topics.
+
+
+    Parameters
+    ----------
+    all_topics: array or sparse matrix of shape (N, n_words)
+        The set of topics to be clustered.
+
+    min_samples: int (optional, default=5)
+        The min_samples parameter to use for HDBSCAN clustering.
+
+    min_cluster_size: int (optional, default=5)
+        The min_cluster_size parameter to use for HDBSCAN clustering
+
+    cache: dict or None (optional, default=None)
+        A dict in which to keep intermediate results (the divergence matrix and
+        single linkage trees) so that later calls on
+        the same ``all_topics`` with different clustering parameters can reuse
+        them. Use a fresh dict for each set of topics; topics extended by
+        appending rows (new ensemble members) can keep their dict, and only the
+        distances involving the new rows are then computed.
+
+    return_labels: bool (optional, default=False)
+        Whether to also return the cluster label of each of the topics.
+
+    Returns
+    -------
+    stable_topics: array of shape (M, n_words)
+        A set of M topics, one for each cluster found by HDBSCAN.
+
+    labels: array of shape (N,)
+        The index of the stable topic each topic was combined into, or -1 for
+        topics in no cluster. Only returned if ``return_labels`` is True.
+    """
+    if issparse(all_topics):
+        warn(
+            "KL-divergence only counts words where both topics are non-zero, so it "
+            "understates the divergence between truncated (sparse) topics; consider "
+            'topic_combination="hellinger" or "hellinger_umap" with topic_mass'
+        )
+    divergence_matrix = _cached_all_pairs(
+        cache,
+        "divergence_matrix",
+        all_topics,
+        all_pairs_kl_divergence,
+        pairwise_kl_divergence,
+        symmetric=False,
+    )
+    single_linkage_tree = _cached(
+        cache,
+        ("single_linkage_tree", all_topics.shape[0], min_samples),
+        lambda: mutual_reachability_single_linkage_tree(divergence_matrix, min_samples),
+    )
+    labels, _ = leaf_clusters(single_linkage_tree, min_cluster_size)
+    result = cluster_centroids(all_topics, labels)
+
+    if return_labels:
+        return result, labels
+    return result
+
+
+def generate_combined_topics_hellinger(
+    all_topics, min_samples=5, min_cluster_size=5, cache=None, return_labels=False
+):
+    """Given a large list of topics select out a small list of stable topics
+    by clustering the topics with HDBSCAN using Hellinger as a distance
+    measure between topics.
+
+
+    Parameters
+    ----------
+    all_topics: array or sparse matrix of shape (N, n_words)
+        The set of topics to be clustered.
+
+    min_samples: int (optional, default=5)
+        The min_samples parameter to use for HDBSCAN clustering.
+
+    min_cluster_size: int (optional, default=5)
+        The min_cluster_size parameter to use for HDBSCAN clustering
+
+    cache: dict or None (optional, default=None)
+        A dict in which to keep intermediate results (the distance matrix and
+        single linkage trees) so that later calls on
+        the same ``all_topics`` with different clustering parameters can reuse
+        them. Use a fresh dict for each set of topics; topics extended by
+        appending rows (new ensemble members) can keep their dict, and only the
+        distances involving the new rows are then computed.
+
+    return_labels: bool (optional, default=False)
+        Whether to also return the cluster label of each of the topics.
+
+    Returns
+    -------
+    stable_topics: array of shape (M, n_words)
+        A set of M topics, one for each cluster found by HDBSCAN.
+
+    labels: array of shape (N,)
+        The index of the stable topic each topic was combined into, or -1 for
+        topics in no cluster. Only returned if ``return_labels`` is True.
+    """
+    distance_matrix = _cached_all_pairs(
+        cache,
+        "distance_matrix",
+        all_topics,
+        all_pairs_hellinger_distance,
+        pairwise_hellinger_distance,
+        symmetric=True,
+    )
+    single_linkage_tree = _cached(
+        cache,
+        ("single_linkage_tree", all_topics.shape[0], min_samples),
+        lambda: mutual_reachability_single_linkage_tree(distance_matrix, min_samples),
+    )
+    labels, _ = leaf_clusters(single_linkage_tree, min_cluster_size)
+    result = cluster_centroids(all_topics, labels)
+
+    if return_labels:
+        return result, labels
+    return result
+
+
+def generate_combined_topics_hellinger_boruvka(
+    all_topics,
+    min_samples=5,
+    min_cluster_size=5,
+    cache=None,
+    n_components=None,
+    return_labels=False,
+):
+    """Given a large list of topics select out a small list of stable topics
+    by clustering the topics with HDBSCAN using Hellinger as a distance
+    measure between topics. This finds the same clusters as
+    ``generate_combined_topics_hellinger`` without computing all pairwise
+    distances: Hellinger distance is (up to a constant factor, which does not
+    change the clusters) the Euclidean distance between square rooted topics, so
+    those are clustered with HDBSCAN's tree based Boruvka algorithm, using
+    memory linear in the number of topics.
+
+    Parameters
+    ----------
+    all_topics: array or sparse matrix of shape (N, n_words)
+        The set of topics to be clustered.
+
+    min_samples: int (optional, default=5)
+        The min_samples parameter to use for HDBSCAN clustering.
+
+    min_cluster_size: int (optional, default=5)
+        The min_cluster_size parameter to use for HDBSCAN clustering
+
+    cache: dict or None (optional, default=None)
+        A dict in which to keep intermediate results (the square rooted topics and
+        single linkage trees) so that later calls on the same ``all_topics`` with
+        different clustering parameters can reuse them. Use a fresh dict for each
+        set of topics.
+
+    n_components: int or None (optional, default=None)
+        If set, the square rooted topics are reduced to this many dimensions with
+        PCA before clustering. Distances, and so clusters, are preserved exactly if
+        this is at least the rank of the centered topics (at most N - 1); smaller
+        values keep only the directions of largest variance. Words with no
+        probability in any topic are always dropped, which is exact. The tree
+        searches slow down quickly as the dimension grows, so for large
+        vocabularies a reduction to a few dozen dimensions is usually needed for
+        this to be faster than ``generate_combined_topics_hellinger``.
+
+    return_labels: bool (optional, default=False)
+        Whether to also return the cluster label of each of the topics.
+
+    Returns
+    -------
+    stable_topics: array of shape (M, n_words)
+        A set of M topics, one for each cluster found by HDBSCAN.
+
+    labels: array of shape (N,)
+        The index of the stable topic each topic was combined into, or -1 for
+        topics in no cluster. Only returned if ``return_labels`` is True.
+    """
+
+    def reduced_topics():
+        sqrt_topics = _sqrt_topics(all_topics)
+        if issparse(sqrt_topics):
+            used_words = np.unique(sqrt_topics.indices)
+            sqrt_topics = sqrt_topics[:, used_words].toarray()
+        else:
+            sqrt_topics = sqrt_topics[:, sqrt_topics.any(axis=0)]
+        if n_components is not None and n_components < sqrt_topics.shape[1]:
+            sqrt_topics = PCA(n_components=n_components).fit_transform(sqrt_topics)
+        return sqrt_topics
+
+    sqrt_topics = _cached(
+        cache, ("sqrt_topics", all_topics.shape[0], n_components), reduced_topics
+    )
+    if sqrt_topics.shape[1] > 60:
+        algorithm = "boruvka_balltree"
+    else:
+        algorithm = "boruvka_kdtree"
+    single_linkage_tree = _cached(
+        cache,
+        ("single_linkage_tree", all_topics.shape[0], n_components, min_samples),
+        # The tree based algorithms count a point as one of its own min_samples
+        # nearest neighbours, unlike the precomputed distance convention
+        lambda: _hdbscan_single_linkage_tree(
+            sqrt_topics,
+            min_samples + 1,
+            algorithm=algorithm,
+            approx_min_span_tree=False,
+        ),
+    )
+    labels, _ = leaf_clusters(single_linkage_tree, min_cluster_size)
+    result = cluster_centroids(all_topics, labels)
+
+    if return_labels:
+        return result, labels
+    return result
+
+
+def generate_combined_topics_hellinger_umap(
+    all_topics,
+    min_samples=5,
+    min_cluster_size=5,
+    n_neighbors=15,
+    reduced_dim=5,
+    cache=None,
+    projection_dim=None,
+    random_state=None,
+    return_labels=False,
+):
+    """Given a large list of topics select out a small list of stable topics
+    by mapping the topics to a low dimensional space with UMAP (using
+    Hellinger distance) and then clustering the topics with HDBSCAN using
+    Euclidean distance in the embedding space to measure distance between topics.
+
+    The Hellinger distance between two distributions is the Euclidean distance
+    between their square roots scaled by 1/sqrt(2), so the topics are square
+    rooted once and embedded with UMAP's native Euclidean metric.
+
+
+    Parameters
+    ----------
+    all_topics: array or sparse matrix of shape (N, n_words)
+        The set of topics to be clustered.
+
+    min_samples: int (optional, default=5)
+        The min_samples parameter to use for HDBSCAN clustering.
+
+    min_cluster_size: int (optional, default=5)
+        The min_cluster_size parameter to use for HDBSCAN clustering
+
+    n_neighbors: int (optional, default=15)
+        The n_neighbors value to use with UMAP.
+
+    reduced_dim: int (optional, default=5)
+        The dimension of the embedding space to use.
+
+    cache: dict or None (optional, default=None)
+        A dict in which to keep intermediate results (the UMAP embedding and
+        single linkage trees) so that later calls on
+        the same ``all_topics`` with different clustering parameters can reuse
+        them. Use a fresh dict for each set of topics; the
+        embedding is recomputed whenever rows are appended to ``all_topics``.
+
+    projection_dim: int or None (optional, default=None)
+        If set, and smaller than the vocabulary, the square rooted topics are
+        reduced to this many dimensions with a sparse random projection (which
+        approximately preserves Euclidean distances) before running UMAP. This
+        speeds up the nearest neighbour search for large vocabularies.
+
+    random_state: int, RandomState instance or None (optional, default=None)
+        The random state used for the random projection and UMAP.
+
+    return_labels: bool (optional, default=False)
+        Whether to also return the cluster label of each of the topics.
+
+    Returns
+    -------
+    stable_topics: array of shape (M, n_words)
+        A set of M topics, one for each cluster found by HDBSCAN.
+
+    labels: array of shape (N,)
+        The index of the stable topic each topic was combined into, or -1 for
+        topics in no cluster. Only returned if ``return_labels`` is True.
+    """
+
+    def umap_embedding():
+        sqrt_topics = _sqrt_topics(all_topics)
+        if projection_dim is not None and projection_dim < sqrt_topics.shape[1]:
+            sqrt_topics = SparseRandomProjection(
+                n_components=projection_dim,
+                dense_output=True,
+                random_state=random_state,
+            ).fit_transform(sqrt_topics)
+        return umap.UMAP(
+            n_neighbors=n_neighbors,
+            n_components=reduced_dim,
+            metric="euclidean",
+            random_state=random_state,
+        ).fit_transform(sqrt_topics)
+
+    # The embedding depends on the seed, when there is one to reproduce; a
+    # RandomState instance (or None) gives a different embedding every time, so
+    # any cached embedding will do. The trees depend on everything the embedding
+    # does, and on min_samples.
+    if isinstance(random_state, (int, np.integer)):
+        seed = int(random_state)
+    else:
+        seed = None
+    embedding_parameters = (
+        all_topics.shape[0],
+        n_neighbors,
+        reduced_dim,
+        projection_dim,
+        seed,
+    )
+    embedding = _cached(cache, ("embedding",) + embedding_parameters, umap_embedding)
+    single_linkage_tree = _cached(
+        cache,
+        ("single_linkage_tree",) + embedding_parameters + (min_samples,),
+        lambda: _hdbscan_single_linkage_tree(embedding, min_samples),
+    )
+    labels, membership_strengths = leaf_clusters(single_linkage_tree, min_cluster_size)
+    result = cluster_centroids(all_topics, labels, weights=membership_strengths)
+
+    if return_labels:
+        return result, labels
+    return result
+
+
+def _cached_prototypes(cache, all_topics, threshold, batch_size):
+    """Leader clustering of ``all_topics`` in Hellinger distance, kept in ``cache``.
+    If the cache holds the prototypes for a prefix of ``all_topics`` only the new
+    topics are assigned."""
+    key = ("prototypes", threshold, batch_size)
+    n_topics = all_topics.shape[0]
+    previous = None if cache is None else cache.get(key)
+    if previous is not None and previous[0].shape[0] == n_topics:
+        return previous
+
+    if previous is None or previous[0].shape[0] > n_topics:
+        assignments = np.empty(0, dtype=np.intp)
+        leaders = np.empty(0, dtype=np.intp)
+    else:
+        assignments, leaders = previous
+
+    with phase("prototypes"):
+        assignments = [assignments]
+        leader_topics = all_topics[leaders]
+        for start in range(assignments[0].shape[0], n_topics, batch_size):
+            batch = all_topics[start : start + batch_size]
+            batch_assignments, new_leaders = leader_assignments(
+                pairwise_hellinger_distance(batch, leader_topics),
+                pairwise_hellinger_distance(batch, batch),
+                threshold,
+            )
+            assignments.append(batch_assignments)
+            leaders = np.concatenate([leaders, start + new_leaders])
+            leader_topics = _stack_topics([leader_topics, batch[new_leaders]])
+
+    result = (np.concatenate(assignments), leaders)
+    if cache is not None:
+        cache[key] = result
+    return result
+
+
+def generate_combined_topics_hellinger_hierarchical(
+    all_topics,
+    min_samples=5,
+    min_cluster_size=5,
+    cache=None,
+    prototype_threshold=0.2,
+    batch_size=1024,
+    return_labels=False,
+):
+    """Given a large list of topics select out a small list of stable topics in
+    two levels. First the topics are grouped into prototypes, in batches: each
+    topic joins the nearest existing prototype within ``prototype_threshold``
+    Hellinger distance of it, or starts a new prototype. Most topics of an ensemble
+    have near duplicates in other members, so there are far fewer prototypes than
+    topics. Then the prototypes, weighted by the number of topics they hold, are
+    clustered with HDBSCAN using Hellinger as a distance measure. The cost grows
+    roughly linearly with the number of topics, rather than quadratically as for
+    ``generate_combined_topics_hellinger``.
+
+    Parameters
+    ----------
+    all_topics: array or sparse matrix of shape (N, n_words)
+        The set of topics to be clustered.
+
+    min_samples: int (optional, default=5)
+        The min_samples parameter to use for HDBSCAN clustering, counted in topics.
+
+    min_cluster_size: int (optional, default=5)
+        The min_cluster_size parameter to use for HDBSCAN clustering, counted in
+        topics.
+
+    cache: dict or None (optional, default=None)
+        A dict in which to keep intermediate results (the prototypes and single
+        linkage trees) so that later calls on the same ``all_topics`` with
+        different clustering parameters can reuse them. Use a fresh dict for each
+        set of topics; topics extended by appending rows (new ensemble members)
+        can keep their dict, and only the new rows are then assigned to
+        prototypes.
+
+    prototype_threshold: float (optional, default=0.2)
+        The largest Hellinger distance between a topic and the first topic of a
+        prototype for the topic to join it. This should be well below the distance
+        between distinct stable topics; smaller values give more prototypes, and
+        clusters closer to those of ``generate_combined_topics_hellinger``.
+
+    batch_size: int (optional, default=1024)
+        The number of topics assigned to prototypes at a time.
+
+    return_labels: bool (optional, default=False)
+        Whether to also return the cluster label of each of the topics.
+
+    Returns
+    -------
+    stable_topics: array of shape (M, n_words)
+        A set of M topics, one for each cluster found by HDBSCAN.
+
+    labels: array of shape (N,)
+        The index of the stable topic each topic was combined into, or -1 for
+        topics in no cluster. Only returned if ``return_labels`` is True.
+    """
+    assignments, leaders = _cached_prototypes(
+        cache, all_topics, prototype_threshold, batch_size
+    )
+    prototype_sizes = np.bincount(assignments, minlength=leaders.shape[0])
+    prototypes = cluster_centroids(all_topics, assignments)
+
+    if leaders.shape[0] > 1:
+        single_linkage_tree = _cached(
+            cache,
+            (
+                "single_linkage_tree",
+                all_topics.shape[0],
+                prototype_threshold,
+                batch_size,
+                min_samples,
+            ),
+            lambda: mutual_reachability_single_linkage_tree(
+                all_pairs_hellinger_distance(prototypes), min_samples, prototype_sizes
+            ),
+        )
+        prototype_labels, _ = leaf_clusters(
+            single_linkage_tree, min_cluster_size, prototype_sizes
+        )
+    else:
+        prototype_labels = np.where(prototype_sizes >= min_cluster_size, 0, -1)
+
+    labels = prototype_labels[assignments]
+    result = cluster_centroids(all_topics, labels)
+
+    if return_labels:
+        return result, labels
+    return result
+
+
+_topic_combiner = {
+    "kl_divergence": generate_combined_topics_kl,
+    "hellinger": generate_combined_topics_hellinger,
+    "hellinger_boruvka": generate_combined_topics_hellinger_boruvka,
+    "hellinger_umap": generate_combined_topics_hellinger_umap,
+    "hellinger_hierarchical": generate_combined_topics_hellinger_hierarchical,
+}
+
+
+def _combiner_kwargs(topic_combination, cache, random_state):
+    kwargs = {"cache": cache}
+    if topic_combination == "hellinger_umap":
+        kwargs["random_state"] = random_state
+    return kwargs
+
+
+def combine_ensemble_topics(
+    X,
+    all_topics,
+    model="plsa",
+    min_samples=3,
+    min_cluster_size=4,
+    topic_combination="hellinger_umap",
+    e_step_thresh=1e-16,
+    lift_factor=1,
+    beta_loss=1,
+    alpha=0.0,
+    solver="mu",
+    random_state=None,
+    combination_cache=None,
+    return_labels=False,
+):
+    """Select a set of stable topics from the topics generated by an ensemble of
+    topic models, and fit document vectors against them. This is the final stage of
+    ``ensemble_fit``, and can be rerun on its own whenever the ensemble topics
+    change, or to try different clustering parameters.
+
+    Parameters
+    ----------
+    X: sparse matrix of shape (n_docs, n_words)
+        The bag-of-words matrix for the corpus.
+
+    all_topics: array or sparse matrix of shape (n_starts * k, n_words)
+        The topics generated by all the members of the ensemble.
+
+    model: string (optional, default="plsa")
+        The topic modeling method used (either "plsa" or "nmf")
+
+    min_samples: int (optional, default=3)
+        The min_samples parameter to use for HDBSCAN clustering.
+
+    min_cluster_size: int (optional, default=4)
+        The min_cluster_size parameter to use for HDBSCAN clustering
+
+    topic_combination: string (optional, default="hellinger_umap")
+        The method of comnining ensemble topics into a set of stable topics. Should be one of:
+            * ``"hellinger_umap"``
+            * ``"hellinger"``
+            * ``"hellinger_boruvka"``
+            * ``"hellinger_hierarchical"``
+            * ``"kl_divergence"``
+
+    e_step_thresh: float (optional, default=1e-16)
+        Option to promote sparsity. If the value of P(w|z)P(z|d) in the E step falls
+        below threshold then write a zero for P(z|w,d).
+
+    lift_factor: int (optional, default=1)
+        Importance factor to apply to lift -- if high lift value are important to
+        you then larger lift factors will be beneficial.
+
+    beta_loss: float or string, (optional, default 'kullback-leibler')
+        The beta loss to use if using NMF for topic modeling.
+
+    alpha: float (optional, default=0.0)
+        The alpha parameter defining regularization if using NMF for topic modeling.
+
+    solver: string, (optional, default="mu")
+        The choice of solver if using NMF for topic modeling. Should be either "cd" or "mu".
+
+    random_state int, RandomState instance or None, (optional, default: None)
+        If int, random_state is the seed used by the random number generator;
+        If RandomState instance, random_state is the random number generator;
+        If None, the random number generator is the RandomState instance used
+        by `np.random`. Used in in initialization, and to seed UMAP for the
+        ``"hellinger_umap"`` topic combination.
+
+    combination_cache: dict or None (optional, default=None)
+        A dict in which to keep the intermediate results of topic combination (the
+        distance matrix or embedding of ``all_topics`` and the HDBSCAN trees),
+        keyed by ``topic_combination``, so that recombining the same topics with
+        different clustering parameters is cheap.
+
+    return_labels: bool (optional, default=False)
+        Whether to also return the index of the stable topic each of
+        ``all_topics`` was combined into.
+
+    Returns
+    -------
+    doc_vectors, stable_topics: arrays of shape (n_docs, M) and (M, n_words)
+        The vectors giving the probability of topics for each document, and the stable topics
+        selected from the ensemble.
+
+    labels: array of shape (n_starts * k,)
+        The index of the stable topic each ensemble topic was combined into, or -1
+        for topics in no cluster; only returned if ``return_labels`` is True.
+    """
+    if topic_combination in _topic_combiner:
+        cluster_topics = _topic_combiner[topic_combination]
+    else:
+        raise ValueError(
+            "topic_combination must be one of {}".format(tuple(_topic_combiner.keys()))
+        )
+
+    if combination_cache is None:
+        cache = None
+    else:
+        cache = combination_cache.setdefault(topic_combination, {})
+    with phase("combine", topic_combination=topic_combination):
+        stable_topics, labels = cluster_topics(
+            all_topics,
+            min_samples,
+            min_cluster_size,
+            return_labels=True,
+            **_combiner_kwargs(topic_combination, cache, random_state)
+        )
 
+    if lift_factor != 1:
+        stable_topics **= lift_factor
+        normalize(stable_topics, axis=1)
 
-@numba.njit(fastmath=True, parallel=True)
-def all_pairs_hellinger_distance(distributions):
-    """Compute all pairwise Hellinger distances between a set of multinomial distributions."""
-    n = distributions.shape[0]
-    result = np.zeros((n, n))
-    for i in range(n):
-        for j in range(n):
-            result[i, j] = hellinger(distributions[i], distributions[j])
-    return result
+    with phase("refit"):
+        if model == "plsa":
+            doc_vectors = plsa_refit(
+                X,
+                stable_topics,
+                e_step_thresh=e_step_thresh,
+                random_state=random_state,
+            )
+        elif model == "nmf":
+            doc_vectors, _, _ = non_negative_factorization(
+                X,
+                H=stable_topics,
+                n_components=stable_topics.shape[0],
+                update_H=False,
+                beta_loss=beta_loss,
+                alpha=alpha,
+                solver=solver,
+            )
+        else:
+            raise ValueError('Model must be one of "plsa" or "nmf"')
 
+    if return_labels:
+        return doc_vectors, stable_topics, labels
+    return doc_vectors, stable_topics
 
-def generate_combined_topics_kl(all_topics, min_samples=5, min_cluster_size=5):
-    """Given a large list of topics select out a small list of stable topics
-    by clustering the topics with HDBSCAN using KL-divergence as a distance
-    measure between topics.
 
+def topic_provenance(labels, k, runs=None):
+    """Find the ensemble topics each stable topic was combined from.
 
     Parameters
     ----------
-    all_topics: array of shape (N, n_words)
-        The set of topics to be clustered.
+    labels: array of shape (n_starts * k,)
+        The index of the stable topic each ensemble topic was combined into, or -1,
+        as returned by ``combine_ensemble_topics`` with ``return_labels=True``.
 
-    min_samples: int (optional, default=5)
-        The min_samples parameter to use for HDBSCAN clustering.
+    k: int
+        The number of topics generated by each ensemble member.
 
-    min_cluster_size: int (optional, default=5)
-        The min_cluster_size parameter to use for HDBSCAN clustering
+    runs: array of shape (n_starts,) or None (optional, default=None)
+        The index of the run that generated each member's topics, as returned
+        by ``ensemble_of_topics`` with ``return_info=True``. If None the members
+        are numbered in order from zero.
 
     Returns
     -------
-    stable_topics: array of shape (M, n_words)
-        A set of M topics, one for each cluster found by HDBSCAN.
+    provenance: list of arrays of shape (n_i, 2)
+        For each stable topic, the (run, topic) pairs of the ensemble topics it was
+        combined from: ``run`` is the index of the ensemble member and ``topic``
+        the index of the topic within that member's topics.
     """
-    divergence_matrix = all_pairs_kl_divergence(all_topics)
-    core_divergences = np.sort(divergence_matrix, axis=1)[:, min_samples]
-    tiled_core_divergences = np.tile(core_divergences, (core_divergences.shape[0], 1))
-    mutual_reachability = np.dstack(
-        [
-            divergence_matrix,
-            divergence_matrix.T,
-            tiled_core_divergences,
-            tiled_core_divergences.T,
-        ]
-    ).max(axis=-1)
-    mst_data = mst_linkage_core(mutual_reachability)
-    mst_order = np.argsort(mst_data.T[2])
-    mst_data = mst_data[mst_order]
-    single_linkage_tree = label(mst_data)
-    labels, probs, stabs, ctree, stree = _tree_to_labels(
-        all_topics,
-        single_linkage_tree,
-        min_cluster_size=min_cluster_size,
-        cluster_selection_method="leaf",
-    )
-    result = np.empty((labels.max() + 1, all_topics.shape[1]), dtype=np.float32)
-    for i in range(labels.max() + 1):
-        result[i] = np.mean(np.sqrt(all_topics[labels == i]), axis=0) ** 2
-        result[i] /= result[i].sum()
-
-    return result
-
-
-def generate_combined_topics_hellinger(all_topics, min_samples=5, min_cluster_size=5):
-    """Given a large list of topics select out a small list of stable topics
-    by clustering the topics with HDBSCAN using Hellinger as a distance
-    measure between topics.
-
+    n_clusters = labels.max() + 1
+    order = np.argsort(labels, kind="mergesort")
+    boundaries = np.searchsorted(labels[order], np.arange(n_clusters + 1))
+    members, topics = np.divmod(order, k)
+    if runs is not None:
+        members = np.asarray(runs)[members]
+    return [
+        np.column_stack((members[start:end], topics[start:end]))
+        for start, end in zip(boundaries[:-1], boundaries[1:])
+    ]
+
+
+def stable_topics_match(topics_a, topics_b, tolerance=0.05):
+    """Determine whether two sets of stable topics are the same, up to order: each
+    topic of one set must match a distinct topic of the other with a Hellinger
+    distance of at most ``tolerance``.
 
     Parameters
     ----------
-    all_topics: array of shape (N, n_words)
-        The set of topics to be clustered.
+    topics_a: array of shape (M, n_words)
+        The first set of topics.
 
-    min_samples: int (optional, default=5)
-        The min_samples parameter to use for HDBSCAN clustering.
+    topics_b: array of shape (M', n_words)
+        The second set of topics.
 
-    min_cluster_size: int (optional, default=5)
-        The min_cluster_size parameter to use for HDBSCAN clustering
+    tolerance: float (optional, default=0.05)
+        The largest Hellinger distance allowed between matched topics.
 
     Returns
     -------
-    stable_topics: array of shape (M, n_words)
-        A set of M topics, one for each cluster found by HDBSCAN.
+    match: bool
+        Whether the sets of topics match. Empty sets of topics never match.
     """
-    distance_matrix = all_pairs_hellinger_distance(all_topics)
-    labels = hdbscan.HDBSCAN(
-        min_samples=min_samples,
-        min_cluster_size=min_cluster_size,
-        metric="precomputed",
-        cluster_selection_method="leaf",
-    ).fit_predict(distance_matrix)
-    result = np.empty((labels.max() + 1, all_topics.shape[1]), dtype=np.float32)
-    for i in range(labels.max() + 1):
-        result[i] = np.mean(np.sqrt(all_topics[labels == i]), axis=0) ** 2
-        result[i] /= result[i].sum()
+    if topics_a.shape[0] != topics_b.shape[0] or topics_a.shape[0] == 0:
+        return False
 
-    return result
+    distances = pairwise_hellinger_distance(topics_a, topics_b)
+    rows, cols = linear_sum_assignment(distances)
+    return distances[rows, cols].max() <= tolerance
 
 
-def generate_combined_topics_hellinger_umap(
-    all_topics, min_samples=5, min_cluster_size=5, n_neighbors=15, reduced_dim=5
+def adaptive_ensemble_of_topics(
+    X,
+    k,
+    model="plsa",
+    n_jobs=None,
+    max_starts=64,
+    parallelism="dask",
+    n_threads=None,
+    topic_store=None,
+    wave_size=4,
+    min_samples=3,
+    min_cluster_size=4,
+    topic_combination="hellinger_umap",
+    convergence_tol=0.05,
+    combination_cache=None,
+    max_time=None,
+    return_info=False,
+    **kwargs
 ):
-    """Given a large list of topics select out a small list of stable topics
-    by mapping the topics to a low dimensional space with UMAP (using
-    Hellinger distance) and then clustering the topics with HDBSCAN using
-    Euclidean distance in the embedding space to measure distance between topics.
-
+    """Grow an ensemble of topic models in waves until its stable topics converge.
+    After each wave the new topics are combined with those of the earlier waves
+    (for the ``"hellinger"`` and ``"kl_divergence"`` combinations only the
+    distances involving the new topics are computed, and for
+    ``"hellinger_hierarchical"`` only the new topics are assigned to prototypes)
+    and the provisional stable topics are yielded. The ensemble stops growing once
+    the stable topics of two consecutive waves match (see
+    ``stable_topics_match``), once it has ``max_starts`` members, or once
+    ``max_time`` runs out.
 
     Parameters
     ----------
-    all_topics: array of shape (N, n_words)
-        The set of topics to be clustered.
+    X: sparse matrix of shape (n_docs, n_words)
+        The bag-of-words matrix for the corpus to train on.
 
-    min_samples: int (optional, default=5)
-        The min_samples parameter to use for HDBSCAN clustering.
+    k: int
+        The number of topics to generate per model.
 
-    min_cluster_size: int (optional, default=5)
-        The min_cluster_size parameter to use for HDBSCAN clustering
+    model: string (optional, default="plsa")
+        The topic modeling method to use (either "plsa" or "nmf")
 
-    n_neighbors: int (optional, default=15)
-        The n_neighbors value to use with UMAP.
+    n_jobs: int or None (optional, default=None)
+        The number of ensemble members to run concurrently; see
+        ``ensemble_of_topics``.
 
-    reduced_dim: int (optional, default=5)
-        The dimension of the embedding space to use.
+    max_starts: int (optional, default=64)
+        The largest number of members the ensemble may grow to.
 
-    Returns
-    -------
-    stable_topics: array of shape (M, n_words)
-        A set of M topics, one for each cluster found by HDBSCAN.
+    parallelism: string (optional, default="dask")
+        The parallelism model to use for each wave; see ``ensemble_of_topics``.
+
+    n_threads: int or None (optional, default=None)
+        The total number of threads to use; see ``ensemble_of_topics``.
+
+    topic_store: TopicStore, string or None (optional, default=None)
+        A store to save the topics of each ensemble member to as it completes.
+
+    wave_size: int (optional, default=4)
+        The number of members to add in each wave. The first wave has at least
+        ``min_cluster_size`` members, so that clusters can form.
+
+    min_samples: int (optional, default=3)
+        The min_samples parameter to use for HDBSCAN clustering.
+
+    min_cluster_size: int (optional, default=4)
+        The min_cluster_size parameter to use for HDBSCAN clustering
+
+    topic_combination: string (optional, default="hellinger_umap")
+        The method of comnining ensemble topics into a set of stable topics.
+
+    convergence_tol: float (optional, default=0.05)
+        The largest Hellinger distance between matched stable topics of
+        consecutive waves for the topics to count as unchanged.
+
+    combination_cache: dict or None (optional, default=None)
+        A dict in which to keep the intermediate results of topic combination;
+        see ``combine_ensemble_topics``.
+
+    max_time: float or None (optional, default=None)
+        A budget, in seconds of wall clock time, for growing the ensemble. When it
+        runs out the wave in progress is cut short (see ``ensemble_of_topics``),
+        its topics are combined with those of the earlier waves, and the ensemble
+        stops growing.
+
+    return_info: bool (optional, default=False)
+        Whether to also yield a dict describing the members after each wave.
+
+    **kwargs:
+        Further keyword arguments passed to ``ensemble_of_topics`` for each wave
+        (such as ``memory_limit``, or a ``memory_plan`` for the whole ensemble)
+        and on to the topic model.
+
+    Yields
+    ------
+    all_topics, stable_topics, converged: array, array, bool
+        After each wave: the topics of every member so far, the provisional
+        stable topics selected from them, and whether they match those of the
+        previous wave.
+
+    info: dict
+        Only yielded if ``return_info`` is True. ``"runs"`` holds the index of the
+        run that generated each member so far, and ``"max_time_reached"`` is
+        whether ``max_time`` has cut any wave short; see ``ensemble_of_topics``.
     """
-    embedding = umap.UMAP(
-        n_neighbors=n_neighbors, n_components=reduced_dim, metric=hellinger
-    ).fit_transform(all_topics)
-    clusterer = hdbscan.HDBSCAN(
-        min_samples=min_samples,
-        min_cluster_size=min_cluster_size,
-        cluster_selection_method="leaf",
-    ).fit(embedding)
-    labels = clusterer.labels_
-    membership_strengths = clusterer.probabilities_
-    result = np.empty((labels.max() + 1, all_topics.shape[1]), dtype=np.float32)
-    for i in range(labels.max() + 1):
-        mask = labels == i
-        result[i] = (
-            np.average(
-                np.sqrt(all_topics[mask]), axis=0, weights=membership_strengths[mask]
-            )
-            ** 2
+    if topic_combination in _topic_combiner:
+        cluster_topics = _topic_combiner[topic_combination]
+    else:
+        raise ValueError(
+            "topic_combination must be one of {}".format(tuple(_topic_combiner.keys()))
         )
-        result[i] /= result[i].sum()
 
-    return result
+    if combination_cache is None:
+        cache = None
+    else:
+        cache = combination_cache.setdefault(topic_combination, {})
+    combiner_kwargs = _combiner_kwargs(
+        topic_combination, cache, kwargs.get("random_state")
+    )
 
+    deadline = _deadline(max_time)
+
+    # A plan for the whole ensemble fixes the parallelism of every wave
+    if kwargs.get("memory_plan", None) is not None:
+        parallelism = kwargs["memory_plan"]["parallelism"]
+
+    # Share the initialization between the members of every wave
+    if _uses_shared_init(model, parallelism, kwargs.get("share_init", True), kwargs):
+        with phase("shared_init"):
+            kwargs["shared_init"] = plsa_shared_init(X, k, kwargs["init"])
+
+    all_topics = None
+    runs = np.zeros(0, dtype=np.int64)
+    max_time_reached = False
+    previous_stable_topics = None
+    # Runs skipped when the time budget runs out leave gaps, so the next wave
+    # starts after the last run attempted rather than after the members fit
+    next_run = 0
+    while runs.shape[0] < max_starts:
+        if all_topics is None:
+            n_runs = max(wave_size, min_cluster_size)
+        else:
+            # Once the budget has run out a wave would skip all its members, so
+            # stop with the ensemble so far instead
+            if time.time() >= deadline:
+                return
+            n_runs = wave_size
+        n_runs = min(n_runs, max_starts - runs.shape[0])
+
+        new_topics, info = ensemble_of_topics(
+            X,
+            k,
+            model,
+            n_jobs,
+            n_runs,
+            parallelism,
+            n_threads,
+            topic_store,
+            run_offset=next_run,
+            max_time=None if deadline == np.inf else deadline - time.time(),
+            return_info=True,
+            **kwargs
+        )
+        if all_topics is None:
+            all_topics = new_topics
+        else:
+            all_topics = _stack_topics([all_topics, new_topics])
+        runs = np.concatenate([runs, info["runs"]])
+        max_time_reached = max_time_reached or info["max_time_reached"]
+        next_run += n_runs
+
+        with phase("combine", topic_combination=topic_combination):
+            stable_topics = cluster_topics(
+                all_topics, min_samples, min_cluster_size, **combiner_kwargs
+            )
+        converged = previous_stable_topics is not None and stable_topics_match(
+            previous_stable_topics, stable_topics, convergence_tol
+        )
+        if return_info:
+            yield all_topics, stable_topics, converged, {
+                "runs": runs,
+                "max_time_reached": max_time_reached,
+            }
+        else:
+            yield all_topics, stable_topics, converged
 
-_topic_combiner = {
-    "kl_divergence": generate_combined_topics_kl,
-    "hellinger": generate_combined_topics_hellinger,
-    "hellinger_umap": generate_combined_topics_hellinger_umap,
-}
+        if converged:
+            return
+        previous_stable_topics = stable_topics
 
 
 def ensemble_fit(
@@ -400,7 +2385,7 @@ def ensemble_fit(
     min_samples=3,
     min_cluster_size=4,
     n_starts=16,
-    n_jobs=1,
+    n_jobs=None,
     parallelism="dask",
     topic_combination="hellinger_umap",
     bootstrap=True,
@@ -413,6 +2398,14 @@ def ensemble_fit(
     alpha=0.0,
     solver="mu",
     random_state=None,
+    n_threads=None,
+    topic_store=None,
+    return_all_topics=False,
+    combination_cache=None,
+    topic_mass=None,
+    share_init=True,
+    max_time=None,
+    memory_limit=None,
 ):
     """Generate a set of stable topics by using an ensemble of topic models and then clustering
     the results and generating representative topics for each cluster. The generate a set of
@@ -447,16 +2440,20 @@ def ensemble_fit(
     n_starts: int (optional, default=16)
         The number of bootstrap sampled topic models to run -- the size of the ensemble.
 
-    n_jobs: int (optional, default=8)
-        The number of parallel jobs to run at a time.
+    n_jobs: int or None (optional, default=None)
+        The number of parallel jobs to run at a time. If None this is chosen
+        automatically from the size of the corpus; see ``ensemble_thread_layout``.
 
     parallelism: string (optional, default="dask")
-        The parallelism model to use. Should be one of "dask" or "joblib" or "none".
+        The parallelism model to use. Should be one of "dask", "joblib", "batch",
+        "distributed", "pipeline" or "none". See ``ensemble_of_topics`` for details.
 
     topic_combination: string (optional, default="hellinger_umap")
         The method of comnining ensemble topics into a set of stable topics. Should be one of:
             * ``"hellinger_umap"``
             * ``"hellinger"``
+            * ``"hellinger_boruvka"``
+            * ``"hellinger_hierarchical"``
             * ``"kl_divergence"``
 
     n_iter: int
@@ -493,11 +2490,52 @@ def ensemble_fit(
         If None, the random number generator is the RandomState instance used
         by `np.random`. Used in in initialization.
 
+    n_threads: int or None (optional, default=None)
+        The total number of threads to use, split between concurrent jobs and the
+        numba threads within each job. If None use all the threads numba is
+        configured with.
+
+    topic_store: TopicStore, string or None (optional, default=None)
+        A store (or the path of one) to save the topics of each ensemble member to
+        as it completes. Members already in the store are loaded instead of being
+        refit, so an interrupted fit can be resumed.
+
+    return_all_topics: bool (optional, default=False)
+        Whether to also return the topics generated by every ensemble member.
+
+    combination_cache: dict or None (optional, default=None)
+        A dict in which to keep the intermediate results of topic combination, for
+        reuse by later calls to ``combine_ensemble_topics`` on the same topics.
+
+    topic_mass: float or None (optional, default=None)
+        If set, the topics of each ensemble member are truncated to the words
+        covering this fraction of their probability mass and kept sparse, and
+        topic combination runs on the sparse topics; see ``truncate_topics``.
+
+    share_init: bool (optional, default=True)
+        With the "nndsvd" or "nmf" initializations, whether to compute the SVD or
+        NMF once for the whole corpus and derive each member's initialization from
+        it; see ``ensemble_of_topics``.
+
+    max_time: float or None (optional, default=None)
+        A budget, in seconds of wall clock time, for fitting the ensemble members.
+        When it runs out the stable topics are combined from the members fit so
+        far; see ``ensemble_of_topics``.
+
+    memory_limit: int or None (optional, default=None)
+        The number of bytes of memory fitting the ensemble members and combining
+        their topics should stay under, by running fewer members concurrently or
+        fitting pLSA members in batches; see ``ensemble_memory_plan``.
+
     Returns
     -------
     doc_vectors, stable_topics: arrays of shape (n_docs, M) and (M, n_words)
         The vectors giving the probability of topics for each document, and the stable topics
         produced by the ensemble.
+
+    all_topics: array or sparse matrix of shape (n_starts * estimated_n_topics, n_words)
+        The topics generated by every ensemble member; only returned if
+        ``return_all_topics`` is True.
     """
 
     X = check_array(X, accept_sparse="csr", dtype=np.float32)
@@ -507,6 +2545,21 @@ def ensemble_fit(
     else:
         X_coo = coo_matrix(X, dtype=np.float32)
 
+    memory_plan = ensemble_memory_plan(
+        X_coo.shape[0],
+        X_coo.shape[1],
+        X_coo.nnz,
+        estimated_n_topics,
+        n_starts,
+        model,
+        n_jobs,
+        n_threads,
+        parallelism,
+        init=init,
+        share_init=share_init,
+        topic_combination=topic_combination,
+        memory_limit=memory_limit,
+    )
     all_topics = ensemble_of_topics(
         X_coo,
         estimated_n_topics,
@@ -514,6 +2567,12 @@ def ensemble_fit(
         n_jobs,
         n_starts,
         parallelism,
+        n_threads,
+        topic_store,
+        topic_mass=topic_mass,
+        share_init=share_init,
+        max_time=max_time,
+        memory_plan=memory_plan,
         init=init,
         n_iter=n_iter,
         n_iter_per_test=n_iter_per_test,
@@ -527,37 +2586,26 @@ def ensemble_fit(
         random_state=random_state,
     )
 
-    if topic_combination in _topic_combiner:
-        cluster_topics = _topic_combiner[topic_combination]
-    else:
-        raise ValueError(
-            "topic_combination must be one of {}".format(tuple(_topic_combiner.keys()))
-        )
-
-    stable_topics = cluster_topics(all_topics, min_samples, min_cluster_size)
-
-    if lift_factor != 1:
-        stable_topics **= lift_factor
-        normalize(stable_topics, axis=1)
+    doc_vectors, stable_topics = combine_ensemble_topics(
+        X,
+        all_topics,
+        model,
+        min_samples,
+        min_cluster_size,
+        topic_combination,
+        e_step_thresh,
+        lift_factor,
+        beta_loss,
+        alpha,
+        solver,
+        random_state,
+        combination_cache,
+    )
 
-    if model == "plsa":
-        doc_vectors = plsa_refit(
-            X, stable_topics, e_step_thresh=e_step_thresh, random_state=random_state,
-        )
-    elif model == "nmf":
-        doc_vectors, _, _ = non_negative_factorization(
-            X,
-            H=stable_topics,
-            n_components=stable_topics.shape[0],
-            update_H=False,
-            beta_loss=beta_loss,
-            alpha=alpha,
-            solver=solver,
-        )
+    if return_all_topics:
+        return doc_vectors, stable_topics, all_topics
     else:
-        raise ValueError('Model must be one of "plsa" or "nmf"')
-
-    return doc_vectors, stable_topics
+        return doc_vectors, stable_topics
 
 
 class EnsembleTopics(BaseEstimator, TransformerMixin):
@@ -600,17 +2648,33 @@ class EnsembleTopics(BaseEstimator, TransformerMixin):
 
     n_starts: int (optional, default=16)
         The number of bootstrap sampled topic models to run -- the size of the ensemble.
+        If ``adaptive`` is True this is the largest size the ensemble may grow to.
 
-    n_jobs: int (optional, default=8)
-        The number of parallel jobs to run at a time.
+    n_jobs: int or None (optional, default=None)
+        The number of ensemble members to fit concurrently. If None this is chosen
+        automatically from the size of the corpus, trading concurrent members
+        against numba threads per member; see ``ensemble_thread_layout``.
+
+    n_threads: int or None (optional, default=None)
+        The total number of threads to use, split between concurrent members and
+        the numba threads within each member. If None use all the threads numba is
+        configured with.
 
     parallelism: string (optional, default="dask")
-        The parallelism model to use. Should be one of "dask" or "joblib".
+        The parallelism model to use. Should be one of "dask", "joblib", "batch",
+        "distributed", "pipeline" or "none". The "batch" option (pLSA only) fits the
+        whole ensemble in a single batched EM optimization, reading the corpus once
+        per iteration for all members. The "distributed" option runs members on the
+        dask.distributed cluster of the current default client, so ``n_starts`` can
+        scale past a single host. The "pipeline" option prepares members (bootstrap
+        samples and initializations) in a separate thread, overlapped with fitting.
 
     topic_combination: string (optional, default="hellinger_umap")
         The method of comnining ensemble topics into a set of stable topics. Should be one of:
             * ``"hellinger_umap"``
             * ``"hellinger"``
+            * ``"hellinger_boruvka"``
+            * ``"hellinger_hierarchical"``
             * ``"kl_divergence"``
 
     bootstrap: bool (optional, default=True)
@@ -652,6 +2716,56 @@ class EnsembleTopics(BaseEstimator, TransformerMixin):
         If None, the random number generator is the RandomState instance used
         by `np.random`. Used in in initialization.
 
+    topic_store: TopicStore, string or None (optional, default=None)
+        A store (or the path of one) to save the topics of each ensemble member to
+        as it completes. Members already in the store are loaded instead of being
+        refit, so an interrupted fit can be resumed by fitting again with the same
+        store, and ``add_members`` extends the store.
+
+    adaptive: bool (optional, default=False)
+        Whether to grow the ensemble in waves, stopping as soon as the stable topics
+        of consecutive waves match, rather than always fitting ``n_starts`` members.
+
+    wave_size: int (optional, default=4)
+        The number of ensemble members to add in each wave if ``adaptive`` is True.
+
+    convergence_tol: float (optional, default=0.05)
+        The largest Hellinger distance between matched stable topics of consecutive
+        waves for the topics to count as unchanged if ``adaptive`` is True.
+
+    topic_mass: float or None (optional, default=None)
+        If set, the topics of each ensemble member are truncated to the words
+        covering this fraction of their probability mass (0.99, say) and kept as a
+        sparse matrix, which greatly reduces the memory needed for the ensemble
+        topics with large vocabularies.
+
+    share_init: bool (optional, default=True)
+        With the "nndsvd" or "nmf" initializations, whether to compute the SVD or
+        NMF once for the whole corpus and derive each member's initialization from
+        it by projecting its bootstrap sample and randomly perturbing the result,
+        rather than computing it for every member.
+
+    max_time: float or None (optional, default=None)
+        A budget, in seconds of wall clock time, for fitting the ensemble members
+        (by ``fit``, or by each call to ``add_members``). When it runs out the EM
+        of members in progress stops after the iteration in progress, members
+        that have not started are skipped, and the stable topics are combined from
+        the members fit so far. Combining the topics and fitting the document
+        vectors take place after the budget.
+
+    profile: bool (optional, default=False)
+        Whether to record the wall clock time, CPU time and peak memory of each
+        phase of the fit (bootstrap sampling, initialization, EM, each ensemble
+        member, distance matrices, UMAP, HDBSCAN, and the refit of the document
+        vectors) as ``profile_``.
+
+    memory_limit: int or None (optional, default=None)
+        The number of bytes of memory the fit should stay under. If the
+        estimated peak memory of fitting the ensemble exceeds it fewer members
+        are fit concurrently or, for pLSA, members are fit in batches with
+        "batch" parallelism, which needs far less memory; see ``plan_memory``
+        and ``ensemble_memory_plan``.
+
     Attributes
     ----------
 
@@ -671,6 +2785,57 @@ class EnsembleTopics(BaseEstimator, TransformerMixin):
     training_data_: sparse matrix of shape (n_docs, n_words)
         The original training data saved in sparse matrix format.
 
+    topic_scorer_: TopicScorer
+        The corpus statistics used to score topics by ``coherence`` and
+        ``log_lift``, computed from ``training_data_`` on first use.
+
+    thread_layout_: dict
+        The split of threads used to fit the ensemble, as returned by
+        ``ensemble_thread_layout``, after any reduction in concurrency for
+        ``memory_limit``.
+
+    memory_plan_: dict
+        The plan the ensemble was fit with, as returned by ``plan_memory``.
+
+    all_topics_: array or sparse matrix of shape (n_starts_ * n_components, n_words)
+        The topics generated by every member of the ensemble.
+
+    n_starts_: int
+        The number of members in the ensemble, including any added with
+        ``add_members``. Fewer than ``n_starts`` if ``max_time`` ran out.
+
+    member_runs_: array of shape (n_starts_,)
+        The index of the run that generated each member, in the order of
+        ``all_topics_``. Runs skipped when ``max_time`` ran out leave gaps.
+
+    max_time_reached_: bool
+        Whether ``max_time`` cut the last fit (or ``add_members``) short: some
+        members were skipped or had their EM stopped, or an adaptive ensemble
+        stopped growing before it converged.
+
+    combination_cache_: dict
+        The intermediate results of combining ``all_topics_`` into stable topics
+        (distance matrices, embeddings and HDBSCAN trees), reused by ``recombine``
+        and ``add_members``.
+
+    topic_labels_: array of shape (n_starts_ * n_components,)
+        The index of the stable topic each row of ``all_topics_`` was combined
+        into, or -1 for ensemble topics in no cluster.
+
+    topic_provenance_: list of arrays of shape (n_i, 2)
+        For each stable topic, the (run, topic) pairs identifying the ensemble
+        members and their topics that were combined into it; see
+        ``topic_provenance``.
+
+    converged_: bool
+        Only set if ``adaptive`` is True. Whether the stable topics converged
+        before the ensemble reached ``n_starts`` members.
+
+    profile_: FitProfiler
+        Only set if ``profile`` is True. The phases of the last fit,
+        ``add_members`` or ``recombine``; see ``FitProfiler.summary``,
+        ``FitProfiler.to_json`` and ``FitProfiler.to_chrome_trace``.
+
     References
     ----------
 
@@ -690,7 +2855,7 @@ class EnsembleTopics(BaseEstimator, TransformerMixin):
         n_starts=16,
         min_samples=3,
         min_cluster_size=5,
-        n_jobs=8,
+        n_jobs=None,
         parallelism="dask",
         topic_combination="hellinger_umap",
         bootstrap=True,
@@ -703,6 +2868,16 @@ class EnsembleTopics(BaseEstimator, TransformerMixin):
         alpha=0.0,
         solver="mu",
         random_state=None,
+        n_threads=None,
+        topic_store=None,
+        adaptive=False,
+        wave_size=4,
+        convergence_tol=0.05,
+        topic_mass=None,
+        share_init=True,
+        max_time=None,
+        profile=False,
+        memory_limit=None,
     ):
         self.n_components = n_components
         self.model = model
@@ -723,6 +2898,67 @@ class EnsembleTopics(BaseEstimator, TransformerMixin):
         self.alpha = alpha
         self.solver = solver
         self.random_state = random_state
+        self.n_threads = n_threads
+        self.topic_store = topic_store
+        self.adaptive = adaptive
+        self.wave_size = wave_size
+        self.convergence_tol = convergence_tol
+        self.topic_mass = topic_mass
+        self.share_init = share_init
+        self.max_time = max_time
+        self.profile = profile
+        self.memory_limit = memory_limit
+
+    def _profiling(self):
+        """A context manager profiling the fit to a new ``profile_``, if
+        ``profile`` is True."""
+        if not self.profile:
+            return _NULL_PHASE
+        self.profile_ = FitProfiler()
+        return self.profile_.activate()
+
+    def plan_memory(self, X):
+        """Estimate the peak memory of fitting the model to the data X, and the
+        settings the fit would use to stay under ``memory_limit``, without
+        fitting it. For an adaptive model the estimate is for an ensemble grown
+        to ``n_starts`` members.
+
+        Parameters
+        ----------
+        X: array or sparse matrix of shape (n_docs, n_words)
+            The data matrix the model would be fit to.
+
+        Returns
+        -------
+        plan: dict
+            The plan, as returned by ``ensemble_memory_plan``.
+        """
+        X = check_array(X, accept_sparse="csr")
+        nnz = X.nnz if issparse(X) else np.count_nonzero(X)
+        return ensemble_memory_plan(
+            X.shape[0],
+            X.shape[1],
+            nnz,
+            self.n_components,
+            self.n_starts,
+            self.model,
+            self.n_jobs,
+            self.n_threads,
+            self.parallelism,
+            init=self.init,
+            share_init=self.share_init,
+            topic_combination=self.topic_combination,
+            memory_limit=self.memory_limit,
+        )
+
+    def _plan_fit(self, X):
+        """Plan the memory of fitting the ensemble to X, and the thread layout
+        it is fit with."""
+        self.memory_plan_ = self.plan_memory(X)
+        self.thread_layout_ = {
+            key: self.memory_plan_[key]
+            for key in ("n_threads", "n_concurrent", "n_threads_per_member")
+        }
 
     def fit(self, X, y=None):
         """Learn the ensemble model for the data X and return the document vectors.
@@ -760,39 +2996,281 @@ class EnsembleTopics(BaseEstimator, TransformerMixin):
         embedding: array of shape (n_docs, n_topics)
             An embedding of the documents into a topic space.
         """
+        if self.adaptive:
+            for _ in self.fit_iter(X):
+                pass
+            return self.embedding_
+
+        with self._profiling():
+            return self._fit_transform(X)
+
+    def _fit_transform(self, X):
         X = check_array(X, accept_sparse="csr")
 
         if not issparse(X):
             X = csr_matrix(X)
 
-        U, V = ensemble_fit(
-            X,
+        self._plan_fit(X)
+        self.combination_cache_ = {}
+        self.training_data_ = X
+
+        with phase("ensemble"):
+            self.all_topics_, info = ensemble_of_topics(
+                X.astype(np.float32).tocoo(),
+                self.n_components,
+                self.model,
+                self.n_jobs,
+                self.n_starts,
+                self.parallelism,
+                self.n_threads,
+                self.topic_store,
+                topic_mass=self.topic_mass,
+                share_init=self.share_init,
+                max_time=self.max_time,
+                memory_plan=self.memory_plan_,
+                return_info=True,
+                init=self.init,
+                n_iter=self.n_iter,
+                n_iter_per_test=self.n_iter_per_test,
+                tolerance=self.tolerance,
+                e_step_thresh=self.e_step_thresh,
+                bootstrap=self.bootstrap,
+                beta_loss=self.beta_loss,
+                alpha=self.alpha,
+                solver=self.solver,
+                random_state=self.random_state,
+            )
+        self.member_runs_ = info["runs"]
+        self.n_starts_ = self.member_runs_.shape[0]
+        self.max_time_reached_ = info["max_time_reached"]
+
+        return self._recombine().embedding_
+
+    def fit_iter(self, X, y=None):
+        """Learn the ensemble model for the data X adaptively, growing the ensemble
+        in waves of ``wave_size`` members until the stable topics converge or the
+        ensemble has ``n_starts`` members. This is a generator: after each wave the
+        model holds the provisional ensemble (``all_topics_``, ``n_starts_``,
+        ``converged_``, and the provisional stable topics as ``components_``) and
+        the provisional stable topics are yielded. Document vectors are fit once
+        the generator is exhausted; if iteration is stopped early, call
+        ``recombine`` to fit them to the ensemble so far.
+
+        Parameters
+        ----------
+        X: array or sparse matrix of shape (n_docs, n_words)
+            The data matrix pLSA is attempting to fit to.
+
+        y: Ignored
+
+        Yields
+        ------
+        stable_topics: array of shape (M, n_words)
+            The provisional stable topics after each wave.
+        """
+        X = check_array(X, accept_sparse="csr", dtype=np.float32)
+
+        if not issparse(X):
+            X = csr_matrix(X)
+
+        self._plan_fit(X)
+        self.combination_cache_ = {}
+        self.training_data_ = X
+
+        waves = adaptive_ensemble_of_topics(
+            X.tocoo(),
             self.n_components,
             self.model,
-            self.init,
-            self.min_samples,
-            self.min_cluster_size,
-            self.n_starts,
             self.n_jobs,
+            self.n_starts,
             self.parallelism,
+            self.n_threads,
+            self.topic_store,
+            self.wave_size,
+            self.min_samples,
+            self.min_cluster_size,
+            self.topic_combination,
+            self.convergence_tol,
+            self.combination_cache_,
+            topic_mass=self.topic_mass,
+            share_init=self.share_init,
+            max_time=self.max_time,
+            memory_plan=self.memory_plan_,
+            return_info=True,
+            init=self.init,
+            n_iter=self.n_iter,
+            n_iter_per_test=self.n_iter_per_test,
+            tolerance=self.tolerance,
+            e_step_thresh=self.e_step_thresh,
+            bootstrap=self.bootstrap,
+            beta_loss=self.beta_loss,
+            alpha=self.alpha,
+            solver=self.solver,
+            random_state=self.random_state,
+        )
+        # The profiler is only active while the generator runs, not while the
+        # caller handles each wave
+        profiling = self._profiling()
+        while True:
+            with profiling:
+                try:
+                    all_topics, stable_topics, converged, info = next(waves)
+                except StopIteration:
+                    # Growth stops early, short of convergence, only when the
+                    # budget runs out between waves
+                    self.max_time_reached_ = self.max_time_reached_ or (
+                        not self.converged_ and self.n_starts_ < self.n_starts
+                    )
+                    self._recombine()
+                    return
+            self.all_topics_ = all_topics
+            self.member_runs_ = info["runs"]
+            self.n_starts_ = self.member_runs_.shape[0]
+            self.converged_ = converged
+            self.max_time_reached_ = info["max_time_reached"]
+            self.components_ = stable_topics
+            self.n_components_ = stable_topics.shape[0]
+            yield stable_topics
+
+    def add_members(self, n_members):
+        """Extend the fitted ensemble with further members, then reselect the stable
+        topics and refit the document vectors using the whole, enlarged, ensemble.
+        Only the new members are fit. If the model has a ``topic_store`` the new
+        members are saved to it as well.
+
+        Parameters
+        ----------
+        n_members: int
+            The number of members to add to the ensemble.
+
+        Returns
+        -------
+        self
+        """
+        self._check_refittable("adding members")
+
+        with self._profiling():
+            with phase("ensemble"):
+                new_topics, info = ensemble_of_topics(
+                    self.training_data_.astype(np.float32).tocoo(),
+                    self.n_components,
+                    self.model,
+                    self.n_jobs,
+                    n_members,
+                    self.parallelism,
+                    self.n_threads,
+                    self.topic_store,
+                    run_offset=self.member_runs_.max() + 1,
+                    topic_mass=self.topic_mass,
+                    share_init=self.share_init,
+                    max_time=self.max_time,
+                    memory_limit=self.memory_limit,
+                    return_info=True,
+                    init=self.init,
+                    n_iter=self.n_iter,
+                    n_iter_per_test=self.n_iter_per_test,
+                    tolerance=self.tolerance,
+                    e_step_thresh=self.e_step_thresh,
+                    bootstrap=self.bootstrap,
+                    beta_loss=self.beta_loss,
+                    alpha=self.alpha,
+                    solver=self.solver,
+                    random_state=self.random_state,
+                )
+            self.all_topics_ = _stack_topics([self.all_topics_, new_topics])
+            self.member_runs_ = np.concatenate([self.member_runs_, info["runs"]])
+            self.n_starts_ = self.member_runs_.shape[0]
+            self.max_time_reached_ = info["max_time_reached"]
+
+            return self._recombine()
+
+    def recombine(
+        self,
+        min_samples=None,
+        min_cluster_size=None,
+        topic_combination=None,
+        lift_factor=None,
+    ):
+        """Reselect the stable topics from the already fitted ensemble using new
+        clustering parameters, and refit the document vectors to them. The
+        ensemble is not refit, and the expensive parts of topic combination (the
+        distance matrix or UMAP embedding of the ensemble topics, and the HDBSCAN
+        tree for each ``min_samples``) are reused from earlier fits where possible,
+        so this is cheap compared to fitting a new model.
+
+        Any parameter left as None keeps its current value; the others replace the
+        corresponding parameters of the model.
+
+        Parameters
+        ----------
+        min_samples: int or None (optional, default=None)
+            The min_samples parameter to use for HDBSCAN clustering.
+
+        min_cluster_size: int or None (optional, default=None)
+            The min_cluster_size parameter to use for HDBSCAN clustering
+
+        topic_combination: string or None (optional, default=None)
+            The method of comnining ensemble topics into a set of stable topics.
+
+        lift_factor: int or None (optional, default=None)
+            Importance factor to apply to lift.
+
+        Returns
+        -------
+        self
+        """
+        self._check_refittable("recombining")
+
+        if min_samples is not None:
+            self.min_samples = min_samples
+        if min_cluster_size is not None:
+            self.min_cluster_size = min_cluster_size
+        if topic_combination is not None:
+            self.topic_combination = topic_combination
+        if lift_factor is not None:
+            self.lift_factor = lift_factor
+
+        with self._profiling():
+            return self._recombine()
+
+    def _check_refittable(self, action):
+        if not hasattr(self, "components_"):
+            raise ValueError("The model must be fit before {}".format(action))
+        for name in ("all_topics_", "training_data_"):
+            if not hasattr(self, name):
+                raise ValueError(
+                    "The model was saved without {}, which {} needs".format(
+                        name, action
+                    )
+                )
+
+    def _recombine(self):
+        X = self.training_data_.astype(np.float32)
+        U, V, labels = combine_ensemble_topics(
+            X,
+            self.all_topics_,
+            self.model,
+            self.min_samples,
+            self.min_cluster_size,
             self.topic_combination,
-            self.bootstrap,
-            self.n_iter,
-            self.n_iter_per_test,
-            self.tolerance,
             self.e_step_thresh,
             self.lift_factor,
             self.beta_loss,
             self.alpha,
             self.solver,
             self.random_state,
+            self.combination_cache_,
+            return_labels=True,
         )
         self.components_ = V
         self.embedding_ = U
-        self.training_data_ = X
         self.n_components_ = self.components_.shape[0]
+        self.topic_labels_ = labels
+        self.topic_provenance_ = topic_provenance(
+            labels, self.n_components, self.member_runs_
+        )
 
-        return U
+        return self
 
     def transform(self, X, y=None):
         """Transform the data X into the topic space of the fitted ensemble model.
@@ -828,6 +3306,13 @@ class EnsembleTopics(BaseEstimator, TransformerMixin):
 
         return result
 
+    def _topic_scorer(self):
+        if getattr(self, "topic_scorer_", None) is None or (
+            self.topic_scorer_.data is not self.training_data_
+        ):
+            self.topic_scorer_ = TopicScorer(self.training_data_)
+        return self.topic_scorer_
+
     def coherence(self, topic_num=None, n_words=20):
         """Compute the average coherence of fitted topics, or of a single individual topic.
 
@@ -852,12 +3337,10 @@ class EnsembleTopics(BaseEstimator, TransformerMixin):
             raise ValueError("Topic number must be an integer or None.")
 
         if topic_num is None:
-            return mean_coherence(
-                self.components_, self.training_data_, n_words=n_words
-            )
+            return self._topic_scorer().mean_coherence(self.components_, n_words)
         elif topic_num >= 0 and topic_num < self.n_components:
-            return coherence(
-                self.components_, topic_num, self.training_data_, n_words=n_words
+            return self._topic_scorer().coherence(
+                self.components_, topic_num, n_words
             )
         else:
             raise ValueError(
@@ -889,12 +3372,71 @@ class EnsembleTopics(BaseEstimator, TransformerMixin):
             raise ValueError("Topic number must be an integer or None.")
 
         if topic_num is None:
-            return mean_log_lift(self.components_, self.training_data_, n_words=n_words)
+            return self._topic_scorer().mean_log_lift(self.components_, n_words)
         elif topic_num >= 0 and topic_num < self.n_components:
-            return log_lift(
-                self.components_, topic_num, self.training_data_, n_words=n_words
+            return self._topic_scorer().log_lift(
+                self.components_, topic_num, n_words
             )
         else:
             raise ValueError(
                 "Topic number must be in range 0 to {}".format(self.n_components)
             )
+
+    def save(
+        self,
+        path,
+        include_training_data=True,
+        include_embedding=True,
+        include_all_topics=True,
+    ):
+        """Save the fitted model to a directory, as raw arrays that ``load`` can
+        memory map; see ``save_model``. The intermediate results of topic
+        combination (``combination_cache_``) are not saved.
+
+        Parameters
+        ----------
+        path: string
+            The directory to save the model in.
+
+        include_training_data: bool (optional, default=True)
+            Whether to save ``training_data_``, which is needed to score topics,
+            add members or recombine the ensemble.
+
+        include_embedding: bool (optional, default=True)
+            Whether to save ``embedding_``.
+
+        include_all_topics: bool (optional, default=True)
+            Whether to save ``all_topics_``, which is needed to add members or
+            recombine the ensemble.
+        """
+        save_model(
+            self, path, include_training_data, include_embedding, include_all_topics
+        )
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load a model saved with ``save``.
+
+        Parameters
+        ----------
+        path: string
+            The directory the model was saved in.
+
+        mmap: bool (optional, default=True)
+            Whether to memory map the model's arrays rather than read them into
+            memory, so that processes loading the same model share it.
+
+        Returns
+        -------
+        model: EnsembleTopics
+            The loaded model.
+        """
+        model = load_model(cls, path, mmap)
+        model.combination_cache_ = {}
+        if hasattr(model, "topic_labels_"):
+            model.topic_provenance_ = topic_provenance(
+                model.topic_labels_,
+                model.n_components,
+                getattr(model, "member_runs_", None),
+            )
+        return model
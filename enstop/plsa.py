@@ -1,3 +1,4 @@
+import time
 import numpy as np
 import numba
 
@@ -5,13 +6,14 @@ from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.utils import check_array, check_random_state
 from sklearn.utils.extmath import randomized_svd
 from sklearn.decomposition import non_negative_factorization
-from scipy.sparse import issparse, csr_matrix, coo_matrix
+from scipy.sparse import issparse, csr_matrix, coo_matrix, diags
 
-from enstop.utils import normalize, coherence, mean_coherence, log_lift, mean_log_lift
+from enstop.utils import normalize, TopicScorer
+from enstop.serialization import save_model, load_model
 
 
 @numba.njit(
-    "f4[:,::1](i4[::1],i4[::1],f4[::1],f4[:,::1],f4[:,::1],f4[:,::1],f4)",
+    "f4[:,::1](i4[::1],i4[::1],f4[::1],f4[::1],f4[:,::1],f4[:,::1],f4[:,::1],f4)",
     locals={
         "k": numba.types.uint16,
         "w": numba.types.uint32,
@@ -28,6 +30,7 @@ def plsa_e_step(
     X_rows,
     X_cols,
     X_vals,
+    sample_weight,
     p_w_given_z,
     p_z_given_d,
     p_z_given_wd,
@@ -59,6 +62,10 @@ def plsa_e_step(
     X_vals: array of shape (nnz,)
         For each non-zero entry of X, the value of entry.
 
+    sample_weight: array of shape (n_docs,)
+        The weight of each document. Entries belonging to documents with zero
+        weight are skipped entirely.
+
     p_w_given_z: array of shape (n_topics, n_words)
         The current estimates of values for P(w|z)
 
@@ -80,6 +87,9 @@ def plsa_e_step(
         d = X_rows[nz_idx]
         w = X_cols[nz_idx]
 
+        if sample_weight[d] <= 0.0:
+            continue
+
         norm = 0.0
         for z in range(k):
             v = p_w_given_z[z, w] * p_z_given_d[d, z]
@@ -96,7 +106,7 @@ def plsa_e_step(
 
 
 @numba.njit(
-    "UniTuple(f4[:,::1],2)(i4[::1],i4[::1],f4[::1],f4[:,::1],f4[:,::1],f4[:,::1],f4[::1],f4[::1])",
+    "UniTuple(f4[:,::1],2)(i4[::1],i4[::1],f4[::1],f4[::1],f4[:,::1],f4[:,::1],f4[:,::1],f4[::1],f4[::1])",
     locals={
         "k": numba.types.uint16,
         "w": numba.types.uint32,
@@ -104,20 +114,34 @@ def plsa_e_step(
         "z": numba.types.uint16,
         "nz_idx": numba.types.uint32,
         "s": numba.types.float32,
+        "weight": numba.types.float32,
     },
     fastmath=True,
     nogil=True,
     parallel=True,
 )
 def plsa_m_step(
-    X_rows, X_cols, X_vals, p_w_given_z, p_z_given_d, p_z_given_wd, norm_pwz, norm_pdz
+    X_rows,
+    X_cols,
+    X_vals,
+    sample_weight,
+    p_w_given_z,
+    p_z_given_d,
+    p_z_given_wd,
+    norm_pwz,
+    norm_pdz,
 ):
     """Perform the M-step of pLSA optimization. This amounts to using the estimates
     of P(z|w,d) to estimate the values P(w|z) and P(z|d). The computation implements
 
-    P(w|z) = \frac{\sum_{d\in D} X_{w,d}P(z|w,d)}{\sum_{d,z} X_{w,d}P(z|w,d)}
+    P(w|z) = \frac{\sum_{d\in D} c_d X_{w,d}P(z|w,d)}{\sum_{d,z} c_d X_{w,d}P(z|w,d)}
     P(z|d) = \frac{\sum_{w\in V} X_{w,d}P(z|w,d)}{\sum_{w,d} X_{w,d}P(z|w,d)}
 
+    where c_d is the weight of document d. An integer weight is equivalent to
+    repeating the document that many times in the data matrix, so bootstrap samples
+    can be fit by passing the sample multiplicities as weights instead of
+    materializing the resampled matrix.
+
     This routine is optimized to work with sparse matrices such that P(z|w,d) is only
     computed for w, d such that X_{w,d} is non-zero, where X is the data matrix.
 
@@ -136,6 +160,10 @@ def plsa_m_step(
     X_vals: array of shape (nnz,)
         For each non-zero entry of X, the value of entry.
 
+    sample_weight: array of shape (n_docs,)
+        The weight of each document. Documents with zero weight do not
+        contribute and are left with all zero P(z|d).
+
     p_w_given_z: array of shape (n_topics, n_words)
         The result array to write new estimates of P(w|z) to.
 
@@ -169,14 +197,18 @@ def plsa_m_step(
         d = X_rows[nz_idx]
         w = X_cols[nz_idx]
         x = X_vals[nz_idx]
+        weight = sample_weight[d]
+
+        if weight <= 0.0:
+            continue
 
         for z in range(k):
             s = x * p_z_given_wd[nz_idx, z]
 
-            p_w_given_z[z, w] += s
+            p_w_given_z[z, w] += weight * s
             p_z_given_d[d, z] += s
 
-            norm_pwz[z] += s
+            norm_pwz[z] += weight * s
             norm_pdz[d] += s
 
     for z in numba.prange(k):
@@ -191,7 +223,7 @@ def plsa_m_step(
 
 
 @numba.njit(
-    "f4(i4[::1],i4[::1],f4[::1],f4[:,::1],f4[:,::1])",
+    "f4(i4[::1],i4[::1],f4[::1],f4[::1],f4[:,::1],f4[:,::1])",
     locals={
         "k": numba.types.uint16,
         "w": numba.types.uint32,
@@ -206,12 +238,14 @@ def plsa_m_step(
     nogil=True,
     parallel=True,
 )
-def log_likelihood(X_rows, X_cols, X_vals, p_w_given_z, p_z_given_d):
+def log_likelihood(X_rows, X_cols, X_vals, sample_weight, p_w_given_z, p_z_given_d):
     """Compute the log-likelihood of observing the data X given estimates for P(w|z)
     and P(z|d). The likelihood of X_{w,d} under the model is given by X_{w,d} P(w|d)
     = X_{w,d} P(w|z) P(z|d). This function returns
 
-    \log\left(\prod_{w,d} X_{w,d} P(w|d)\right)
+    \log\left(\prod_{w,d} X_{w,d} P(w|d)^{c_d}\right)
+
+    where c_d is the weight of document d.
 
     This routine is optimized to work with sparse matrices and only compute values
     for w, d such that X_{w,d} is non-zero.
@@ -231,6 +265,9 @@ def log_likelihood(X_rows, X_cols, X_vals, p_w_given_z, p_z_given_d):
     X_vals: array of shape (nnz,)
         For each non-zero entry of X, the value of entry.
 
+    sample_weight: array of shape (n_docs,)
+        The weight of each document. Documents with zero weight are skipped.
+
     p_w_given_z: array of shape (n_topics, n_words)
         The current estimates of values for P(w|z)
 
@@ -254,15 +291,37 @@ def log_likelihood(X_rows, X_cols, X_vals, p_w_given_z, p_z_given_d):
         w = X_cols[nz_idx]
         x = X_vals[nz_idx]
 
+        if sample_weight[d] <= 0.0:
+            continue
+
         p_w_given_d = 0.0
         for z in range(k):
             p_w_given_d += p_w_given_z[z, w] * p_z_given_d[d, z]
 
-        result += x * np.log(p_w_given_d)
+        result += sample_weight[d] * x * np.log(p_w_given_d)
 
     return result
 
 
+@numba.njit(nogil=True)
+def past_deadline(deadline):
+    """Whether the wall clock time (as given by ``time.time``) has reached
+    ``deadline``; always False for an infinite deadline, without consulting the
+    clock."""
+    if deadline == np.inf:
+        return False
+    with numba.objmode(now="float64"):
+        now = time.time()
+    return now >= deadline
+
+
+def _deadline(max_time):
+    """The wall clock time ``max_time`` seconds from now, or infinity if None."""
+    if max_time is None:
+        return np.inf
+    return time.time() + max_time
+
+
 @numba.njit(fastmath=True, nogil=True)
 def norm(x):
     """Numba compilable routine for computing the l2-norm
@@ -286,53 +345,10 @@ def norm(x):
     return np.sqrt(result)
 
 
-def plsa_init(X, k, init="random", rng=np.random):
-    """Initialize matrices for pLSA. Specifically, given data X, a number of topics
-    k, and an initialization method, compute matrices for P(z|d) and P(w|z) that can
-    be used to begin an EM optimization of pLSA.
-
-    Various initialization approaches are available. The most straightforward is
-    "random", which randomly initializes values for P(z|d) and P(w|z) and normalizes
-    to make them probabilities. A second approach, borrowing from sklearn's NMF
-    implementation, is to use a non-negative SVD approach ("nndsvd"). A third option
-    is the use the fast coordinate descent under Frobenius loss version of NMF and
-    then normalize to make probabilities ("nmf"). Finally if the ``init`` parameter
-    is a tuple of ndarrays then these will be used, allowing for custom user defined
-    initializations.
-
-    Parameters
-    ----------
-    X: sparse matrix of shape (n_docs, n_words)
-        The data matrix pLSA is attempting to fit to.
-
-    k: int
-        The number of topics for pLSA to fit with.
-
-    init: string or tuple (optional, default="random")
-        The intialization method to use. This should be one of:
-            * ``"random"``
-            * ``"nndsvd"``
-            * ``"nmf"``
-        or a tuple of two ndarrays of shape (n_docs, n_topics) and (n_topics, n_words).
-
-    rng: RandomState instance (optional, default=np.random)
-        Seeded randomness generator. Used for random intialization.
-
-    Returns
-    -------
-    p_z_given_d, p_w_given_z: arrays of shapes (n_docs, n_topics) and (n_topics, n_words)
-        Initialized arrays suitable to passing to
-        pLSA optimization methods.
-    """
-
-    n = X.shape[0]
-    m = X.shape[1]
-
-    if init == "random":
-        p_w_given_z = rng.rand(k, m)
-        p_z_given_d = rng.rand(n, k)
-
-    elif init == "nndsvd":
+def _nonnegative_factors(X, k, init):
+    """Non-negative (unnormalized) factors of X from a non-negative SVD
+    ("nndsvd") or a Frobenius loss NMF ("nmf"), used to initialize pLSA."""
+    if init == "nndsvd":
         # Taken from sklearn NMF implementation
         U, S, V = randomized_svd(X, k)
         p_z_given_d, p_w_given_z = np.zeros(U.shape), np.zeros(V.shape)
@@ -379,6 +395,66 @@ def plsa_init(X, k, init="random", rng=np.random):
             tol=1e-2,
             max_iter=100,
         )
+
+    return p_z_given_d, p_w_given_z
+
+
+def plsa_init(X, k, init="random", rng=np.random, sample_weight=None):
+    """Initialize matrices for pLSA. Specifically, given data X, a number of topics
+    k, and an initialization method, compute matrices for P(z|d) and P(w|z) that can
+    be used to begin an EM optimization of pLSA.
+
+    Various initialization approaches are available. The most straightforward is
+    "random", which randomly initializes values for P(z|d) and P(w|z) and normalizes
+    to make them probabilities. A second approach, borrowing from sklearn's NMF
+    implementation, is to use a non-negative SVD approach ("nndsvd"). A third option
+    is the use the fast coordinate descent under Frobenius loss version of NMF and
+    then normalize to make probabilities ("nmf"). Finally if the ``init`` parameter
+    is a tuple of ndarrays then these will be used, allowing for custom user defined
+    initializations.
+
+    Parameters
+    ----------
+    X: sparse matrix of shape (n_docs, n_words)
+        The data matrix pLSA is attempting to fit to.
+
+    k: int
+        The number of topics for pLSA to fit with.
+
+    init: string or tuple (optional, default="random")
+        The intialization method to use. This should be one of:
+            * ``"random"``
+            * ``"nndsvd"``
+            * ``"nmf"``
+        or a tuple of two ndarrays of shape (n_docs, n_topics) and (n_topics, n_words).
+
+    rng: RandomState instance (optional, default=np.random)
+        Seeded randomness generator. Used for random intialization.
+
+    sample_weight: array of shape (n_docs,) or None (optional, default=None)
+        Per document weights. For the "nndsvd" and "nmf" initializations rows of X
+        are scaled by the square root of their weight, which matches the Frobenius
+        loss of a matrix with each document repeated according to its weight.
+
+    Returns
+    -------
+    p_z_given_d, p_w_given_z: arrays of shapes (n_docs, n_topics) and (n_topics, n_words)
+        Initialized arrays suitable to passing to
+        pLSA optimization methods.
+    """
+
+    n = X.shape[0]
+    m = X.shape[1]
+
+    if sample_weight is not None and init in ("nndsvd", "nmf"):
+        X = diags(np.sqrt(sample_weight)) @ X
+
+    if init == "random":
+        p_w_given_z = rng.rand(k, m)
+        p_z_given_d = rng.rand(n, k)
+
+    elif init in ("nndsvd", "nmf"):
+        p_z_given_d, p_w_given_z = _nonnegative_factors(X, k, init)
     elif isinstance(init, tuple) or isinstance(init, list):
         p_z_given_d, p_w_given_z = init
     else:
@@ -390,17 +466,100 @@ def plsa_init(X, k, init="random", rng=np.random):
     return p_z_given_d, p_w_given_z
 
 
+def plsa_shared_init(X, k, init="nndsvd"):
+    """Compute the (unnormalized) non-negative factors of a whole corpus used to
+    initialize every member of an ensemble with ``plsa_member_init``. The SVD or
+    NMF behind the "nndsvd" and "nmf" initializations can cost as much as the EM
+    itself, and gives nearly the same result for every bootstrap sample, so it is
+    computed once rather than per member.
+
+    Parameters
+    ----------
+    X: sparse matrix of shape (n_docs, n_words)
+        The corpus.
+
+    k: int
+        The number of topics.
+
+    init: string (optional, default="nndsvd")
+        The initialization to share; either ``"nndsvd"`` or ``"nmf"``.
+
+    Returns
+    -------
+    shared_init: tuple of arrays of shapes (n_docs, n_topics) and (n_topics, n_words)
+        The document and word factors of the corpus.
+    """
+    if init not in ("nndsvd", "nmf"):
+        raise ValueError("Only the nndsvd and nmf initializations can be shared")
+    return _nonnegative_factors(X, k, init)
+
+
+def plsa_member_init(
+    X, shared_init, sample_weight=None, perturbation=0.1, rng=np.random
+):
+    """Derive the initialization of one ensemble member from the factors of the
+    whole corpus computed by ``plsa_shared_init``. The word factors are adapted to
+    the member's bootstrap sample by a single (sample weighted) multiplicative
+    NMF update, a projection of the sample onto the shared document factors, and
+    both factors are then randomly perturbed so that members start from, and
+    converge to, different points. Entries that are exactly zero, which the
+    multiplicative update can't move from, are first filled with small random
+    values, as in the "nndsvdar" initialization of NMF.
+
+    Parameters
+    ----------
+    X: sparse matrix of shape (n_docs, n_words)
+        The corpus.
+
+    shared_init: tuple of arrays of shapes (n_docs, n_topics) and (n_topics, n_words)
+        The factors of the corpus, as returned by ``plsa_shared_init``.
+
+    sample_weight: array of shape (n_docs,) or None (optional, default=None)
+        The document weights of the member's bootstrap sample.
+
+    perturbation: float (optional, default=0.1)
+        The relative size of the random perturbation of each entry.
+
+    rng: RandomState instance (optional, default=np.random)
+        Seeded randomness generator used for the perturbation.
+
+    Returns
+    -------
+    p_z_given_d, p_w_given_z: arrays of shapes (n_docs, n_topics) and (n_topics, n_words)
+        Initialized arrays suitable to passing to pLSA optimization methods.
+    """
+    W, H = shared_init
+    if sample_weight is not None:
+        weighted_W = W * np.asarray(sample_weight, dtype=np.float64)[:, np.newaxis]
+        numerator = np.asarray((X.T @ weighted_W).T)
+        denominator = (weighted_W.T @ W) @ H
+        H = H * numerator / np.maximum(denominator, np.finfo(np.float32).tiny)
+
+    factors = []
+    for factor in (W, H):
+        factor = factor.copy()
+        zeros = factor == 0
+        factor[zeros] = factor.mean() * rng.rand(np.count_nonzero(zeros)) / 100
+        factor *= rng.uniform(1.0 - perturbation, 1.0 + perturbation, factor.shape)
+        normalize(factor, axis=1)
+        factors.append(factor)
+
+    return factors[0], factors[1]
+
+
 @numba.njit(fastmath=True, nogil=True)
 def plsa_fit_inner(
     X_rows,
     X_cols,
     X_vals,
+    sample_weight,
     p_w_given_z,
     p_z_given_d,
     n_iter=100,
     n_iter_per_test=10,
     tolerance=0.001,
     e_step_thresh=1e-32,
+    deadline=np.inf,
 ):
     """Internal loop of EM steps required to optimize pLSA, along with relative
     convergence tests with respect to the log-likelihood of observing the data under
@@ -425,6 +584,9 @@ def plsa_fit_inner(
     X_vals: array of shape (nnz,)
         For each non-zero entry of X, the value of entry.
 
+    sample_weight: array of shape (n_docs,)
+        The weight of each document.
+
     p_w_given_z: array of shape (n_topics, n_words)
         The current estimates of values for P(w|z)
 
@@ -446,11 +608,17 @@ def plsa_fit_inner(
         Option to promote sparsity. If the value of P(w|z)P(z|d) in the E step falls
         below threshold then write a zero for P(z|w,d).
 
+    deadline: float (optional, default=np.inf)
+        The wall clock time (as given by ``time.time``) at which to stop, after
+        the iteration in progress, whether or not the optimization has converged.
+
     Returns
     -------
     p_z_given_d, p_w_given_z: arrays of shapes (n_docs, n_topics) and (n_topics, n_words)
         The resulting model values of P(z|d) and P(w|z)
 
+    max_time_reached: bool
+        Whether the optimization was stopped by ``deadline``.
     """
     k = p_z_given_d.shape[1]
     n = p_z_given_d.shape[0]
@@ -461,7 +629,7 @@ def plsa_fit_inner(
     norm_pdz = np.zeros(n, dtype=np.float32)
 
     previous_log_likelihood = log_likelihood(
-        X_rows, X_cols, X_vals, p_w_given_z, p_z_given_d
+        X_rows, X_cols, X_vals, sample_weight, p_w_given_z, p_z_given_d
     )
 
     for i in range(n_iter):
@@ -470,6 +638,7 @@ def plsa_fit_inner(
             X_rows,
             X_cols,
             X_vals,
+            sample_weight,
             p_w_given_z,
             p_z_given_d,
             p_z_given_wd,
@@ -479,6 +648,7 @@ def plsa_fit_inner(
             X_rows,
             X_cols,
             X_vals,
+            sample_weight,
             p_w_given_z,
             p_z_given_d,
             p_z_given_wd,
@@ -488,7 +658,7 @@ def plsa_fit_inner(
 
         if i % n_iter_per_test == 0:
             current_log_likelihood = log_likelihood(
-                X_rows, X_cols, X_vals, p_w_given_z, p_z_given_d
+                X_rows, X_cols, X_vals, sample_weight, p_w_given_z, p_z_given_d
             )
             change = np.abs(current_log_likelihood - previous_log_likelihood)
             if change / np.abs(current_log_likelihood) < tolerance:
@@ -496,7 +666,10 @@ def plsa_fit_inner(
             else:
                 previous_log_likelihood = current_log_likelihood
 
-    return p_z_given_d, p_w_given_z
+        if i + 1 < n_iter and past_deadline(deadline):
+            return p_z_given_d, p_w_given_z, True
+
+    return p_z_given_d, p_w_given_z, False
 
 
 def plsa_fit(
@@ -508,6 +681,9 @@ def plsa_fit(
     tolerance=0.001,
     e_step_thresh=1e-32,
     random_state=None,
+    sample_weight=None,
+    max_time=None,
+    return_max_time_reached=False,
 ):
     """Fit a pLSA model to a data matrix ``X`` with ``k`` topics, an initialized
     according to ``init``. This will run an EM method to optimize estimates of P(z|d)
@@ -552,32 +728,593 @@ def plsa_fit(
         If None, the random number generator is the RandomState instance used
         by `np.random`. Used in in initialization.
 
+    sample_weight: array of shape (n_docs,) or None (optional, default=None)
+        Per document weights. An integer weight is equivalent to repeating the
+        document that many times, so a bootstrap sample can be fit by passing its
+        multiplicities rather than a resampled copy of ``X``. Documents with zero
+        weight are ignored and have all zero P(z|d). If None all documents have
+        weight one.
+
+    max_time: float or None (optional, default=None)
+        A budget, in seconds of wall clock time, for the fit. If it runs out EM
+        stops after the iteration in progress, whether or not it has converged.
+
+    return_max_time_reached: bool (optional, default=False)
+        Whether to also return whether EM was stopped by ``max_time``.
+
     Returns
     -------
     p_z_given_d, p_w_given_z: arrays of shapes (n_docs, n_topics) and (n_topics, n_words)
         The resulting model values of P(z|d) and P(w|z)
 
+    max_time_reached: bool
+        Only returned if ``return_max_time_reached`` is True. Whether EM was
+        stopped by ``max_time`` before it converged or ran ``n_iter`` iterations.
     """
 
+    return plsa_fit_prepared(
+        plsa_prepare(X, k, init, random_state, sample_weight),
+        n_iter,
+        n_iter_per_test,
+        tolerance,
+        e_step_thresh,
+        _deadline(max_time),
+        return_max_time_reached,
+    )
+
+
+def plsa_prepare(X, k, init="random", random_state=None, sample_weight=None):
+    """Prepare the inputs of the EM optimization of ``plsa_fit``: convert the data
+    to the format the numba kernels need and initialize the model. This part of
+    a fit holds the GIL (and, for the "nndsvd" and "nmf" initializations, can take
+    a while), so splitting it out lets it overlap with the EM of other fits; see
+    ``plsa_fit_prepared``.
+
+    Parameters
+    ----------
+    X: sparse matrix of shape (n_docs, n_words)
+        The data matrix pLSA is attempting to fit to.
+
+    k: int
+        The number of topics for pLSA to fit with.
+
+    init: string or tuple (optional, default="random")
+        The intialization method to use; see ``plsa_fit``.
+
+    random_state: int, RandomState instance or None, (optional, default: None)
+        The random state used in initialization.
+
+    sample_weight: array of shape (n_docs,) or None (optional, default=None)
+        Per document weights; see ``plsa_fit``.
+
+    Returns
+    -------
+    prepared: tuple
+        The rows, columns and values of the non-zero entries of X, the sample
+        weights, and the initial P(w|z) and P(z|d), ready for ``plsa_fit_inner``.
+    """
     rng = check_random_state(random_state)
-    p_z_given_d, p_w_given_z = plsa_init(X, k, init=init, rng=rng)
+    p_z_given_d, p_w_given_z = plsa_init(
+        X, k, init=init, rng=rng, sample_weight=sample_weight
+    )
     p_z_given_d = p_z_given_d.astype(np.float32, order="C")
     p_w_given_z = p_w_given_z.astype(np.float32, order="C")
 
-    A = X.tocoo().astype(np.float32)
+    if sample_weight is None:
+        sample_weight = np.ones(X.shape[0], dtype=np.float32)
+    else:
+        sample_weight = np.ascontiguousarray(sample_weight, dtype=np.float32)
+        if sample_weight.shape != (X.shape[0],):
+            raise ValueError("sample_weight must be an array of shape (n_docs,)")
+
+    # Avoid copying the data if it is already in the format the kernels need
+    A = X.tocoo().astype(np.float32, copy=False)
+
+    return A.row, A.col, A.data, sample_weight, p_w_given_z, p_z_given_d
+
+
+def plsa_fit_prepared(
+    prepared,
+    n_iter=100,
+    n_iter_per_test=10,
+    tolerance=0.001,
+    e_step_thresh=1e-32,
+    deadline=np.inf,
+    return_max_time_reached=False,
+):
+    """Run the EM optimization of pLSA on inputs from ``plsa_prepare``. This runs
+    entirely in numba kernels that release the GIL.
+
+    Parameters
+    ----------
+    prepared: tuple
+        The inputs returned by ``plsa_prepare``.
+
+    n_iter: int
+        The maximum number iterations of EM to perform
 
-    p_z_given_d, p_w_given_z = plsa_fit_inner(
+    n_iter_per_test: int
+        The number of iterations between tests for
+        relative improvement in log-likelihood.
+
+    tolerance: float
+        The threshold of relative improvement in
+        log-likelihood required to continue iterations.
+
+    e_step_thresh: float (optional, default=1e-32)
+        Option to promote sparsity. If the value of P(w|z)P(z|d) in the E step falls
+        below threshold then write a zero for P(z|w,d).
+
+    deadline: float (optional, default=np.inf)
+        The wall clock time at which to stop EM; see ``plsa_fit_inner``.
+
+    return_max_time_reached: bool (optional, default=False)
+        Whether to also return whether EM was stopped by ``deadline``.
+
+    Returns
+    -------
+    p_z_given_d, p_w_given_z: arrays of shapes (n_docs, n_topics) and (n_topics, n_words)
+        The resulting model values of P(z|d) and P(w|z)
+
+    max_time_reached: bool
+        Only returned if ``return_max_time_reached`` is True. Whether EM was
+        stopped by ``deadline``.
+    """
+    p_z_given_d, p_w_given_z, max_time_reached = plsa_fit_inner(
+        *prepared, n_iter, n_iter_per_test, tolerance, e_step_thresh, deadline
+    )
+    if return_max_time_reached:
+        return p_z_given_d, p_w_given_z, max_time_reached
+    return p_z_given_d, p_w_given_z
+
+
+@numba.njit(
+    "void(i4[::1],i4[::1],f4[::1],f4[:,::1],f4[:,:,::1],f4[:,:,::1],f4[:,:,::1],"
+    "f4[:,:,::1],f4[:,::1],b1[::1],f8[::1],b1,f4,i8)",
+    locals={
+        "w": numba.types.uint32,
+        "d": numba.types.uint32,
+        "nz_idx": numba.types.uint32,
+        "s": numba.types.float32,
+        "v": numba.types.float32,
+        "x": numba.types.float32,
+        "weight": numba.types.float32,
+        "norm": numba.types.float32,
+        "p_w_given_d": numba.types.float32,
+    },
+    fastmath=True,
+    nogil=True,
+    parallel=True,
+)
+def plsa_em_step_batch(
+    X_rows,
+    X_cols,
+    X_vals,
+    sample_weights,
+    p_w_given_z,
+    p_z_given_d,
+    next_p_w_given_z,
+    next_p_z_given_d,
+    norm_pwz,
+    active,
+    log_likelihoods,
+    compute_log_likelihood,
+    probability_threshold,
+    block_size,
+):
+    """Perform a combined E-step and M-step of pLSA optimization for a batch of
+    independent models fit to the same data. Each model may have its own document
+    weights (for example bootstrap multiplicities) and its own current estimates of
+    P(w|z) and P(z|d).
+
+    Rather than storing P(z|w,d) for every non-zero entry, the E-step values are
+    computed on the fly and immediately accumulated into the M-step sums. The
+    non-zero entries are processed in blocks of ``block_size``; all models are
+    advanced over a block in parallel before moving on to the next block, so each
+    entry of the data is read from main memory once per iteration regardless of the
+    number of models.
+
+    Note that P(w|z) is stored word-major, with shape (n_models, n_words, n_topics),
+    so that the topic values for a given word are contiguous in memory.
+
+    If ``compute_log_likelihood`` is set then, as a side effect, the log-likelihood
+    of the data under the *current* estimates (i.e. before this update) is computed
+    for each model and written to ``log_likelihoods``.
+
+    To make this numba compilable the raw arrays defining the COO format sparse
+    matrix must be passed separately.
+
+    Parameters
+    ----------
+    X_rows: array of shape (nnz,)
+        For each non-zero entry of X, the row of the entry.
+
+    X_cols: array of shape (nnz,)
+        For each non-zero entry of X, the column of the
+        entry.
+
+    X_vals: array of shape (nnz,)
+        For each non-zero entry of X, the value of entry.
+
+    sample_weights: array of shape (n_models, n_docs)
+        The weight of each document for each model.
+
+    p_w_given_z: array of shape (n_models, n_words, n_topics)
+        The current estimates of values for P(w|z); these are overwritten with the
+        new estimates.
+
+    p_z_given_d: array of shape (n_models, n_docs, n_topics)
+        The current estimates of values for P(z|d); these are overwritten with the
+        new estimates.
+
+    next_p_w_given_z: array of shape (n_models, n_words, n_topics)
+        Auxilliary array used for accumulating new estimates of P(w|z).
+
+    next_p_z_given_d: array of shape (n_models, n_docs, n_topics)
+        Auxilliary array used for accumulating new estimates of P(z|d).
+
+    norm_pwz: array of shape (n_models, n_topics)
+        Auxilliary array used for storing row norms; this is passed in to save
+        reallocations.
+
+    active: array of shape (n_models,)
+        Which models to update. Models that are not active are left untouched.
+
+    log_likelihoods: array of shape (n_models,)
+        The result array to write the log-likelihood of each model to.
+
+    compute_log_likelihood: bool
+        Whether to compute the log-likelihoods on this pass.
+
+    probability_threshold: float
+        Option to promote sparsity. If the value of P(w|z)P(z|d) falls below
+        threshold then it is treated as zero in the E-step.
+
+    block_size: int
+        The number of non-zero entries to process per parallel block.
+
+    """
+    n_models = p_w_given_z.shape[0]
+    m = p_w_given_z.shape[1]
+    k = p_w_given_z.shape[2]
+    n = p_z_given_d.shape[1]
+    nnz = X_vals.shape[0]
+
+    for r in numba.prange(n_models):
+        if active[r]:
+            next_p_w_given_z[r] = 0.0
+            next_p_z_given_d[r] = 0.0
+            log_likelihoods[r] = 0.0
+
+    for block_start in range(0, nnz, block_size):
+        block_end = min(block_start + block_size, nnz)
+
+        for r in numba.prange(n_models):
+            if not active[r]:
+                continue
+
+            p_z = np.empty(k, dtype=np.float32)
+
+            for nz_idx in range(block_start, block_end):
+                d = X_rows[nz_idx]
+                weight = sample_weights[r, d]
+                if weight <= 0.0:
+                    continue
+
+                w = X_cols[nz_idx]
+                x = X_vals[nz_idx]
+
+                norm = 0.0
+                p_w_given_d = 0.0
+                for z in range(k):
+                    v = p_w_given_z[r, w, z] * p_z_given_d[r, d, z]
+                    p_w_given_d += v
+                    if v > probability_threshold:
+                        p_z[z] = v
+                        norm += v
+                    else:
+                        p_z[z] = 0.0
+
+                if compute_log_likelihood:
+                    log_likelihoods[r] += weight * x * np.log(p_w_given_d)
+
+                if norm <= 0.0:
+                    continue
+
+                for z in range(k):
+                    s = x * p_z[z] / norm
+                    next_p_w_given_z[r, w, z] += weight * s
+                    next_p_z_given_d[r, d, z] += s
+
+    for r in numba.prange(n_models):
+        if not active[r]:
+            continue
+
+        norm_pwz[r] = 0.0
+        for w in range(m):
+            for z in range(k):
+                norm_pwz[r, z] += next_p_w_given_z[r, w, z]
+
+        for w in range(m):
+            for z in range(k):
+                if norm_pwz[r, z] > 0:
+                    p_w_given_z[r, w, z] = next_p_w_given_z[r, w, z] / norm_pwz[r, z]
+                else:
+                    p_w_given_z[r, w, z] = 0.0
+
+        for d in range(n):
+            norm = 0.0
+            for z in range(k):
+                norm += next_p_z_given_d[r, d, z]
+            for z in range(k):
+                if norm > 0:
+                    p_z_given_d[r, d, z] = next_p_z_given_d[r, d, z] / norm
+                else:
+                    p_z_given_d[r, d, z] = 0.0
+
+
+@numba.njit(fastmath=True, nogil=True)
+def plsa_fit_batch_inner(
+    X_rows,
+    X_cols,
+    X_vals,
+    sample_weights,
+    p_w_given_z,
+    p_z_given_d,
+    n_iter=100,
+    n_iter_per_test=10,
+    tolerance=0.001,
+    e_step_thresh=1e-32,
+    block_size=16384,
+    deadline=np.inf,
+):
+    """Internal loop of EM steps required to optimize a batch of pLSA models, along
+    with relative convergence tests with respect to the log-likelihood of observing
+    the data under each model.
+
+    Each model stops updating once the relative improvement in its log-likelihood
+    over the last ``n_iter_per_test`` steps is under ``tolerance``; the loop stops
+    when every model has converged or ``n_iter`` iterations have been reached.
+
+    This function is designed to wrap the internals of the EM process in a numba
+    compilable loop, and is not the preferred entry point for fitting plsa models.
+
+    Parameters
+    ----------
+    X_rows: array of shape (nnz,)
+        For each non-zero entry of X, the row of the entry.
+
+    X_cols: array of shape (nnz,)
+        For each non-zero entry of X, the column of the
+        entry.
+
+    X_vals: array of shape (nnz,)
+        For each non-zero entry of X, the value of entry.
+
+    sample_weights: array of shape (n_models, n_docs)
+        The weight of each document for each model.
+
+    p_w_given_z: array of shape (n_models, n_words, n_topics)
+        The current estimates of values for P(w|z), stored word-major.
+
+    p_z_given_d: array of shape (n_models, n_docs, n_topics)
+        The current estimates of values for P(z|d)
+
+    n_iter: int
+        The maximum number iterations of EM to perform
+
+    n_iter_per_test: int
+        The number of iterations between tests for
+        relative improvement in log-likelihood.
+
+    tolerance: float
+        The threshold of relative improvement in
+        log-likelihood required to continue iterations.
+
+    e_step_thresh: float (optional, default=1e-32)
+        Option to promote sparsity. If the value of P(w|z)P(z|d) in the E step falls
+        below threshold then write a zero for P(z|w,d).
+
+    block_size: int (optional, default=16384)
+        The number of non-zero entries to process per parallel block.
+
+    deadline: float (optional, default=np.inf)
+        The wall clock time (as given by ``time.time``) at which to stop, after
+        the iteration in progress, whether or not the models have converged.
+
+    Returns
+    -------
+    p_z_given_d, p_w_given_z: arrays of shapes (n_models, n_docs, n_topics) and
+    (n_models, n_words, n_topics)
+        The resulting model values of P(z|d) and P(w|z), with P(w|z) stored
+        word-major.
+
+    max_time_reached: bool
+        Whether the optimization was stopped by ``deadline``.
+    """
+    n_models = p_w_given_z.shape[0]
+    k = p_w_given_z.shape[2]
+
+    next_p_w_given_z = np.zeros_like(p_w_given_z)
+    next_p_z_given_d = np.zeros_like(p_z_given_d)
+    norm_pwz = np.zeros((n_models, k), dtype=np.float32)
+
+    active = np.ones(n_models, dtype=np.bool_)
+    log_likelihoods = np.zeros(n_models, dtype=np.float64)
+    previous_log_likelihoods = np.zeros(n_models, dtype=np.float64)
+
+    for i in range(n_iter):
+        test_convergence = i % n_iter_per_test == 0
+
+        plsa_em_step_batch(
+            X_rows,
+            X_cols,
+            X_vals,
+            sample_weights,
+            p_w_given_z,
+            p_z_given_d,
+            next_p_w_given_z,
+            next_p_z_given_d,
+            norm_pwz,
+            active,
+            log_likelihoods,
+            test_convergence,
+            e_step_thresh,
+            block_size,
+        )
+
+        # The log-likelihoods are those of the estimates going into this step
+        if i == 0:
+            previous_log_likelihoods[:] = log_likelihoods
+        elif test_convergence:
+            for r in range(n_models):
+                if not active[r]:
+                    continue
+                change = np.abs(log_likelihoods[r] - previous_log_likelihoods[r])
+                if change / np.abs(log_likelihoods[r]) < tolerance:
+                    active[r] = False
+                else:
+                    previous_log_likelihoods[r] = log_likelihoods[r]
+
+            if not np.any(active):
+                break
+        if i + 1 < n_iter and past_deadline(deadline):
+            return p_z_given_d, p_w_given_z, True
+
+    return p_z_given_d, p_w_given_z, False
+
+
+def plsa_fit_batch(
+    X,
+    k,
+    n_models,
+    init="random",
+    n_iter=100,
+    n_iter_per_test=10,
+    tolerance=0.001,
+    e_step_thresh=1e-32,
+    random_state=None,
+    sample_weights=None,
+    max_time=None,
+    return_max_time_reached=False,
+):
+    """Fit ``n_models`` independent pLSA models to a data matrix ``X`` with ``k``
+    topics each, in a single batched EM optimization. This produces the same kind of
+    result as calling ``plsa_fit`` ``n_models`` times with different random states
+    (and, optionally, different sample weights), but makes a single pass over the
+    data per EM iteration for all the models at once, and does not need to store
+    P(z|w,d) for each non-zero entry. This is much more efficient when memory
+    bandwidth is the bottleneck, as is typically the case for large corpora.
+
+    Work is parallelised over models, so at least as many models as there are
+    numba threads are needed to keep all cores busy.
+
+    Parameters
+    ----------
+    X: sparse matrix of shape (n_docs, n_words)
+        The data matrix pLSA is attempting to fit to.
+
+    k: int
+        The number of topics for pLSA to fit with.
+
+    n_models: int
+        The number of independent models to fit.
+
+    init: string or tuple (optional, default="random")
+        The intialization method to use. This should be one of:
+            * ``"random"``
+            * ``"nndsvd"``
+            * ``"nmf"``
+
+    n_iter: int
+        The maximum number iterations of EM to perform
+
+    n_iter_per_test: int
+        The number of iterations between tests for
+        relative improvement in log-likelihood.
+
+    tolerance: float
+        The threshold of relative improvement in
+        log-likelihood required to continue iterations.
+
+    e_step_thresh: float (optional, default=1e-32)
+        Option to promote sparsity. If the value of P(w|z)P(z|d) in the E step falls
+        below threshold then write a zero for P(z|w,d).
+
+    random_state: int, RandomState instance, None, or list thereof (optional, default: None)
+        If int, random_state is the seed used by the random number generator;
+        If RandomState instance, random_state is the random number generator;
+        If None, the random number generator is the RandomState instance used
+        by `np.random`. If a list of length ``n_models`` each model is
+        initialized with its own random state. Used in in initialization.
+
+    sample_weights: array of shape (n_models, n_docs) or None (optional, default=None)
+        Per model document weights, as for the ``sample_weight`` parameter of
+        ``plsa_fit``. If None all documents have weight one for every model.
+
+    max_time: float or None (optional, default=None)
+        A budget, in seconds of wall clock time, for the fit. If it runs out EM
+        stops after the iteration in progress, for every model.
+
+    return_max_time_reached: bool (optional, default=False)
+        Whether to also return whether EM was stopped by ``max_time``.
+
+    Returns
+    -------
+    p_z_given_d, p_w_given_z: arrays of shapes (n_models, n_docs, n_topics) and
+    (n_models, n_topics, n_words)
+        The resulting model values of P(z|d) and P(w|z) for each model.
+
+    max_time_reached: bool
+        Only returned if ``return_max_time_reached`` is True. Whether EM was
+        stopped by ``max_time`` before every model converged or ``n_iter``
+        iterations were run.
+    """
+    if isinstance(random_state, (list, tuple)):
+        if len(random_state) != n_models:
+            raise ValueError("random_state must provide one state per model")
+        rngs = [check_random_state(seed) for seed in random_state]
+    else:
+        rngs = [check_random_state(random_state)] * n_models
+
+    if sample_weights is None:
+        sample_weights = np.ones((n_models, X.shape[0]), dtype=np.float32)
+    else:
+        sample_weights = np.ascontiguousarray(sample_weights, dtype=np.float32)
+        if sample_weights.shape != (n_models, X.shape[0]):
+            raise ValueError(
+                "sample_weights must be an array of shape (n_models, n_docs)"
+            )
+
+    # The batched kernels store P(w|z) word-major for better memory locality
+    p_z_given_d = np.empty((n_models, X.shape[0], k), dtype=np.float32)
+    p_w_given_z = np.empty((n_models, X.shape[1], k), dtype=np.float32)
+    for r in range(n_models):
+        doc_topic, topic_vocab = plsa_init(
+            X, k, init=init, rng=rngs[r], sample_weight=sample_weights[r]
+        )
+        p_z_given_d[r] = doc_topic
+        p_w_given_z[r] = topic_vocab.T
+
+    A = X.tocoo().astype(np.float32, copy=False)
+
+    p_z_given_d, p_w_given_z, max_time_reached = plsa_fit_batch_inner(
         A.row,
         A.col,
         A.data,
+        sample_weights,
         p_w_given_z,
         p_z_given_d,
         n_iter,
         n_iter_per_test,
         tolerance,
         e_step_thresh,
+        deadline=_deadline(max_time),
     )
 
+    p_w_given_z = np.ascontiguousarray(p_w_given_z.transpose(0, 2, 1))
+    if return_max_time_reached:
+        return p_z_given_d, p_w_given_z, max_time_reached
     return p_z_given_d, p_w_given_z
 
 
@@ -722,15 +1459,23 @@ def plsa_refit_inner(
     p_z_given_wd = np.zeros((X_rows.shape[0], k), dtype=np.float32)
 
     norm_pdz = np.zeros(p_z_given_d.shape[0], dtype=np.float32)
+    sample_weight = np.ones(p_z_given_d.shape[0], dtype=np.float32)
 
     previous_log_likelihood = log_likelihood(
-        X_rows, X_cols, X_vals, topics, p_z_given_d
+        X_rows, X_cols, X_vals, sample_weight, topics, p_z_given_d
     )
 
     for i in range(n_iter):
 
         plsa_e_step(
-            X_rows, X_cols, X_vals, topics, p_z_given_d, p_z_given_wd, e_step_thresh
+            X_rows,
+            X_cols,
+            X_vals,
+            sample_weight,
+            topics,
+            p_z_given_d,
+            p_z_given_wd,
+            e_step_thresh,
         )
         plsa_refit_m_step(
             X_rows, X_cols, X_vals, topics, p_z_given_d, p_z_given_wd, norm_pdz
@@ -738,7 +1483,7 @@ def plsa_refit_inner(
 
         if i % n_iter_per_test == 0:
             current_log_likelihood = log_likelihood(
-                X_rows, X_cols, X_vals, topics, p_z_given_d
+                X_rows, X_cols, X_vals, sample_weight, topics, p_z_given_d
             )
             if current_log_likelihood > 0:
                 change = np.abs(current_log_likelihood - previous_log_likelihood)
@@ -805,7 +1550,7 @@ def plsa_refit(
     p_z_given_d = rng.rand(A.shape[0], k)
     normalize(p_z_given_d, axis=1)
     p_z_given_d = p_z_given_d.astype(np.float32)
-    topics = topics.astype(np.float32)
+    topics = np.ascontiguousarray(topics, dtype=np.float32)
 
     p_z_given_d = plsa_refit_inner(
         A.row,
@@ -869,6 +1614,10 @@ class PLSA(BaseEstimator, TransformerMixin):
         If None, the random number generator is the RandomState instance used
         by `np.random`. Used in in initialization.
 
+    max_time: float or None (optional, default=None)
+        A budget, in seconds of wall clock time, for fitting. If it runs out EM
+        stops after the iteration in progress, whether or not it has converged.
+
     Attributes
     ----------
 
@@ -885,6 +1634,14 @@ class PLSA(BaseEstimator, TransformerMixin):
     training_data_: sparse matrix of shape (n_docs, n_words)
         The original training data saved in sparse matrix format.
 
+    topic_scorer_: TopicScorer
+        The corpus statistics used to score topics by ``coherence`` and
+        ``log_lift``, computed from ``training_data_`` on first use.
+
+    max_time_reached_: bool
+        Whether EM was stopped by ``max_time`` before it converged or ran
+        ``n_iter`` iterations.
+
     References
     ----------
 
@@ -905,6 +1662,7 @@ class PLSA(BaseEstimator, TransformerMixin):
         tolerance=0.001,
         e_step_thresh=1e-32,
         random_state=None,
+        max_time=None,
     ):
 
         self.n_components = n_components
@@ -914,8 +1672,9 @@ class PLSA(BaseEstimator, TransformerMixin):
         self.tolerance = tolerance
         self.e_step_thresh = e_step_thresh
         self.random_state = random_state
+        self.max_time = max_time
 
-    def fit(self, X, y=None):
+    def fit(self, X, y=None, sample_weight=None):
         """Learn the pLSA model for the data X and return the document vectors.
 
         This is more efficient than calling fit followed by transform.
@@ -927,14 +1686,18 @@ class PLSA(BaseEstimator, TransformerMixin):
 
         y: Ignored
 
+        sample_weight: array of shape (n_docs,) or None (optional, default=None)
+            Per document weights; an integer weight is equivalent to repeating the
+            document that many times. Documents with zero weight are ignored.
+
         Returns
         -------
         self
         """
-        self.fit_transform(X)
+        self.fit_transform(X, sample_weight=sample_weight)
         return self
 
-    def fit_transform(self, X, y=None):
+    def fit_transform(self, X, y=None, sample_weight=None):
         """Learn the pLSA model for the data X and return the document vectors.
 
         This is more efficient than calling fit followed by transform.
@@ -946,6 +1709,10 @@ class PLSA(BaseEstimator, TransformerMixin):
 
         y: Ignored
 
+        sample_weight: array of shape (n_docs,) or None (optional, default=None)
+            Per document weights; an integer weight is equivalent to repeating the
+            document that many times. Documents with zero weight are ignored.
+
         Returns
         -------
         embedding: array of shape (n_docs, n_topics)
@@ -957,7 +1724,7 @@ class PLSA(BaseEstimator, TransformerMixin):
         if not issparse(X):
             X = csr_matrix(X)
 
-        U, V = plsa_fit(
+        U, V, self.max_time_reached_ = plsa_fit(
             X,
             self.n_components,
             self.init,
@@ -966,6 +1733,9 @@ class PLSA(BaseEstimator, TransformerMixin):
             self.tolerance,
             self.e_step_thresh,
             self.random_state,
+            sample_weight,
+            self.max_time,
+            return_max_time_reached=True,
         )
         self.components_ = V
         self.embedding_ = U
@@ -1006,6 +1776,13 @@ class PLSA(BaseEstimator, TransformerMixin):
 
         return result
 
+    def _topic_scorer(self):
+        if getattr(self, "topic_scorer_", None) is None or (
+            self.topic_scorer_.data is not self.training_data_
+        ):
+            self.topic_scorer_ = TopicScorer(self.training_data_)
+        return self.topic_scorer_
+
     def coherence(self, topic_num=None, n_words=20):
         """Compute the average coherence of fitted topics, or of a single individual topic.
 
@@ -1030,9 +1807,11 @@ class PLSA(BaseEstimator, TransformerMixin):
             raise ValueError("Topic number must be an integer or None.")
 
         if topic_num is None:
-            return mean_coherence(self.components_, self.training_data_, n_words)
+            return self._topic_scorer().mean_coherence(self.components_, n_words)
         elif topic_num >= 0 and topic_num < self.n_components:
-            return coherence(self.components_, topic_num, self.training_data_, n_words)
+            return self._topic_scorer().coherence(
+                self.components_, topic_num, n_words
+            )
         else:
             raise ValueError(
                 "Topic number must be in range 0 to {}".format(self.n_components)
@@ -1063,10 +1842,49 @@ class PLSA(BaseEstimator, TransformerMixin):
             raise ValueError("Topic number must be an integer or None.")
 
         if topic_num is None:
-            return mean_log_lift(self.components_, self.training_data_, n_words)
+            return self._topic_scorer().mean_log_lift(self.components_, n_words)
         elif topic_num >= 0 and topic_num < self.n_components:
-            return log_lift(self.components_, topic_num, self.training_data_, n_words)
+            return self._topic_scorer().log_lift(
+                self.components_, topic_num, n_words
+            )
         else:
             raise ValueError(
                 "Topic number must be in range 0 to {}".format(self.n_components)
             )
+
+    def save(self, path, include_training_data=True, include_embedding=True):
+        """Save the fitted model to a directory, as raw arrays that ``load`` can
+        memory map; see ``save_model``.
+
+        Parameters
+        ----------
+        path: string
+            The directory to save the model in.
+
+        include_training_data: bool (optional, default=True)
+            Whether to save ``training_data_``, which is needed to score topics.
+
+        include_embedding: bool (optional, default=True)
+            Whether to save ``embedding_``.
+        """
+        save_model(self, path, include_training_data, include_embedding)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load a model saved with ``save``.
+
+        Parameters
+        ----------
+        path: string
+            The directory the model was saved in.
+
+        mmap: bool (optional, default=True)
+            Whether to memory map the model's arrays rather than read them into
+            memory, so that processes loading the same model share it.
+
+        Returns
+        -------
+        model: PLSA
+            The loaded model.
+        """
+        return load_model(cls, path, mmap)
@@ -0,0 +1,323 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+
+try:
+    import psutil
+
+    _HAVE_PSUTIL = True
+except ImportError:
+    _HAVE_PSUTIL = False
+
+# The profiler phases are being recorded to, if any; see ``FitProfiler.activate``
+_active_profiler = None
+
+
+def _current_rss():
+    """The resident set size of this process in bytes, or None if it can't be
+    determined."""
+    if _HAVE_PSUTIL:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _to_json(value):
+    # Tags may hold numpy scalars, such as member indices
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def _thread_time():
+    # time.thread_time is only available from Python 3.7
+    if hasattr(time, "thread_time"):
+        return time.thread_time()
+    return None
+
+
+class _NullPhase(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+def phase(name, **tags):
+    """A context manager recording the time and memory spent in a phase of a fit to
+    the active ``FitProfiler``, or doing nothing if no profiler is active.
+
+    Parameters
+    ----------
+    name: string
+        The name of the phase, such as ``"em"`` or ``"hdbscan"``.
+
+    tags:
+        Extra values describing the phase, such as the ``member`` of the ensemble
+        it belongs to. Phases nested inside it inherit its tags.
+    """
+    profiler = _active_profiler
+    if profiler is None:
+        return _NULL_PHASE
+    return profiler.phase(name, **tags)
+
+
+class _Phase(object):
+    def __init__(self, profiler, name, tags):
+        self.profiler = profiler
+        self.name = name
+        self.tags = tags
+
+    def __enter__(self):
+        profiler = self.profiler
+        stack = profiler._tag_stack()
+        if stack:
+            self.tags = dict(stack[-1], **self.tags)
+        stack.append(self.tags)
+
+        rss = _current_rss()
+        self.record = OrderedDict(
+            [
+                ("name", self.name),
+                ("tags", self.tags),
+                ("thread", profiler._thread_index()),
+                ("depth", len(stack) - 1),
+                ("start", time.perf_counter() - profiler._start_time),
+                ("wall_time", None),
+                ("cpu_time", None),
+                ("thread_cpu_time", None),
+                ("start_rss", rss),
+                ("peak_rss", rss),
+            ]
+        )
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+        self._start_thread_cpu = _thread_time()
+        with profiler._lock:
+            profiler._open_records.append(self.record)
+        return self
+
+    def __exit__(self, *exc_info):
+        profiler = self.profiler
+        record = self.record
+        record["wall_time"] = time.perf_counter() - self._start_wall
+        record["cpu_time"] = time.process_time() - self._start_cpu
+        if self._start_thread_cpu is not None:
+            record["thread_cpu_time"] = _thread_time() - self._start_thread_cpu
+        rss = _current_rss()
+        with profiler._lock:
+            if rss is not None:
+                record["peak_rss"] = max(record["peak_rss"] or 0, rss)
+            profiler._open_records.remove(record)
+            profiler.records.append(record)
+        profiler._tag_stack().pop()
+        return False
+
+
+class FitProfiler(object):
+    """Record the wall clock time, CPU time and peak memory of each phase of a fit
+    (and of each ensemble member), to find where the time of a slow fit goes.
+
+    Phases are recorded with the module level ``phase`` context manager, which
+    costs nothing unless a profiler is active; ``EnsembleTopics(profile=True)``
+    activates one for the duration of its fit and keeps it as ``profile_``.
+    Phases run in any thread of the process are recorded, so only one fit per
+    process should be profiled at a time, and ensemble members run on a
+    dask.distributed cluster are not.
+
+    Memory is measured as the resident set size of the process, sampled in a
+    background thread every ``sample_interval`` seconds (and at the start and end
+    of each phase), so the peak memory of phases that run concurrently, or
+    shorter than the sampling interval, is approximate. CPU time is that of the
+    whole process (including numba's worker threads, and any concurrent
+    phases), along with that of the thread running the phase where available.
+
+    Parameters
+    ----------
+    sample_interval: float (optional, default=0.01)
+        The number of seconds between samples of the memory in use.
+
+    Attributes
+    ----------
+    records: list of dicts
+        One record per phase, in order of completion, giving its ``name``, its
+        ``tags``, the ``thread`` (numbered in order of first use) and nesting
+        ``depth`` it ran at, its ``start`` (in seconds since the profiler was
+        created), ``wall_time``, ``cpu_time`` and ``thread_cpu_time`` in
+        seconds, and the resident set size at its start (``start_rss``) and its
+        ``peak_rss``, in bytes.
+    """
+
+    def __init__(self, sample_interval=0.01):
+        self.sample_interval = sample_interval
+        self.records = []
+        self._start_time = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._threads = {}
+        self._open_records = []
+        self._stop_sampling = threading.Event()
+
+    def _tag_stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _thread_index(self):
+        with self._lock:
+            return self._threads.setdefault(threading.get_ident(), len(self._threads))
+
+    def _sample_memory(self):
+        while not self._stop_sampling.wait(self.sample_interval):
+            rss = _current_rss()
+            if rss is None:
+                return
+            with self._lock:
+                for record in self._open_records:
+                    record["peak_rss"] = max(record["peak_rss"] or 0, rss)
+
+    def phase(self, name, **tags):
+        """A context manager recording a phase of the fit to this profiler; see
+        the module level ``phase``."""
+        return _Phase(self, name, tags)
+
+    def activate(self):
+        """A context manager making this the active profiler, to which ``phase``
+        records, and sampling memory use, until it exits."""
+        return _ActiveProfiler(self)
+
+    def summary(self, by="name"):
+        """Total the records by phase.
+
+        Parameters
+        ----------
+        by: string (optional, default="name")
+            Either ``"name"`` to total the records of each phase name, or the
+            name of a tag (such as ``"member"``) to total the records of each
+            phase name for each value of the tag.
+
+        Returns
+        -------
+        summary: dict
+            For each phase name (or pair of phase name and tag value), the number
+            of ``calls``, the total ``wall_time``, ``cpu_time`` and
+            ``thread_cpu_time``, and the largest ``peak_rss``.
+        """
+        result = OrderedDict()
+        for record in self.records:
+            if by == "name":
+                key = record["name"]
+            else:
+                key = (record["name"], record["tags"].get(by))
+            if key not in result:
+                result[key] = OrderedDict(
+                    [
+                        ("calls", 0),
+                        ("wall_time", 0.0),
+                        ("cpu_time", 0.0),
+                        ("thread_cpu_time", 0.0),
+                        ("peak_rss", None),
+                    ]
+                )
+            totals = result[key]
+            totals["calls"] += 1
+            for field in ("wall_time", "cpu_time", "thread_cpu_time"):
+                totals[field] += record[field] or 0.0
+            if record["peak_rss"] is not None:
+                totals["peak_rss"] = max(totals["peak_rss"] or 0, record["peak_rss"])
+        return result
+
+    def to_json(self, path=None):
+        """Export the records as JSON.
+
+        Parameters
+        ----------
+        path: string or None (optional, default=None)
+            The file to write the JSON to. If None it is returned instead.
+
+        Returns
+        -------
+        json: string or None
+            The JSON, if ``path`` is None.
+        """
+        result = json.dumps(
+            {"records": self.records, "summary": self.summary()},
+            indent=2,
+            default=_to_json,
+        )
+        if path is None:
+            return result
+        with open(path, "w") as json_file:
+            json_file.write(result)
+
+    def to_chrome_trace(self, path=None):
+        """Export the records as a timeline in the Chrome trace event format, which
+        can be viewed in ``chrome://tracing`` or Perfetto, with one track per
+        thread.
+
+        Parameters
+        ----------
+        path: string or None (optional, default=None)
+            The file to write the trace to. If None it is returned instead.
+
+        Returns
+        -------
+        trace: string or None
+            The trace, as JSON, if ``path`` is None.
+        """
+        pid = os.getpid()
+        events = []
+        for record in self.records:
+            args = dict(record["tags"])
+            for field in ("cpu_time", "thread_cpu_time", "start_rss", "peak_rss"):
+                args[field] = record[field]
+            events.append(
+                {
+                    "name": record["name"],
+                    "ph": "X",
+                    "ts": record["start"] * 1e6,
+                    "dur": record["wall_time"] * 1e6,
+                    "pid": pid,
+                    "tid": record["thread"],
+                    "args": args,
+                }
+            )
+        result = json.dumps(
+            {"traceEvents": events, "displayTimeUnit": "ms"}, default=_to_json
+        )
+        if path is None:
+            return result
+        with open(path, "w") as trace_file:
+            trace_file.write(result)
+
+
+class _ActiveProfiler(object):
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    def __enter__(self):
+        global _active_profiler
+        self.previous = _active_profiler
+        _active_profiler = self.profiler
+        self.profiler._stop_sampling.clear()
+        self.sampler = threading.Thread(
+            target=self.profiler._sample_memory, daemon=True
+        )
+        self.sampler.start()
+        return self.profiler
+
+    def __exit__(self, *exc_info):
+        global _active_profiler
+        self.profiler._stop_sampling.set()
+        self.sampler.join()
+        _active_profiler = self.previous
+        return False
@@ -0,0 +1,197 @@
+import os
+import json
+import pickle
+import numpy as np
+from warnings import warn
+from scipy.sparse import issparse, csr_matrix
+
+_FORMAT_VERSION = 1
+
+# Fitted attributes that are never saved: caches that are rebuilt on demand, and
+# the profile of the last fit
+_UNSAVED_ATTRIBUTES = ("combination_cache_", "topic_scorer_", "profile_")
+
+
+def _write_atomic(path, filename, write):
+    final_path = os.path.join(path, filename)
+    temp_path = final_path + ".tmp-{}".format(os.getpid())
+    with open(temp_path, "wb") as temp_file:
+        write(temp_file)
+        temp_file.flush()
+        os.fsync(temp_file.fileno())
+    os.replace(temp_path, final_path)
+
+
+def _to_json(value):
+    """The JSON equivalent of a small fitted attribute, or None if it has none."""
+    if isinstance(value, (bool, int, float, str)) or value is None:
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        result = {}
+        for key, item in value.items():
+            item = _to_json(item)
+            if item is None and value[key] is not None:
+                return None
+            result[str(key)] = item
+        return result
+    return None
+
+
+def save_model(
+    model,
+    path,
+    include_training_data=True,
+    include_embedding=True,
+    include_all_topics=True,
+):
+    """Save a fitted model to a directory in a compact format that can be memory
+    mapped when it is loaded. Each array of the model is written as a raw ``.npy``
+    file (sparse matrices as their CSR arrays), so ``load_model`` can map them
+    rather than read them, and many processes loading the same model share one
+    page cached copy of it. The (small) model parameters are pickled, and the
+    remaining fitted attributes are kept as JSON. Caches, such as the topic
+    scorer and the intermediate results of combining ensemble topics, are not
+    saved; they are rebuilt when needed.
+
+    Files are written atomically, and the model description last, so a model
+    interrupted while saving is never loaded.
+
+    Parameters
+    ----------
+    model: PLSA or EnsembleTopics
+        The fitted model to save.
+
+    path: string
+        The directory to save the model in. It is created if it does not exist.
+
+    include_training_data: bool (optional, default=True)
+        Whether to save ``training_data_``. Without it the loaded model can
+        transform new documents, but can't score its topics, or be refit or
+        recombined.
+
+    include_embedding: bool (optional, default=True)
+        Whether to save ``embedding_``, the document vectors of the training data.
+
+    include_all_topics: bool (optional, default=True)
+        Whether to save ``all_topics_``, the topics of every member of an
+        ensemble, which is often the largest array of the model. Without it the
+        loaded model can transform new documents and report the provenance of
+        its stable topics, but can't be recombined or have members added.
+    """
+    if not hasattr(model, "components_"):
+        raise ValueError("The model must be fit before it can be saved")
+
+    excluded = set(_UNSAVED_ATTRIBUTES)
+    if not include_training_data:
+        excluded.add("training_data_")
+    if not include_embedding:
+        excluded.add("embedding_")
+    if not include_all_topics:
+        excluded.add("all_topics_")
+
+    os.makedirs(path, exist_ok=True)
+    arrays = {}
+    attributes = {}
+    for name, value in vars(model).items():
+        if not name.endswith("_") or name.startswith("_") or name in excluded:
+            continue
+        if issparse(value):
+            value = value.tocsr()
+            arrays[name] = {"format": "csr", "shape": list(value.shape)}
+            for part in ("data", "indices", "indptr"):
+                _write_atomic(
+                    path,
+                    "{}.{}.npy".format(name, part),
+                    lambda f: np.save(f, getattr(value, part)),
+                )
+        elif isinstance(value, np.ndarray):
+            arrays[name] = {"format": "dense"}
+            _write_atomic(
+                path,
+                "{}.npy".format(name),
+                lambda f: np.save(f, np.ascontiguousarray(value)),
+            )
+        elif _to_json(value) is not None or value is None:
+            attributes[name] = _to_json(value)
+        elif name != "topic_provenance_":
+            warn("Fitted attribute {} can't be saved and was skipped".format(name))
+
+    _write_atomic(path, "params.pkl", lambda f: pickle.dump(model.get_params(), f))
+    description = {
+        "format_version": _FORMAT_VERSION,
+        "class": type(model).__name__,
+        "arrays": arrays,
+        "attributes": attributes,
+    }
+    _write_atomic(
+        path,
+        "model.json",
+        lambda f: f.write(json.dumps(description, indent=2).encode("utf-8")),
+    )
+
+
+def load_model(cls, path, mmap=True):
+    """Load a model saved with ``save_model``.
+
+    Parameters
+    ----------
+    cls: class
+        The class of the saved model.
+
+    path: string
+        The directory the model was saved in.
+
+    mmap: bool (optional, default=True)
+        Whether to memory map the model's arrays (copy-on-write) rather than read
+        them into memory. Mapped arrays are only read from disk as they are used,
+        and are shared between all the processes that map them.
+
+    Returns
+    -------
+    model: cls
+        The loaded model.
+    """
+    model_path = os.path.join(path, "model.json")
+    if not os.path.exists(model_path):
+        raise ValueError("No saved model found at {}".format(path))
+    with open(model_path) as model_file:
+        description = json.load(model_file)
+    if description["format_version"] > _FORMAT_VERSION:
+        raise ValueError(
+            "The model at {} was saved in a newer format ({}) than this version of "
+            "enstop supports ({})".format(
+                path, description["format_version"], _FORMAT_VERSION
+            )
+        )
+    if description["class"] != cls.__name__:
+        raise ValueError(
+            "The model at {} is a {}, not a {}".format(
+                path, description["class"], cls.__name__
+            )
+        )
+
+    with open(os.path.join(path, "params.pkl"), "rb") as params_file:
+        model = cls(**pickle.load(params_file))
+
+    mmap_mode = "c" if mmap else None
+    for name, array in description["arrays"].items():
+        if array["format"] == "csr":
+            parts = [
+                np.load(
+                    os.path.join(path, "{}.{}.npy".format(name, part)),
+                    mmap_mode=mmap_mode,
+                )
+                for part in ("data", "indices", "indptr")
+            ]
+            value = csr_matrix(tuple(parts), shape=tuple(array["shape"]), copy=False)
+        else:
+            value = np.load(
+                os.path.join(path, "{}.npy".format(name)), mmap_mode=mmap_mode
+            )
+        setattr(model, name, value)
+    for name, value in description["attributes"].items():
+        setattr(model, name, value)
+
+    return model
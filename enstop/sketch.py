@@ -0,0 +1,256 @@
+import numpy as np
+import numba
+from scipy.sparse import csc_matrix
+from sklearn.utils import check_random_state
+
+_EMPTY = np.iinfo(np.uint64).max
+
+
+@numba.njit(nogil=True)
+def _document_hash(document, seed):
+    """A 64 bit hash of a document id (the splitmix64 finalizer)."""
+    x = np.uint64(document) ^ seed
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+@numba.njit(parallel=True, nogil=True)
+def _update_sketches(indptr, indices, first_document, seed, sketches):
+    """Fold the documents of a CSC chunk into each word's sketch: the sorted
+    ``sketch_size`` smallest hashes of the documents the word occurs in."""
+    sketch_size = sketches.shape[1]
+    for w in numba.prange(sketches.shape[0]):
+        sketch = sketches[w]
+        for i in range(indptr[w], indptr[w + 1]):
+            document_hash = _document_hash(first_document + indices[i], seed)
+            if document_hash >= sketch[sketch_size - 1]:
+                continue
+            position = np.searchsorted(sketch, document_hash)
+            sketch[position + 1 :] = sketch[position:-1].copy()
+            sketch[position] = document_hash
+
+
+@numba.njit(nogil=True)
+def _sketch_threshold(sketch, n_docs):
+    """The largest hash below which the sketch holds every document hash of the
+    word: everything, if the word occurs in no more documents than the sketch
+    holds."""
+    if n_docs <= sketch.shape[0]:
+        return _EMPTY
+    return sketch[sketch.shape[0] - 1]
+
+
+@numba.njit(nogil=True)
+def _estimate_intersection(sketch_a, sketch_b, n_docs_a, n_docs_b):
+    """Estimate the number of documents two words share. The documents whose
+    hashes lie below both sketches' thresholds are a uniform random sample of
+    each word's documents that is known exactly for both words, so the fraction
+    of the first word's sampled documents that the second word shares estimates
+    the fraction of all its documents that it shares. The estimate is exact when
+    both words fit in their sketches."""
+    threshold = min(
+        _sketch_threshold(sketch_a, n_docs_a), _sketch_threshold(sketch_b, n_docs_b)
+    )
+    n_sample_a = 0
+    n_shared = 0
+    i = 0
+    j = 0
+    size_a = min(n_docs_a, sketch_a.shape[0])
+    size_b = min(n_docs_b, sketch_b.shape[0])
+    while i < size_a and sketch_a[i] <= threshold:
+        while j < size_b and sketch_b[j] < sketch_a[i]:
+            j += 1
+        if j < size_b and sketch_b[j] == sketch_a[i]:
+            n_shared += 1
+        n_sample_a += 1
+        i += 1
+    if n_sample_a == 0:
+        return 0.0
+    return n_shared * n_docs_a / n_sample_a
+
+
+@numba.njit(parallel=True, nogil=True)
+def _estimate_co_occurrences(top_words, words, sketches, n_docs_per_word):
+    """Estimate the number of documents each pair of each topic's top words occur
+    in together."""
+    n_topics, n = top_words.shape
+    result = np.zeros((n_topics, n, n), dtype=np.float64)
+    for z in numba.prange(n_topics):
+        for i in range(n - 1):
+            w = words[top_words[z, i]]
+            for j in range(i + 1, n):
+                v = words[top_words[z, j]]
+                result[z, i, j] = _estimate_intersection(
+                    sketches[w], sketches[v], n_docs_per_word[w], n_docs_per_word[v]
+                )
+    return result
+
+
+class WordDocumentSketch(object):
+    """A compact, fixed size summary of the documents each word of a corpus occurs
+    in, from which document co-occurrence counts (and so topic coherence) can be
+    estimated without holding the corpus in memory. For each word the sketch keeps
+    the ``sketch_size`` smallest hashes of the documents it occurs in (a bottom-k
+    sketch), along with exact counts of its documents and occurrences. It is built
+    in one streaming pass over chunks of the corpus with ``update``, and can be
+    saved and reloaded to score many models.
+
+    The number of documents two words share is estimated from a uniform sample of
+    their documents (those with hashes below both sketches' thresholds), so its
+    relative standard error is roughly ``1 / sqrt(s)``, where ``s`` is the number
+    of shared documents in the sample; for words occurring in at most
+    ``sketch_size`` documents, the sample is every document and the count is
+    exact. Coherence is dominated by the rarer words' counts, which are the most
+    accurate.
+
+    A sketch can be passed in place of the corpus to ``TopicScorer``,
+    ``coherence``, ``log_lift`` and the other scoring functions.
+
+    Parameters
+    ----------
+    n_words: int
+        The size of the vocabulary.
+
+    sketch_size: int (optional, default=512)
+        The number of document hashes kept per word. Memory use is
+        ``8 * sketch_size`` bytes per word.
+
+    random_state: int, RandomState instance or None (optional, default=None)
+        The random state used to choose the document hash function.
+
+    Attributes
+    ----------
+    n_docs: int
+        The number of documents sketched so far.
+
+    n_docs_per_word: array of shape (n_words,)
+        The number of documents each word occurs in.
+
+    word_totals: array of shape (n_words,)
+        The total count of each word over the documents.
+    """
+
+    def __init__(self, n_words, sketch_size=512, random_state=None):
+        random_state = check_random_state(random_state)
+        self.seed = np.uint64(random_state.randint(np.iinfo(np.int64).max))
+        self.sketches = np.full((n_words, sketch_size), _EMPTY, dtype=np.uint64)
+        self.n_docs = 0
+        self.n_docs_per_word = np.zeros(n_words, dtype=np.int64)
+        self.word_totals = np.zeros(n_words, dtype=np.float64)
+
+    @property
+    def n_words(self):
+        return self.sketches.shape[0]
+
+    def update(self, data):
+        """Add a chunk of documents to the sketch. Documents are numbered in the
+        order they are added, so each should be added once.
+
+        Parameters
+        ----------
+        data: array or sparse matrix of shape (n_chunk_docs, n_words)
+            The word counts of the documents.
+
+        Returns
+        -------
+        self
+        """
+        words, sketches, n_docs_per_word, word_totals = self._updated_rows(data)
+        self.sketches[words] = sketches
+        self.n_docs += data.shape[0]
+        self.n_docs_per_word[words] = n_docs_per_word
+        self.word_totals[words] = word_totals
+        return self
+
+    def co_occurrence_counts(self, top_words):
+        """Estimate the number of documents each pair of each topic's top words
+        occur in together; the sketch equivalent of counting them in the corpus.
+
+        Parameters
+        ----------
+        top_words: array of shape (n_topics, n)
+            The top words of each topic.
+
+        Returns
+        -------
+        table_top_words: array of shape (n_topics, n)
+            The top words of each topic as indices into the union of top words.
+
+        co_occurrences: array of shape (n_topics, n, n)
+            The estimated number of documents the ``i``th and ``j``th top words of
+            each topic occur in together, for ``i < j``.
+
+        n_docs_per_word: array of shape (n_union_words,)
+            The number of documents each of the union of top words occurs in.
+        """
+        words, table_top_words = np.unique(top_words, return_inverse=True)
+        table_top_words = table_top_words.reshape(top_words.shape)
+        co_occurrences = _estimate_co_occurrences(
+            table_top_words, words, self.sketches, self.n_docs_per_word
+        )
+        return table_top_words, co_occurrences, self.n_docs_per_word[words]
+
+    def _updated_rows(self, data):
+        """The words a chunk of documents occur in, and their sketches, document
+        counts and occurrence totals once the chunk is added, without changing
+        the sketch itself."""
+        data = csc_matrix(data, copy=True)
+        if data.shape[1] != self.n_words:
+            raise ValueError(
+                "Data has {} words but the sketch has {}".format(
+                    data.shape[1], self.n_words
+                )
+            )
+        data.data[data.data < 0] = 0
+        data.eliminate_zeros()
+
+        words = np.flatnonzero(np.diff(data.indptr))
+        data = data[:, words]
+        data.sort_indices()
+
+        sketches = self.sketches[words]
+        _update_sketches(data.indptr, data.indices, self.n_docs, self.seed, sketches)
+        n_docs_per_word = self.n_docs_per_word[words] + np.diff(data.indptr)
+        word_totals = self.word_totals[words] + np.asarray(data.sum(axis=0)).ravel()
+        return words, sketches, n_docs_per_word, word_totals
+
+    def save(self, path):
+        """Save the sketch to a file.
+
+        Parameters
+        ----------
+        path: string or file
+            The file to save the sketch to.
+        """
+        np.savez(
+            path,
+            seed=self.seed,
+            sketches=self.sketches,
+            n_docs=np.int64(self.n_docs),
+            n_docs_per_word=self.n_docs_per_word,
+            word_totals=self.word_totals,
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Load a sketch saved with ``save``.
+
+        Parameters
+        ----------
+        path: string or file
+            The file the sketch was saved to.
+
+        Returns
+        -------
+        sketch: WordDocumentSketch
+            The loaded sketch, which can be updated further.
+        """
+        with np.load(path) as saved:
+            result = cls.__new__(cls)
+            result.seed = np.uint64(saved["seed"])
+            result.sketches = saved["sketches"]
+            result.n_docs = int(saved["n_docs"])
+            result.n_docs_per_word = saved["n_docs_per_word"]
+            result.word_totals = saved["word_totals"]
+        return result
@@ -0,0 +1,79 @@
+import numpy as np
+import hdbscan
+from sklearn.metrics import pairwise_distances
+
+from enstop.clustering import (
+    core_distances,
+    leaf_clusters,
+    mutual_reachability_mst,
+    mutual_reachability_single_linkage_tree,
+)
+
+
+def _toy_data():
+    # Three tight blobs of different sizes and a few scattered outliers
+    rng = np.random.RandomState(0)
+    centers = np.array([[0.0, 0.0], [10.0, 0.0], [0.0, 10.0]])
+    blobs = [
+        center + rng.normal(scale=0.5, size=(size, 2))
+        for center, size in zip(centers, (8, 9, 10))
+    ]
+    data = np.vstack(blobs + [rng.uniform(-20, 30, size=(4, 2))])
+    weights = rng.randint(1, 4, size=data.shape[0])
+    return data, weights
+
+
+def _hdbscan(distance_matrix, min_samples, min_cluster_size):
+    return hdbscan.HDBSCAN(
+        metric="precomputed",
+        min_samples=min_samples,
+        min_cluster_size=min_cluster_size,
+        cluster_selection_method="leaf",
+    ).fit(distance_matrix)
+
+
+def test_mst_matches_hdbscan():
+    data, _ = _toy_data()
+    distance_matrix = pairwise_distances(data)
+    reference = _hdbscan(distance_matrix, 3, 5).single_linkage_tree_.to_numpy()
+    mst = mutual_reachability_mst(distance_matrix, core_distances(distance_matrix, 3))
+    np.testing.assert_allclose(np.sort(mst[:, 2]), np.sort(reference[:, 2]))
+
+
+def test_leaf_clusters_of_hdbscan_tree_match_hdbscan():
+    data, _ = _toy_data()
+    distance_matrix = pairwise_distances(data)
+    reference = _hdbscan(distance_matrix, 3, 5)
+    labels, _ = leaf_clusters(reference.single_linkage_tree_.to_numpy(), 5)
+    np.testing.assert_array_equal(labels, reference.labels_)
+
+
+def test_labels_match_hdbscan():
+    data, _ = _toy_data()
+    distance_matrix = pairwise_distances(data)
+    for min_samples, min_cluster_size in [(1, 4), (2, 4), (3, 5)]:
+        reference = _hdbscan(distance_matrix, min_samples, min_cluster_size)
+        labels, _ = leaf_clusters(
+            mutual_reachability_single_linkage_tree(distance_matrix, min_samples),
+            min_cluster_size,
+        )
+        assert labels.max() >= 2
+        np.testing.assert_array_equal(labels, reference.labels_)
+
+
+def test_weighted_labels_match_expanded_hdbscan():
+    data, weights = _toy_data()
+    expanded_data = np.repeat(data, weights, axis=0)
+    for min_samples, min_cluster_size in [(2, 8), (3, 10)]:
+        reference = _hdbscan(
+            pairwise_distances(expanded_data), min_samples, min_cluster_size
+        )
+        labels, _ = leaf_clusters(
+            mutual_reachability_single_linkage_tree(
+                pairwise_distances(data), min_samples, point_sizes=weights
+            ),
+            min_cluster_size,
+            point_sizes=weights,
+        )
+        assert labels.max() >= 2
+        np.testing.assert_array_equal(np.repeat(labels, weights), reference.labels_)
@@ -0,0 +1,169 @@
+import time
+import numpy as np
+import scipy.sparse
+import pytest
+
+from enstop import EnsembleTopics
+from enstop.enstop_ import (
+    adaptive_ensemble_of_topics,
+    all_pairs_kl_divergence,
+    ensemble_of_topics,
+    generate_combined_topics_hellinger_umap,
+    kl_divergence,
+    pairwise_kl_divergence,
+)
+
+
+def _corpus():
+    # Documents drawn from four topics on disjoint blocks of the vocabulary, so
+    # the ensemble finds stable topics
+    rng = np.random.RandomState(0)
+    topics = np.zeros((4, 120))
+    for z in range(4):
+        topics[z, 30 * z : 30 * (z + 1)] = rng.dirichlet(np.ones(30))
+    doc_topics = rng.dirichlet(np.full(4, 0.1), size=400)
+    data = np.vstack([rng.multinomial(60, p) for p in doc_topics @ topics])
+    return scipy.sparse.csr_matrix(data, dtype=np.float32)
+
+
+def _ensemble(**kwargs):
+    params = dict(
+        n_components=4,
+        n_starts=4,
+        min_samples=2,
+        min_cluster_size=2,
+        parallelism="none",
+        topic_combination="hellinger",
+        n_iter=10,
+        random_state=42,
+    )
+    params.update(kwargs)
+    return EnsembleTopics(**params)
+
+
+def _topics():
+    rng = np.random.RandomState(0)
+    topics = rng.dirichlet(np.full(2000, 0.05), size=10).astype(np.float32)
+    # Near duplicates, whose divergences cancel to (almost) nothing
+    return np.vstack([topics, topics + 1e-9])
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_kl_divergences_are_non_negative(sparse):
+    topics = _topics()
+    if sparse:
+        topics = scipy.sparse.csr_matrix(topics)
+    divergences = pairwise_kl_divergence(topics, topics)
+    assert divergences.dtype == np.float64
+    assert divergences.min() >= 0.0
+    all_pairs = all_pairs_kl_divergence(topics)
+    assert all_pairs.min() >= 0.0
+    np.testing.assert_array_equal(np.diag(all_pairs), 0.0)
+
+
+def test_kl_divergences_match_kl_divergence():
+    topics = _topics()[:10].astype(np.float64)
+    expected = [[kl_divergence(a, b) for b in topics] for a in topics]
+    np.testing.assert_allclose(
+        pairwise_kl_divergence(topics, topics), expected, rtol=1e-4, atol=1e-4
+    )
+
+
+def test_loaded_provenance_uses_member_runs(tmp_path):
+    data = _corpus()
+    model = _ensemble().fit(data)
+    # The members of runs 0, 2, 5 and 6, as if the others were skipped at the
+    # deadline
+    runs = np.array([0, 2, 5, 6])
+    topics = ensemble_of_topics(
+        data.tocoo(), 4, n_runs=7, parallelism="none", n_iter=10, random_state=42
+    )
+    model.all_topics_ = topics.reshape(7, 4, -1)[runs].reshape(16, -1)
+    model.member_runs_ = runs
+    model.n_starts_ = runs.shape[0]
+    model.combination_cache_ = {}
+    model.recombine()
+    assert set(np.concatenate(model.topic_provenance_)[:, 0]) <= set(runs)
+
+    model.save(str(tmp_path))
+    loaded = EnsembleTopics.load(str(tmp_path))
+    np.testing.assert_array_equal(loaded.member_runs_, runs)
+    assert len(loaded.topic_provenance_) == len(model.topic_provenance_)
+    for loaded_provenance, provenance in zip(
+        loaded.topic_provenance_, model.topic_provenance_
+    ):
+        np.testing.assert_array_equal(loaded_provenance, provenance)
+
+
+def test_adaptive_ensemble_stops_when_time_runs_out_between_waves():
+    data = _corpus().tocoo()
+    kwargs = dict(
+        parallelism="none",
+        topic_combination="hellinger",
+        min_samples=2,
+        min_cluster_size=2,
+        wave_size=2,
+        n_iter=5,
+        random_state=0,
+    )
+    # Compile the kernels, so the first wave fits within the budget
+    next(adaptive_ensemble_of_topics(data, 4, max_starts=2, **kwargs))
+
+    budget = 2.0
+    waves = []
+    for all_topics, stable_topics, converged in adaptive_ensemble_of_topics(
+        data, 4, max_starts=20, max_time=budget, **kwargs
+    ):
+        waves.append(all_topics.shape[0])
+        # The budget runs out while the caller handles the wave
+        time.sleep(budget)
+    assert waves == [8]
+
+
+def test_umap_combination_cache_is_keyed_on_seed_and_projection():
+    rng = np.random.RandomState(0)
+    all_topics = rng.dirichlet(np.full(200, 0.05), size=40)
+    cache = {}
+    kwargs = dict(min_samples=2, min_cluster_size=2, n_neighbors=5, cache=cache)
+    for random_state, projection_dim in [(1, None), (2, None), (2, 50), (1, None)]:
+        generate_combined_topics_hellinger_umap(
+            all_topics,
+            projection_dim=projection_dim,
+            random_state=random_state,
+            **kwargs
+        )
+    embeddings = [key for key in cache if key[0] == "embedding"]
+    trees = [key for key in cache if key[0] == "single_linkage_tree"]
+    assert len(embeddings) == 3
+    assert len(trees) == 3
+
+    generate_combined_topics_hellinger_umap(
+        all_topics, random_state=1, **dict(kwargs, min_samples=3)
+    )
+    assert len([key for key in cache if key[0] == "embedding"]) == 3
+    assert len([key for key in cache if key[0] == "single_linkage_tree"]) == 4
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_load_round_trip(tmp_path, mmap):
+    data = _corpus()
+    model = _ensemble().fit(data)
+    model.save(str(tmp_path))
+    loaded = EnsembleTopics.load(str(tmp_path), mmap=mmap)
+
+    np.testing.assert_array_equal(loaded.components_, model.components_)
+    np.testing.assert_allclose(
+        loaded.transform(data[:50]), model.transform(data[:50]), rtol=1e-5
+    )
+    assert len(loaded.topic_provenance_) == len(model.topic_provenance_)
+    for loaded_provenance, provenance in zip(
+        loaded.topic_provenance_, model.topic_provenance_
+    ):
+        np.testing.assert_array_equal(loaded_provenance, provenance)
+
+    # A loaded model can be extended like the one that was saved
+    n_topics = loaded.all_topics_.shape[0]
+    loaded.add_members(2)
+    assert loaded.all_topics_.shape[0] == n_topics + 2 * loaded.n_components
+    np.testing.assert_array_equal(loaded.member_runs_, np.arange(loaded.n_starts_))
+    assert loaded.components_.shape[1] == data.shape[1]
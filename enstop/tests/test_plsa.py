@@ -0,0 +1,67 @@
+import numpy as np
+import scipy.sparse
+import pytest
+
+from enstop import PLSA
+from enstop.enstop_ import plsa_batch_topics, plsa_topics
+from enstop.plsa import plsa_fit, plsa_fit_batch
+
+
+def _corpus():
+    rng = np.random.RandomState(0)
+    data = scipy.sparse.random(200, 80, density=0.1, format="csr", random_state=rng)
+    data.data = rng.randint(1, 5, size=data.nnz).astype(np.float32)
+    return data
+
+
+def test_batched_fit_matches_fitting_each_model():
+    data = _corpus()
+    rng = np.random.RandomState(1)
+    seeds = [3, 17, 42]
+    sample_weights = rng.poisson(1.0, size=(len(seeds), data.shape[0]))
+    sample_weights = sample_weights.astype(np.float32)
+    # No early stopping, so every model runs the same number of iterations
+    kwargs = dict(n_iter=30, n_iter_per_test=10, tolerance=-1.0)
+
+    doc_topics, topics = plsa_fit_batch(
+        data,
+        5,
+        len(seeds),
+        random_state=seeds,
+        sample_weights=sample_weights,
+        **kwargs
+    )
+    for r, seed in enumerate(seeds):
+        expected_doc_topics, expected_topics = plsa_fit(
+            data, 5, random_state=seed, sample_weight=sample_weights[r], **kwargs
+        )
+        np.testing.assert_allclose(topics[r], expected_topics, rtol=1e-3, atol=1e-5)
+        np.testing.assert_allclose(
+            doc_topics[r], expected_doc_topics, rtol=1e-3, atol=1e-5
+        )
+
+
+def test_batch_topics_match_topics_of_each_member():
+    data = _corpus()
+    seeds = [3, 17, 42]
+    kwargs = dict(n_iter=30, n_iter_per_test=10, tolerance=-1.0)
+
+    topics = plsa_batch_topics(data, 5, seeds, **kwargs)
+    expected = np.vstack(
+        [plsa_topics(data, 5, random_state=seed, **kwargs) for seed in seeds]
+    )
+    np.testing.assert_allclose(topics, expected, rtol=1e-3, atol=1e-5)
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_load_round_trip(tmp_path, mmap):
+    data = _corpus()
+    model = PLSA(n_components=5, n_iter=30, random_state=0).fit(data)
+    model.save(str(tmp_path))
+    loaded = PLSA.load(str(tmp_path), mmap=mmap)
+
+    np.testing.assert_array_equal(loaded.components_, model.components_)
+    np.testing.assert_array_equal(loaded.embedding_, model.embedding_)
+    np.testing.assert_allclose(
+        loaded.transform(data[:50]), model.transform(data[:50]), rtol=1e-5
+    )
@@ -0,0 +1,230 @@
+import numpy as np
+import scipy.sparse
+import pytest
+
+from enstop import utils
+from enstop.co_occurrence import CoOccurrenceIndex
+from enstop.sketch import WordDocumentSketch
+from enstop.utils import TopicScorer, coherence, log_lift, topic_scores
+
+
+def _corpus_and_topics():
+    rng = np.random.RandomState(0)
+    data = scipy.sparse.random(300, 40, density=0.15, random_state=rng, format="csr")
+    data.data = np.ceil(10 * data.data)
+    # A word that never occurs, to cover words without documents
+    data[:, 7] = 0
+    data.eliminate_zeros()
+    topics = rng.dirichlet(np.ones(40), size=6)
+    return data, topics
+
+
+def _reference_coherence(topic, data, n):
+    # Direct set intersections over the top words, as enstop's original
+    # coherence computed it
+    word_docs = [set(np.flatnonzero(column)) for column in data.toarray().T]
+    top_words = np.argsort(topic)[-n:]
+    result = 0.0
+    for i in range(len(top_words) - 1):
+        n_docs_w = len(word_docs[top_words[i]])
+        if n_docs_w == 0:
+            continue
+        for j in range(i + 1, len(top_words)):
+            n_co_occur = len(word_docs[top_words[i]] & word_docs[top_words[j]])
+            result += np.log((n_co_occur + 1.0) / n_docs_w)
+    return result
+
+
+def _reference_log_lift(topic, data, n):
+    topic = topic / topic.sum()
+    empirical_probs = np.asarray(data.sum(axis=0)).ravel().astype(np.float64)
+    empirical_probs /= empirical_probs.sum()
+    if n <= 0:
+        words = np.arange(topic.shape[0])
+    else:
+        words = np.argsort(topic)[-n:]
+    words = words[empirical_probs[words] > 0]
+    n = topic.shape[0] if n <= 0 else min(n, topic.shape[0])
+    return np.log(np.sum(topic[words] / empirical_probs[words]) / n)
+
+
+@pytest.mark.parametrize("n_words", [2, 10, 40, 100])
+def test_coherence_matches_reference(n_words):
+    data, topics = _corpus_and_topics()
+    expected = [
+        _reference_coherence(topics[z], data, n_words) for z in range(len(topics))
+    ]
+    scorer = TopicScorer(data)
+    np.testing.assert_allclose(scorer.topic_coherences(topics, n_words), expected)
+    for z in range(len(topics)):
+        np.testing.assert_allclose(coherence(topics, z, data, n_words), expected[z])
+
+
+def test_coherence_over_several_bitset_blocks(monkeypatch):
+    data, topics = _corpus_and_topics()
+    expected = [_reference_coherence(topics[z], data, 15) for z in range(len(topics))]
+    monkeypatch.setattr(utils, "_BITSET_BLOCK_DOCS", 64)
+    np.testing.assert_allclose(TopicScorer(data).topic_coherences(topics, 15), expected)
+
+
+@pytest.mark.parametrize("n_words", [-1, 5, 40, 100])
+def test_log_lift_matches_reference(n_words):
+    data, topics = _corpus_and_topics()
+    expected = [
+        _reference_log_lift(topics[z], data, n_words) for z in range(len(topics))
+    ]
+    np.testing.assert_allclose(
+        TopicScorer(data).topic_log_lifts(topics, n_words), expected
+    )
+    for z in range(len(topics)):
+        np.testing.assert_allclose(log_lift(topics, z, data, n_words), expected[z])
+
+
+def test_topic_scores_match_single_metrics():
+    data, topics = _corpus_and_topics()
+    scores = topic_scores(topics, data, n_words=100)
+    scorer = TopicScorer(data)
+    np.testing.assert_allclose(
+        scores["coherence"], scorer.topic_coherences(topics, 100)
+    )
+    np.testing.assert_allclose(scores["log_lift"], scorer.topic_log_lifts(topics, 100))
+
+
+def test_single_topic_queries_score_all_topics_once(monkeypatch):
+    data, topics = _corpus_and_topics()
+    scorer = TopicScorer(data)
+    calls = []
+    compute_scores = scorer._compute_scores
+
+    def counted_compute_scores(topics, metrics, n_words):
+        calls.append((topics.shape[0], tuple(metrics)))
+        return compute_scores(topics, metrics, n_words)
+
+    monkeypatch.setattr(scorer, "_compute_scores", counted_compute_scores)
+    expected = [_reference_coherence(topics[z], data, 10) for z in range(len(topics))]
+    for z in range(len(topics)):
+        np.testing.assert_allclose(scorer.coherence(topics, z, 10), expected[z])
+        scorer.log_lift(topics, z, 5)
+    assert calls == [(len(topics), ("coherence",)), (len(topics), ("log_lift",))]
+
+
+def _batches(data, n_batches=3):
+    bounds = np.linspace(0, data.shape[0], n_batches + 1).astype(int)
+    return [data[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def _assert_scores_match_corpus(summary, data, topics):
+    expected = TopicScorer(data)
+    scorer = TopicScorer(summary)
+    np.testing.assert_allclose(
+        scorer.topic_coherences(topics, 10), expected.topic_coherences(topics, 10)
+    )
+    np.testing.assert_allclose(
+        scorer.topic_log_lifts(topics, 10), expected.topic_log_lifts(topics, 10)
+    )
+
+
+@pytest.mark.parametrize(
+    "index_kwargs",
+    [
+        # Every pair counted exactly
+        dict(n_indexed_words=40, sketch_size=8),
+        # Most pairs estimated from sketches that hold every document
+        dict(n_indexed_words=5, sketch_size=512),
+    ],
+)
+def test_index_built_in_batches_scores_exactly(tmp_path, index_kwargs):
+    data, topics = _corpus_and_topics()
+    index = CoOccurrenceIndex(str(tmp_path), random_state=0, **index_kwargs)
+    for batch_id, batch in enumerate(_batches(data)):
+        index.add_batch(batch_id, batch)
+    assert index.n_docs == data.shape[0]
+    assert len(index) == 3
+    _assert_scores_match_corpus(index, data, topics)
+
+    # And once reopened
+    _assert_scores_match_corpus(CoOccurrenceIndex(str(tmp_path)), data, topics)
+
+
+def test_index_rejects_duplicate_batch(tmp_path):
+    data, topics = _corpus_and_topics()
+    first, second, third = _batches(data)
+    index = CoOccurrenceIndex(str(tmp_path), n_indexed_words=40, random_state=0)
+    index.add_batch("first", first)
+    index.add_batch("second", second)
+    with pytest.raises(ValueError, match="already been added"):
+        index.add_batch("second", third)
+    assert index.batches == ["first", "second"]
+    assert index.n_docs == first.shape[0] + second.shape[0]
+    index.add_batch("third", third)
+    _assert_scores_match_corpus(index, data, topics)
+
+
+def test_index_replays_leftover_journal_once(tmp_path, monkeypatch):
+    data, topics = _corpus_and_topics()
+    first, second, third = _batches(data)
+    path = str(tmp_path)
+    journal_path = tmp_path / "journal.npz"
+    index = CoOccurrenceIndex(path, n_indexed_words=10, random_state=0)
+    index.add_batch("first", first)
+
+    # Interrupted after journalling the batch but before applying it
+    with monkeypatch.context() as patch:
+        patch.setattr(CoOccurrenceIndex, "_apply", lambda self, journal: None)
+        index.add_batch("second", second)
+    assert journal_path.exists()
+    index = CoOccurrenceIndex(path)
+    assert not journal_path.exists()
+    assert index.batches == ["first", "second"]
+
+    # Interrupted after applying the batch but before removing the journal
+    apply = CoOccurrenceIndex._apply
+    journal_copy = tmp_path / "journal-copy.npz"
+
+    def apply_and_keep_journal(self, journal):
+        journal_copy.write_bytes(journal_path.read_bytes())
+        apply(self, journal)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(CoOccurrenceIndex, "_apply", apply_and_keep_journal)
+        index.add_batch("third", third)
+    journal_copy.rename(journal_path)
+    index = CoOccurrenceIndex(path)
+    assert not journal_path.exists()
+    assert index.batches == ["first", "second", "third"]
+    assert index.n_docs == data.shape[0]
+    _assert_scores_match_corpus(index, data, topics)
+
+
+def test_sketch_is_exact_when_words_fit():
+    data, topics = _corpus_and_topics()
+    sketch = WordDocumentSketch(
+        data.shape[1], sketch_size=data.shape[0], random_state=0
+    )
+    for batch in _batches(data):
+        sketch.update(batch)
+    np.testing.assert_array_equal(sketch.n_docs_per_word, (data > 0).sum(axis=0).A1)
+    _assert_scores_match_corpus(sketch, data, topics)
+
+
+def test_sketch_save_load_round_trip(tmp_path):
+    data, topics = _corpus_and_topics()
+    first, second, third = _batches(data)
+    sketch = WordDocumentSketch(data.shape[1], sketch_size=16, random_state=0)
+    sketch.update(first).update(second)
+    path = str(tmp_path / "sketch.npz")
+    sketch.save(path)
+    loaded = WordDocumentSketch.load(path)
+    assert loaded.seed == sketch.seed
+    assert loaded.n_docs == sketch.n_docs
+    for name in ("sketches", "n_docs_per_word", "word_totals"):
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(sketch, name))
+
+    # The loaded sketch carries on as the original would
+    sketch.update(third)
+    loaded.update(third)
+    np.testing.assert_array_equal(loaded.sketches, sketch.sketches)
+    np.testing.assert_allclose(
+        TopicScorer(loaded).topic_coherences(topics, 10),
+        TopicScorer(sketch).topic_coherences(topics, 10),
+    )
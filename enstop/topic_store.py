@@ -0,0 +1,182 @@
+import os
+import re
+import json
+import numpy as np
+from scipy.sparse import issparse, csr_matrix, vstack
+
+_MEMBER_FILE = re.compile(r"^member_(\d+)\.npz$")
+
+
+class TopicStore(object):
+    """An on-disk store of the topics generated by each member of an ensemble,
+    along with the random seed used to generate them. Each member is written to its
+    own file as soon as it is complete, so an interrupted ensemble can be resumed
+    without rerunning the members that already finished, and an existing ensemble
+    can be extended with further members later.
+
+    Members are written atomically (to a temporary file that is then renamed), so a
+    crash while saving never leaves a partial member in the store.
+
+    Parameters
+    ----------
+    path: string
+        The directory to keep the store in. It is created if it does not exist.
+
+    Attributes
+    ----------
+    metadata: dict or None
+        A description of the ensemble the store holds topics for (the number of
+        topics per member, the model, the shape of the corpus, and the topic mass
+        sparse topics are truncated to), used to guard against mixing members from
+        incompatible ensembles. None for an empty store.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        metadata_path = os.path.join(path, "metadata.json")
+        if os.path.exists(metadata_path):
+            with open(metadata_path) as metadata_file:
+                self.metadata = json.load(metadata_file)
+        else:
+            self.metadata = None
+
+    def check_compatible(self, X, k, model, topic_mass=None):
+        """Verify that the store holds members of an ensemble with ``k`` topics per
+        member fit with ``model`` to a corpus like ``X``, recording that description
+        if the store is new.
+
+        Parameters
+        ----------
+        X: sparse matrix of shape (n_docs, n_words)
+            The corpus the ensemble is fit to.
+
+        k: int
+            The number of topics per member.
+
+        model: string
+            The topic modeling method used by the ensemble.
+
+        topic_mass: float or None (optional, default=None)
+            The fraction of probability mass member topics are truncated to, or
+            None if members are stored as dense topics.
+        """
+        metadata = {
+            "n_topics": int(k),
+            "model": model,
+            "n_docs": int(X.shape[0]),
+            "n_words": int(X.shape[1]),
+            "nnz": int(X.nnz),
+            "topic_mass": topic_mass,
+        }
+        if self.metadata is None:
+            self._write_atomic(
+                "metadata.json",
+                lambda f: f.write(json.dumps(metadata, indent=2).encode("utf-8")),
+            )
+            self.metadata = metadata
+        elif self.metadata != metadata:
+            raise ValueError(
+                "Topic store at {} holds an incompatible ensemble: {} but {} was "
+                "requested".format(self.path, self.metadata, metadata)
+            )
+
+    def _member_filename(self, index):
+        return "member_{:06d}.npz".format(index)
+
+    def _write_atomic(self, filename, write):
+        final_path = os.path.join(self.path, filename)
+        temp_path = final_path + ".tmp-{}".format(os.getpid())
+        with open(temp_path, "wb") as temp_file:
+            write(temp_file)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, final_path)
+
+    def members(self):
+        """The indices of the members held in the store, in increasing order."""
+        indices = []
+        for filename in os.listdir(self.path):
+            match = _MEMBER_FILE.match(filename)
+            if match is not None:
+                indices.append(int(match.group(1)))
+        return sorted(indices)
+
+    def __contains__(self, index):
+        return os.path.exists(os.path.join(self.path, self._member_filename(index)))
+
+    def __len__(self):
+        return len(self.members())
+
+    def save_member(self, index, seed, topics):
+        """Save the topics for an ensemble member.
+
+        Parameters
+        ----------
+        index: int
+            The index of the member in the ensemble.
+
+        seed: int
+            The random seed used to generate the member.
+
+        topics: array or sparse matrix of shape (n_topics, n_words)
+            The topics generated by the member.
+        """
+        if issparse(topics):
+            topics = topics.tocsr()
+            arrays = {
+                "data": topics.data,
+                "indices": topics.indices,
+                "indptr": topics.indptr,
+                "shape": np.array(topics.shape),
+            }
+        else:
+            arrays = {"topics": topics}
+        self._write_atomic(
+            self._member_filename(index),
+            lambda f: np.savez(f, seed=np.int64(seed), **arrays),
+        )
+
+    def load_member(self, index):
+        """Load an ensemble member.
+
+        Parameters
+        ----------
+        index: int
+            The index of the member in the ensemble.
+
+        Returns
+        -------
+        seed, topics: int and array or sparse matrix of shape (n_topics, n_words)
+            The random seed used to generate the member, and its topics (as a CSR
+            matrix if they were saved sparse).
+        """
+        with np.load(os.path.join(self.path, self._member_filename(index))) as member:
+            if "indptr" in member.files:
+                topics = csr_matrix(
+                    (member["data"], member["indices"], member["indptr"]),
+                    shape=tuple(member["shape"]),
+                )
+            else:
+                topics = member["topics"]
+            return int(member["seed"]), topics
+
+    def load_topics(self, indices=None):
+        """Load and stack the topics of several ensemble members.
+
+        Parameters
+        ----------
+        indices: list of int or None (optional, default=None)
+            The members to load. If None all members in the store are loaded.
+
+        Returns
+        -------
+        topics: array or sparse matrix of shape (len(indices) * n_topics, n_words)
+            The topics of the members, stacked in the order of ``indices``.
+        """
+        if indices is None:
+            indices = self.members()
+        topics = [self.load_member(index)[1] for index in indices]
+        if any(issparse(member_topics) for member_topics in topics):
+            return vstack(topics, format="csr")
+        return np.vstack(topics)
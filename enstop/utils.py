@@ -2,6 +2,12 @@ import numpy as np
 import numba
 from scipy.sparse import issparse, csc_matrix
 
+from enstop.sketch import WordDocumentSketch
+from enstop.co_occurrence import CoOccurrenceIndex
+
+# Summaries of a corpus that topics can be scored against in place of the corpus
+_CORPUS_SUMMARIES = (WordDocumentSketch, CoOccurrenceIndex)
+
 
 @numba.njit(fastmath=True, nogil=True)
 def normalize(ndarray, axis=0):
@@ -39,47 +45,6 @@ def normalize(ndarray, axis=0):
                     raise ValueError("axis must be 0 or 1")
 
 
-@numba.njit()
-def _log_lift(topics, z, empirical_probs, n=-1):
-    """Internal method to compute the log lift given precomputed empirical probabilities. This
-    routine is designed to be numba compilable for performance.
-
-    Parameters
-    ----------
-    topics: array of shape (n_topics, n_words)
-        The topic vectors to evaluate.
-
-    z: int
-        Which topic vector to evaluate. Must be
-        in range(0, n_topics).
-
-    empirical_probs: array of shape (n_words,)
-        The empirical probability of word occurrence.
-
-    n: int (optional, default=-1)
-        The number of words to average over. If less than 0 it will evaluate over the entire
-        vocabulary, otherwise it will select the top ``n`` words of the chosen topic.
-
-    Returns
-    -------
-    log_lift: float
-        The log lift of the ``z``th topic vector.
-    """
-    total_lift = 0.0
-    if n <= 0:
-        for w in range(topics.shape[1]):
-            if empirical_probs[w] > 0:
-                total_lift += topics[z, w] * 1.0 / empirical_probs[w]
-        return np.log(total_lift * 1.0 / topics.shape[1])
-    else:
-        top_words = np.argsort(topics[z])[-n:]
-        for i in range(n):
-            w = top_words[i]
-            if empirical_probs[w] > 0:
-                total_lift += topics[z, w] * 1.0 / empirical_probs[w]
-        return np.log(total_lift * 1.0 / n)
-
-
 def log_lift(topics, z, data, n_words=-1):
     """Compute the log lift of a single topic given empirical data from which empirical
     probabilities of word occurrence can be computed.
@@ -94,7 +59,8 @@ def log_lift(topics, z, data, n_words=-1):
          in range(0, n_topics).
 
      data: array or sparse matrix of shape (n_docs, n_words,)
-         The empirical data of word occurrence in a corpus.
+         The empirical data of word occurrence in a corpus, or a
+         ``WordDocumentSketch`` or ``CoOccurrenceIndex`` of it.
 
      n: int (optional, default=-1)
          The number of words to average over. If less than 0 it will evaluate over the entire
@@ -105,11 +71,7 @@ def log_lift(topics, z, data, n_words=-1):
      log_lift: float
          The log lift of the ``z``th topic vector.
      """
-    normalized_topics = topics.copy()
-    normalize(normalized_topics, axis=1)
-    empirical_probs = np.array(data.sum(axis=0)).squeeze().astype(np.float64)
-    empirical_probs /= empirical_probs.sum()
-    return _log_lift(normalized_topics, z, empirical_probs, n=n_words)
+    return TopicScorer(data).log_lift(topics, z, n_words)
 
 
 def mean_log_lift(topics, data, n_words=-1):
@@ -122,7 +84,8 @@ def mean_log_lift(topics, data, n_words=-1):
          The topic vectors to evaluate.
 
      data: array or sparse matrix of shape (n_docs, n_words,)
-         The empirical data of word occurrence in a corpus.
+         The empirical data of word occurrence in a corpus, or a
+         ``WordDocumentSketch`` or ``CoOccurrenceIndex`` of it.
 
      n: int (optional, default=-1)
          The number of words to average over. If less than 0 it will evaluate over the entire
@@ -133,72 +96,214 @@ def mean_log_lift(topics, data, n_words=-1):
      log_lift: float
          The average log lift over all topic vectors.
      """
-    normalized_topics = topics.copy()
-    normalize(normalized_topics, axis=1)
-    empirical_probs = np.array(data.sum(axis=0)).squeeze().astype(np.float64)
-    empirical_probs /= empirical_probs.sum()
-    return np.mean(
-        [
-            _log_lift(topics, z, empirical_probs, n=n_words)
-            for z in range(topics.shape[0])
-        ]
+    return TopicScorer(data).mean_log_lift(topics, n_words)
+
+
+_TOPIC_METRICS = ("coherence", "log_lift")
+
+
+@numba.njit(nogil=True)
+def _top_word_indices(topic, n):
+    """The indices of the ``n`` largest entries of ``topic`` (or all of them, if
+    there are fewer than ``n``), in increasing order, found by partial selection
+    rather than a full sort."""
+    n = min(n, topic.shape[0])
+    threshold = np.partition(topic, topic.shape[0] - n)[topic.shape[0] - n]
+    result = np.empty(n, dtype=np.int64)
+    count = 0
+    for w in range(topic.shape[0]):
+        if topic[w] > threshold:
+            result[count] = w
+            count += 1
+    for w in range(topic.shape[0]):
+        if count == n:
+            break
+        if topic[w] == threshold:
+            result[count] = w
+            count += 1
+    return result[np.argsort(topic[result], kind="mergesort")]
+
+
+@numba.njit(parallel=True, nogil=True)
+def _top_words(topics, n):
+    """The indices of the top ``n`` words of each topic, in increasing order of
+    probability."""
+    n = min(n, topics.shape[1])
+    result = np.empty((topics.shape[0], n), dtype=np.int64)
+    for z in numba.prange(topics.shape[0]):
+        result[z] = _top_word_indices(topics[z], n)
+    return result
+
+
+_BITSET_BLOCK_DOCS = 2 ** 16
+
+
+def _word_documents(data):
+    """The documents each word occurs in, as a CSC matrix of ones with sorted
+    indices."""
+    if issparse(data):
+        result = data.tocsc(copy=True)
+    else:
+        result = csc_matrix(data)
+    result.data = (result.data > 0).astype(np.int8)
+    result.eliminate_zeros()
+    result.sort_indices()
+    return result
+
+
+@numba.njit(nogil=True)
+def _popcount(x):
+    x = x - ((x >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    x = (x & np.uint64(0x3333333333333333)) + (
+        (x >> np.uint64(2)) & np.uint64(0x3333333333333333)
     )
+    x = (x + (x >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return (x * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+@numba.njit(parallel=True, nogil=True)
+def _pack_document_bitsets(indptr, indices, first_doc, bitsets):
+    """Set bit ``d`` of row ``w`` of ``bitsets`` for each document ``first_doc + d``
+    that word ``w`` occurs in."""
+    n_docs = bitsets.shape[1] * 64
+    bitsets[:] = 0
+    for w in numba.prange(bitsets.shape[0]):
+        postings = indices[indptr[w] : indptr[w + 1]]
+        start = np.searchsorted(postings, first_doc)
+        end = np.searchsorted(postings, first_doc + n_docs)
+        for k in range(start, end):
+            d = postings[k] - first_doc
+            bitsets[w, d >> 6] |= np.uint64(1) << np.uint64(d & 63)
+
+
+@numba.njit(parallel=True, nogil=True)
+def _count_co_occurrences(top_words, bitsets, co_occurrences):
+    """Add the number of documents (within the block the bitsets describe) each
+    pair of each topic's top words occurs in to ``co_occurrences``."""
+    n_topics, n = top_words.shape
+    for z in numba.prange(n_topics):
+        for i in range(n - 1):
+            w = top_words[z, i]
+            for j in range(i + 1, n):
+                v = top_words[z, j]
+                count = 0
+                for b in range(bitsets.shape[1]):
+                    count += _popcount(bitsets[w, b] & bitsets[v, b])
+                co_occurrences[z, i, j] += count
+
+
+def _co_occurrence_counts(top_words, word_documents):
+    """Count the documents each pair of each topic's top words occur in together,
+    given the documents each word occurs in (as returned by ``_word_documents``).
+    Only the union of the topics' top words is used; their documents are packed
+    into bitsets, a block of documents at a time, and the co-occurrences are
+    counted with popcounts.
 
+    Returns
+    -------
+    table_top_words: array of shape (n_topics, n)
+        The top words of each topic as indices into the union of top words.
 
-@numba.njit()
-def arr_intersect(ar1, ar2):
-    """Numba compilable equivalent of numpy's intersect1d"""
-    aux = np.concatenate((ar1, ar2))
-    aux.sort()
-    return aux[:-1][aux[1:] == aux[:-1]]
-
+    co_occurrences: array of shape (n_topics, n, n)
+        The number of documents the ``i``th and ``j``th top words of each topic
+        occur in together, for ``i < j``.
 
-@numba.njit()
-def _coherence(topics, z, n, indices, indptr, n_docs_per_word):
-    """Internal routine for computing the coherence of a given topic given raw data and the
-    number of documents per vocabulary word. This routine makes use of scipy sparse matrix
-    formats, but to be numba compilable it must make use of internal arrays thereof.
+    n_docs_per_word: array of shape (n_union_words,)
+        The number of documents each of the union of top words occurs in.
+    """
+    words, table_top_words = np.unique(top_words, return_inverse=True)
+    table_top_words = table_top_words.reshape(top_words.shape)
+    word_docs = word_documents[:, words]
+    word_docs.sort_indices()
+
+    co_occurrences = np.zeros(top_words.shape + top_words.shape[1:], dtype=np.int64)
+    n_docs = word_docs.shape[0]
+    block_docs = min(_BITSET_BLOCK_DOCS, 64 * ((n_docs + 63) // 64))
+    bitsets = np.empty((words.shape[0], block_docs // 64), dtype=np.uint64)
+    for first_doc in range(0, n_docs, block_docs):
+        _pack_document_bitsets(
+            word_docs.indptr, word_docs.indices, first_doc, bitsets
+        )
+        _count_co_occurrences(table_top_words, bitsets, co_occurrences)
+
+    return table_top_words, co_occurrences, np.diff(word_docs.indptr)
+
+
+@numba.njit(parallel=True, nogil=True)
+def _score_topics(
+    topics,
+    top_words,
+    table_top_words,
+    co_occurrences,
+    n_docs_per_word,
+    empirical_probs,
+    n_log_lift_words,
+    coherence,
+    log_lift,
+):
+    """Internal routine computing the requested quality metrics of every topic in
+    a single parallel pass over the topics. A metric is skipped if its output
+    array is empty.
 
     Parameters
     ----------
     topics: array of shape (n_topics, n_words)
-        The topic vectors for scoring
-
-    z: int
-        Which topic vector to score.
+        The topic vectors to evaluate.
 
-    n: int
-        The number of topic words to score against. The top ``n`` words from the ``z``th topic
-        will be used.
+    top_words: array of shape (n_topics, n)
+        The top words of each topic, in increasing order of probability.
 
-    indices: array of shape (nnz,)
-        The indices array of a CSC format sparse matrix representation of the corpus data.
+    table_top_words, co_occurrences, n_docs_per_word: arrays
+        The co-occurrence counts of the top words, as returned by
+        ``_co_occurrence_counts``.
 
-    indptr: array of shape(n_words - 1,)
-        The indptr array of a CSC format sparse matrix representation of the corpus data.
+    empirical_probs: array of shape (n_words,)
+        The empirical probability of word occurrence.
 
-    n_docs_per_word: array of shape (n_words,)
-        The total number of documents for each vocabulary word (the column sum of the corpus data).
+    n_log_lift_words: int
+        The number of top words to average the lift over; if less than 1 the lift
+        is averaged over the entire vocabulary.
 
+    coherence: array of shape (n_topics,) or (0,)
+        The array to write the coherence of each topic to.
 
-    Returns
-    -------
-    topic_coherence: float
-        The coherence score of the ``z``th topic.
+    log_lift: array of shape (n_topics,) or (0,)
+        The array to write the log lift of each topic to.
     """
-    top_words = np.argsort(topics[z])[-n:]
-    coherence = 0.0
-    for i in range(n - 1):
-        w = top_words[i]
-        if n_docs_per_word[w] == 0:
-            continue
-        for j in range(i + 1, n):
-            v = top_words[j]
-            n_co_occur = arr_intersect(
-                indices[indptr[w] : indptr[w + 1]], indices[indptr[v] : indptr[v + 1]]
-            ).shape[0]
-            coherence += np.log((n_co_occur + 1.0) / n_docs_per_word[w])
-    return coherence
+    n_topics = topics.shape[0]
+    n = table_top_words.shape[1]
+    for z in numba.prange(n_topics):
+        if coherence.shape[0] > 0:
+            topic_coherence = 0.0
+            for i in range(n - 1):
+                n_docs_w = n_docs_per_word[table_top_words[z, i]]
+                if n_docs_w == 0:
+                    continue
+                for j in range(i + 1, n):
+                    topic_coherence += np.log(
+                        (co_occurrences[z, i, j] + 1.0) / n_docs_w
+                    )
+            coherence[z] = topic_coherence
+
+        if log_lift.shape[0] > 0:
+            total_lift = 0.0
+            if n_log_lift_words <= 0:
+                n_lift_words = topics.shape[1]
+                for w in range(topics.shape[1]):
+                    if empirical_probs[w] > 0:
+                        total_lift += topics[z, w] / empirical_probs[w]
+            else:
+                n_lift_words = n_log_lift_words
+                for i in range(n_log_lift_words):
+                    w = top_words[z, i]
+                    if empirical_probs[w] > 0:
+                        total_lift += topics[z, w] / empirical_probs[w]
+            topic_mass = 0.0
+            for w in range(topics.shape[1]):
+                topic_mass += topics[z, w]
+            if topic_mass > 0.0:
+                total_lift /= topic_mass
+            log_lift[z] = np.log(total_lift / n_lift_words)
 
 
 def coherence(topics, z, data, n_words=20):
@@ -213,7 +318,8 @@ def coherence(topics, z, data, n_words=20):
         Which topic vector to score.
 
     data: array or sparse matrix of shape (n_doc, n_words)
-        The empirical data of word occurrence in a corpus.
+        The empirical data of word occurrence in a corpus, or a
+        ``WordDocumentSketch`` or ``CoOccurrenceIndex`` of it.
 
     n_words: int (optional, default=20)
         The number of topic words to score against. The top ``n_words`` words from the ``z``th topic
@@ -224,15 +330,7 @@ def coherence(topics, z, data, n_words=20):
     topic_coherence: float
         The coherence score of the ``z``th topic.
     """
-    if not issparse(data):
-        csc_data = csc_matrix(data)
-    else:
-        csc_data = data.tocsc()
-
-    n_docs_per_word = np.array((data > 0).sum(axis=0)).squeeze()
-    return _coherence(
-        topics, z, n_words, csc_data.indices, csc_data.indptr, n_docs_per_word
-    )
+    return TopicScorer(data).coherence(topics, z, n_words)
 
 
 def mean_coherence(topics, data, n_words=20):
@@ -244,7 +342,8 @@ def mean_coherence(topics, data, n_words=20):
         The topic vectors for scoring
 
     data: array or sparse matrix of shape (n_doc, n_words)
-        The empirical data of word occurrence in a corpus.
+        The empirical data of word occurrence in a corpus, or a
+        ``WordDocumentSketch`` or ``CoOccurrenceIndex`` of it.
 
     n_words: int (optional, default=20)
         The number of topic words to score against. The top ``n_words`` words of each topic
@@ -255,17 +354,304 @@ def mean_coherence(topics, data, n_words=20):
     topic_coherence: float
         The average coherence score of all the topics.
     """
-    if not issparse(data):
-        csc_data = csc_matrix(data)
-    else:
-        csc_data = data.tocsc()
+    return TopicScorer(data).mean_coherence(topics, n_words)
+
+
+def topic_scores(topics, data, metrics=_TOPIC_METRICS, n_words=20):
+    """Compute quality metrics for every topic given empirical data, in a single
+    parallel pass over the topics. To score several sets of topics against the
+    same corpus use a ``TopicScorer``, which computes the corpus statistics once.
+
+    Parameters
+    ----------
+    topics: array of shape (n_topics, n_words)
+        The topic vectors for scoring
+
+    data: array or sparse matrix of shape (n_doc, n_words)
+        The empirical data of word occurrence in a corpus, or a
+        ``WordDocumentSketch`` or ``CoOccurrenceIndex`` of it.
 
-    n_docs_per_word = np.array((data > 0).sum(axis=0)).squeeze()
-    return np.mean(
-        [
-            _coherence(
-                topics, z, n_words, csc_data.indices, csc_data.indptr, n_docs_per_word
+    metrics: sequence of strings (optional, default=("coherence", "log_lift"))
+        The metrics to compute; each should be one of:
+            * ``"coherence"``
+            * ``"log_lift"``
+
+    n_words: int (optional, default=20)
+        The number of top words of each topic to score against.
+
+    Returns
+    -------
+    scores: dict
+        The score of each topic (an array of shape (n_topics,)) for each of the
+        requested metrics, keyed by metric.
+    """
+    return TopicScorer(data).topic_scores(topics, metrics, n_words)
+
+
+class TopicScorer(object):
+    """Score topics against a corpus, computing the corpus statistics the scores
+    need (the documents each word occurs in, and the empirical word probabilities)
+    once, when they are first used, rather than on every call. Scores for all the
+    topics of a topic matrix are computed together and kept for the most recently
+    scored matrix, so repeated per-topic and mean queries on the same topics are
+    answered without recomputation; topic matrices should therefore not be
+    modified in place between queries.
+
+    Parameters
+    ----------
+    data: array or sparse matrix of shape (n_docs, n_words)
+        The empirical data of word occurrence in a corpus. Statistics of a corpus
+        too large to hold in memory can be passed instead, as a
+        ``WordDocumentSketch`` or ``CoOccurrenceIndex`` of it; coherence is then
+        computed from their (exact or estimated) co-occurrence counts.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self._word_documents = None
+        self._empirical_probs = None
+        self._scores = {}
+
+    @property
+    def word_documents(self):
+        """The documents each word occurs in, as a CSC matrix of ones."""
+        if self._word_documents is None:
+            self._word_documents = _word_documents(self.data)
+        return self._word_documents
+
+    @property
+    def empirical_probs(self):
+        """The empirical probability of occurrence of each word."""
+        if self._empirical_probs is None:
+            if isinstance(self.data, _CORPUS_SUMMARIES):
+                empirical_probs = self.data.word_totals.copy()
+            else:
+                empirical_probs = np.array(self.data.sum(axis=0)).squeeze()
+            empirical_probs = empirical_probs.astype(np.float64)
+            empirical_probs /= empirical_probs.sum()
+            self._empirical_probs = empirical_probs
+        return self._empirical_probs
+
+    def _cached_scores(self, metric, topics, n_words):
+        cached = self._scores.get((metric, n_words))
+        if cached is not None and cached[0] is topics:
+            return cached[1]
+        return None
+
+    def _compute_scores(self, topics, metrics, n_words):
+        n_topics = topics.shape[0]
+        compute_coherence = "coherence" in metrics
+        compute_log_lift = "log_lift" in metrics
+        if compute_coherence and n_words <= 0:
+            raise ValueError("n_words must be positive to score coherence")
+        # Asking for more top words than the vocabulary holds scores all of them
+        n_words = min(n_words, topics.shape[1])
+
+        if n_words > 0:
+            top_words = _top_words(topics, n_words)
+        else:
+            top_words = np.empty((n_topics, 0), dtype=np.int64)
+        if compute_coherence and isinstance(self.data, _CORPUS_SUMMARIES):
+            table_top_words, co_occurrences, n_docs_per_word = (
+                self.data.co_occurrence_counts(top_words)
             )
-            for z in range(topics.shape[0])
-        ]
-    )
+        elif compute_coherence:
+            table_top_words, co_occurrences, n_docs_per_word = _co_occurrence_counts(
+                top_words, self.word_documents
+            )
+        else:
+            table_top_words = np.empty((n_topics, 0), dtype=np.int64)
+            co_occurrences = np.empty((n_topics, 0, 0), dtype=np.int64)
+            n_docs_per_word = np.empty(0, dtype=np.int64)
+        if compute_log_lift:
+            empirical_probs = self.empirical_probs
+        else:
+            empirical_probs = np.empty(0)
+
+        coherence = np.zeros(n_topics if compute_coherence else 0)
+        log_lift = np.zeros(n_topics if compute_log_lift else 0)
+        _score_topics(
+            topics,
+            top_words,
+            table_top_words,
+            co_occurrences,
+            n_docs_per_word,
+            empirical_probs,
+            n_words,
+            coherence,
+            log_lift,
+        )
+
+        result = {}
+        if compute_coherence:
+            result["coherence"] = coherence
+        if compute_log_lift:
+            result["log_lift"] = log_lift
+        return result
+
+    def topic_scores(self, topics, metrics=_TOPIC_METRICS, n_words=20):
+        """Compute quality metrics for every topic. All the requested metrics are
+        computed together, in a single parallel pass over the topics.
+
+        Parameters
+        ----------
+        topics: array of shape (n_topics, n_words)
+            The topic vectors for scoring
+
+        metrics: sequence of strings (optional, default=("coherence", "log_lift"))
+            The metrics to compute; each should be one of:
+                * ``"coherence"``
+                * ``"log_lift"``
+
+        n_words: int (optional, default=20)
+            The number of top words of each topic to score against. If less than 1
+            the log lift is evaluated over the entire vocabulary (coherence
+            requires a positive value).
+
+        Returns
+        -------
+        scores: dict
+            The score of each topic (an array of shape (n_topics,)) for each of the
+            requested metrics, keyed by metric.
+        """
+        for metric in metrics:
+            if metric not in _TOPIC_METRICS:
+                raise ValueError("metrics must be drawn from {}".format(_TOPIC_METRICS))
+
+        result = {}
+        missing = []
+        for metric in metrics:
+            cached = self._cached_scores(metric, topics, n_words)
+            if cached is None:
+                missing.append(metric)
+            else:
+                result[metric] = cached
+        if missing:
+            computed = self._compute_scores(topics, missing, n_words)
+            for metric, scores in computed.items():
+                self._scores[(metric, n_words)] = (topics, scores)
+                result[metric] = scores
+        return result
+
+    def topic_coherences(self, topics, n_words=20):
+        """Compute the coherence of every topic.
+
+        Parameters
+        ----------
+        topics: array of shape (n_topics, n_words)
+            The topic vectors for scoring
+
+        n_words: int (optional, default=20)
+            The number of topic words to score against. The top ``n_words`` words of each topic
+            will be used.
+
+        Returns
+        -------
+        topic_coherence: array of shape (n_topics,)
+            The coherence score of each topic.
+        """
+        return self.topic_scores(topics, ("coherence",), n_words)["coherence"]
+
+    def coherence(self, topics, z, n_words=20):
+        """Compute the coherence of a single topic.
+
+        Parameters
+        ----------
+        topics: array of shape (n_topics, n_words)
+            The topic vectors for scoring
+
+        z: int
+            Which topic vector to score.
+
+        n_words: int (optional, default=20)
+            The number of topic words to score against. The top ``n_words`` words from the ``z``th topic
+            will be used.
+
+        Returns
+        -------
+        topic_coherence: float
+            The coherence score of the ``z``th topic.
+        """
+        # Score every topic together, so later queries on the other topics are
+        # answered from the cache rather than each repacking the corpus
+        return self.topic_coherences(topics, n_words)[z]
+
+    def mean_coherence(self, topics, n_words=20):
+        """Compute the average coherence of all topics.
+
+        Parameters
+        ----------
+        topics: array of shape (n_topics, n_words)
+            The topic vectors for scoring
+
+        n_words: int (optional, default=20)
+            The number of topic words to score against. The top ``n_words`` words of each topic
+            will be used.
+
+        Returns
+        -------
+        topic_coherence: float
+            The average coherence score of all the topics.
+        """
+        return np.mean(self.topic_coherences(topics, n_words))
+
+    def topic_log_lifts(self, topics, n_words=-1):
+        """Compute the log lift of every topic.
+
+        Parameters
+        ----------
+        topics: array of shape (n_topics, n_words)
+            The topic vectors to evaluate.
+
+        n_words: int (optional, default=-1)
+            The number of words to average over. If less than 0 it will evaluate over the entire
+            vocabulary, otherwise it will select the top ``n_words`` words of each topic.
+
+        Returns
+        -------
+        log_lift: array of shape (n_topics,)
+            The log lift of each topic vector.
+        """
+        return self.topic_scores(topics, ("log_lift",), n_words)["log_lift"]
+
+    def log_lift(self, topics, z, n_words=-1):
+        """Compute the log lift of a single topic.
+
+        Parameters
+        ----------
+        topics: array of shape (n_topics, n_words)
+            The topic vectors to evaluate.
+
+        z: int
+            Which topic vector to evaluate. Must be
+            in range(0, n_topics).
+
+        n_words: int (optional, default=-1)
+            The number of words to average over. If less than 0 it will evaluate over the entire
+            vocabulary, otherwise it will select the top ``n_words`` words of the chosen topic.
+
+        Returns
+        -------
+        log_lift: float
+            The log lift of the ``z``th topic vector.
+        """
+        return self.topic_log_lifts(topics, n_words)[z]
+
+    def mean_log_lift(self, topics, n_words=-1):
+        """Compute the average log lift over all topics.
+
+        Parameters
+        ----------
+        topics: array of shape (n_topics, n_words)
+            The topic vectors to evaluate.
+
+        n_words: int (optional, default=-1)
+            The number of words to average over. If less than 0 it will evaluate over the entire
+            vocabulary, otherwise it will select the top ``n_words`` words of each topic.
+
+        Returns
+        -------
+        log_lift: float
+            The average log lift over all topic vectors.
+        """
+        return np.mean(self.topic_log_lifts(topics, n_words))
@@ -39,7 +39,7 @@ configuration = {
     "install_requires": [
         "scikit-learn >= 0.21",
         "scipy >= 1.0",
-        "numba >= 0.43",
+        "numba >= 0.49",
         "dask >= 1.2",
         "hdbscan >= 0.8",
         "umap-learn >= 0.3.8",